@@ -0,0 +1,126 @@
+"""
+EXPLAIN-based query plan checks for the test suite.
+
+QueryPlanTestCase.assertUsesIndexes() captures every SELECT run inside the
+block, EXPLAINs it and fails if the plan reads one of the large tables
+with a full scan or sorts rows in a temporary structure for ORDER BY.
+
+* SQLite: EXPLAIN QUERY PLAN. Without ANALYZE statistics the planner
+  assumes every table is large, so small test tables get the plan a
+  production-sized one would.
+* PostgreSQL: EXPLAIN (FORMAT JSON) with enable_seqscan and enable_sort
+  off, so a Seq Scan or Sort node only appears when no index can avoid it.
+
+Walking an index in order (SQLite "SCAN t USING INDEX") is allowed: with
+LIMIT it stops after a page. Temporary B-trees for DISTINCT and GROUP BY
+are allowed too; they only hold rows an index already narrowed down.
+"""
+import json
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+
+# Tables that grow with the business. Lookups on the rest (users,
+# profiles, settings-like rows) are fine either way.
+LARGE_TABLE_MODELS = (
+    'crops.Crop',
+    'crops.CropReview',
+    'orders.Order',
+    'orders.OrderItem',
+    'orders.FarmerOrder',
+    'orders.OrderStatusHistory',
+    'orders.ArchivedOrder',
+    'orders.ArchivedOrderItem',
+    'orders.ArchivedFarmerOrder',
+    'orders.OrderEvent',
+    'orders.StockReservation',
+    'orders.CropDailyStats',
+)
+
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)(?: AS (\w+))?$')
+
+
+def large_tables():
+    return {apps.get_model(label)._meta.db_table for label in LARGE_TABLE_MODELS}
+
+
+def _sqlite_problems(sql, tables, allow_sort):
+    problems = []
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        for row in cursor.fetchall():
+            detail = row[-1]
+            scan = _SQLITE_SCAN_RE.match(detail)
+            if scan and scan.group(1) in tables:
+                problems.append(f"full scan: {detail}")
+            elif 'TEMP B-TREE' in detail and 'ORDER BY' in detail and not allow_sort:
+                problems.append(f"temp sort: {detail}")
+    return problems
+
+
+def _postgresql_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _postgresql_nodes(child)
+
+
+def _postgresql_problems(sql, tables, allow_sort):
+    problems = []
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("SET LOCAL enable_sort = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+        cursor.execute("RESET enable_seqscan")
+        cursor.execute("RESET enable_sort")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    for node in _postgresql_nodes(plan[0]['Plan']):
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in tables:
+            problems.append(f"full scan: Seq Scan on {node['Relation Name']}")
+        elif node['Node Type'] in ('Sort', 'Incremental Sort') and not allow_sort:
+            problems.append(f"temp sort: {node['Node Type']} by {', '.join(node.get('Sort Key', []))}")
+    return problems
+
+
+def plan_problems(sql, allow_sort=False):
+    """Full scans of large tables and ORDER BY sorts in the plan of ``sql``."""
+    tables = large_tables()
+    if connection.vendor == 'sqlite':
+        return _sqlite_problems(sql, tables, allow_sort)
+    if connection.vendor == 'postgresql':
+        return _postgresql_problems(sql, tables, allow_sort)
+    return []
+
+
+class _PlanCapture(CaptureQueriesContext):
+    def __init__(self, test_case, allow_sort):
+        super().__init__(connection)
+        self.test_case = test_case
+        self.allow_sort = allow_sort
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        failures = []
+        for query in self.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            failures.extend(f"{problem}\n    {sql}" for problem in plan_problems(sql, self.allow_sort))
+        if failures:
+            self.test_case.fail("Unindexed query plans:\n  " + "\n  ".join(failures))
+
+
+class QueryPlanTestCase(TestCase):
+    def assertUsesIndexes(self, allow_sort=False):
+        """
+        Context manager failing the test if a SELECT run inside it scans a
+        large table or sorts for ORDER BY (unless ``allow_sort``).
+        """
+        return _PlanCapture(self, allow_sort)
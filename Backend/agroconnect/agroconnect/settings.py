@@ -7,6 +7,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # --------------------------------------------------
 # BASE
@@ -75,6 +76,7 @@ CORS_ALLOWED_ORIGINS = [
     "https://agroconnect-app-sm6g.onrender.com",
     "https://agroconnect-frontend-gamma.vercel.app",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 CSRF_TRUSTED_ORIGINS = [
     "https://agroconnect-app-sm6g.onrender.com",
     "https://agroconnect-frontend-gamma.vercel.app",
@@ -111,6 +113,18 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # SQLite ignores SELECT ... FOR UPDATE, and a transaction that reads
+        # before it writes fails with "database is locked" when another
+        # writer got there first: the busy timeout does not cover a lock
+        # upgrade. Checkout, reservations, idempotency keys, status updates
+        # and the rollups all read then write inside atomic(). Django has no
+        # per-atomic() mode, so every transaction here, read-only ones
+        # included, takes the write lock when it starts, and they queue for
+        # up to `timeout` seconds instead. SQLite serialises writers anyway;
+        # what this adds is read-only transactions waiting behind them.
+        # Only this local database is affected: DATABASE_URL (PostgreSQL)
+        # replaces the whole entry below.
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
     }
 }
 
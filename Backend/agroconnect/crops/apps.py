@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CropsConfig(AppConfig):
     name = 'crops'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,77 @@
+import time
+
+from django.core.cache import cache
+
+
+FACETS_VERSION_KEY = "crop_facets_v"
+CATALOG_VERSION_KEY = "crop_catalog_v"
+
+
+def _crop_version_key(crop_id):
+    return f"crop_v_{crop_id}"
+
+
+def _reviews_version_key(crop_id):
+    return f"crop_reviews_v_{crop_id}"
+
+
+def _initial_version():
+    # Seed versions from the clock so a key that was evicted and recreated
+    # never reuses a number whose cached responses may still be alive.
+    return int(time.time() * 1000)
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def get_facets_cache_version():
+    return _get_version(FACETS_VERSION_KEY)
+
+
+def bump_facets_cache_version():
+    _bump_version(FACETS_VERSION_KEY)
+
+
+def get_catalog_cache_version():
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def get_crop_cache_version(crop_id):
+    return _get_version(_crop_version_key(crop_id))
+
+
+def bump_catalog_cache_version(crop_ids=()):
+    """Invalidate cached catalog pages and the detail entries of ``crop_ids``."""
+    _bump_version(CATALOG_VERSION_KEY)
+    for crop_id in set(crop_ids):
+        _bump_version(_crop_version_key(crop_id))
+
+
+def get_reviews_cache_version(crop_id):
+    return _get_version(_reviews_version_key(crop_id))
+
+
+def bump_reviews_cache_version(*crop_ids):
+    for crop_id in set(crop_ids):
+        _bump_version(_reviews_version_key(crop_id))
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    # If-None-Match uses the weak comparison, so ignore any W/ prefix.
+    return '*' in candidates or etag in [tag.removeprefix('W/') for tag in candidates]
@@ -0,0 +1,122 @@
+"""
+Resized variants of Crop.image.
+
+When a crop gets a new image, generate_image_variants() runs on a small
+background thread pool after the transaction commits. It writes WebP and
+JPEG renditions through the default storage backend and records their
+names on Crop.image_variants, which CropSerializer turns into URLs.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_cache_version
+from .models import Crop
+
+
+logger = logging.getLogger(__name__)
+
+# name -> maximum width in pixels; images are never upscaled.
+IMAGE_VARIANTS = {
+    'thumb': 200,
+    'card': 480,
+    'full': 1200,
+}
+IMAGE_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='crop-images')
+
+
+def refresh_image_variants(crop, previous_image='', previous_variants=None):
+    """
+    Call after saving ``crop``. If its image changed, forget the old
+    variants and queue generation for the new image once committed.
+    """
+    if (crop.image.name or '') == (previous_image or ''):
+        return
+
+    if crop.image_variants:
+        Crop.objects.filter(pk=crop.pk).update(image_variants={})
+        crop.image_variants = {}
+
+    # The old variants are unreferenced from the commit on.
+    stale = previous_variants or {}
+    if stale:
+        transaction.on_commit(lambda: delete_image_variants(stale))
+    if not crop.image:
+        return
+
+    crop_id, image_name = crop.pk, crop.image.name
+    if getattr(settings, 'CROP_IMAGE_VARIANTS_SYNC', False):
+        transaction.on_commit(lambda: generate_image_variants(crop_id, image_name))
+    else:
+        transaction.on_commit(lambda: _executor.submit(_run_in_worker, crop_id, image_name))
+
+
+def delete_image_variants(variants):
+    """Remove the files of an ``image_variants`` mapping from storage."""
+    for entry in variants.values():
+        for extension, _, _ in IMAGE_FORMATS:
+            if entry.get(extension):
+                default_storage.delete(entry[extension])
+
+
+def _run_in_worker(crop_id, image_name):
+    try:
+        generate_image_variants(crop_id, image_name)
+    except Exception:
+        logger.exception("Generating image variants for crop %s failed", crop_id)
+    finally:
+        connections.close_all()
+
+
+def _render(image, width, image_format, options):
+    rendition = image.copy()
+    if rendition.width > width:
+        height = max(1, round(rendition.height * width / rendition.width))
+        rendition = rendition.resize((width, height), Image.LANCZOS)
+    if image_format == 'JPEG' and rendition.mode != 'RGB':
+        rendition = rendition.convert('RGB')
+
+    buffer = BytesIO()
+    rendition.save(buffer, format=image_format, **options)
+    return rendition.width, buffer.getvalue()
+
+
+def generate_image_variants(crop_id, image_name, stale_variants=None):
+    with default_storage.open(image_name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    variants = {}
+    for variant, max_width in IMAGE_VARIANTS.items():
+        entry = {}
+        for extension, image_format, options in IMAGE_FORMATS:
+            width, content = _render(image, max_width, image_format, options)
+            entry['width'] = width
+            entry[extension] = default_storage.save(
+                f"crops/variants/{crop_id}/{stem}_{variant}.{extension}",
+                ContentFile(content)
+            )
+        variants[variant] = entry
+
+    # Only record the variants if the image was not replaced meanwhile.
+    updated = Crop.objects.filter(pk=crop_id, image=image_name).update(image_variants=variants)
+    if updated:
+        bump_catalog_cache_version([crop_id])
+        delete_image_variants(stale_variants or {})
+    else:
+        delete_image_variants(variants)
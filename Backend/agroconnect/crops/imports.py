@@ -0,0 +1,143 @@
+"""
+Streaming bulk import of crops keyed on the farmer's SKU.
+
+Rows are read lazily from a CSV or JSON-lines source, validated in
+fixed-size chunks and written with one bulk_create plus one bulk_update
+per chunk, each chunk in its own transaction. Only the current chunk and
+a bounded error report are held in memory.
+"""
+import codecs
+import csv
+import json
+import time
+
+from django.db import DatabaseError, transaction
+
+from . import search
+from .cache import bump_catalog_cache_version, bump_facets_cache_version
+from .models import Crop
+from .serializers import CropImportRowSerializer
+
+
+IMPORT_FIELDS = ['name', 'category', 'description', 'price_per_kg', 'quantity_kg', 'harvest_date']
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_csv_rows(lines):
+    """Yield (row_number, dict) from an iterable of byte lines with a header row."""
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig'))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_jsonl_rows(lines):
+    """Yield (line_number, dict-or-error) from an iterable of byte lines."""
+    decoded = codecs.iterdecode(lines, 'utf-8-sig')
+    for line_number, line in enumerate(decoded, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            row = ValueError("Each line must be a JSON object.")
+        yield line_number, row
+
+
+class CropImport:
+    def __init__(self, farmer, chunk_size=500):
+        self.farmer = farmer
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        started = time.perf_counter()
+        chunk = []
+        for row_number, row in rows:
+            self.rows += 1
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+
+        if self.created or self.updated:
+            bump_facets_cache_version()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else None,
+        }
+
+    def _report(self, row_number, sku, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "sku": sku, "errors": errors})
+
+    def _import_chunk(self, chunk):
+        valid = {}
+        for row_number, row in chunk:
+            if isinstance(row, Exception):
+                self._report(row_number, None, {"non_field_errors": [str(row)]})
+                continue
+            serializer = CropImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                self._report(row_number, row.get('sku'), serializer.errors)
+                continue
+            data = serializer.validated_data
+            # A later row for the same SKU wins, as it would across chunks.
+            valid[data['sku']] = (row_number, data)
+
+        if not valid:
+            return
+
+        try:
+            with transaction.atomic():
+                existing = {
+                    crop.sku: crop
+                    for crop in Crop.objects.select_for_update().filter(
+                        farmer=self.farmer,
+                        sku__in=list(valid)
+                    ).only('id', 'sku', *IMPORT_FIELDS)
+                }
+                to_create = []
+                to_update = []
+                for sku, (_, data) in valid.items():
+                    crop = existing.get(sku)
+                    if crop is None:
+                        to_create.append(Crop(farmer=self.farmer, **data))
+                    else:
+                        for field in IMPORT_FIELDS:
+                            setattr(crop, field, data[field])
+                        to_update.append(crop)
+
+                Crop.objects.bulk_create(to_create)
+                Crop.objects.bulk_update(to_update, IMPORT_FIELDS)
+
+                # bulk writes skip the post_save signal, so index explicitly.
+                crop_ids = list(Crop.objects.filter(
+                    farmer=self.farmer,
+                    sku__in=list(valid)
+                ).values_list('id', flat=True))
+                search.index_crops(crop_ids)
+        except DatabaseError as exc:
+            for sku, (row_number, _) in valid.items():
+                self._report(row_number, sku, {"non_field_errors": [f"Database error: {exc}"]})
+            return
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+        bump_catalog_cache_version(crop_ids)
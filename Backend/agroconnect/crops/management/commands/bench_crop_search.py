@@ -0,0 +1,129 @@
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from crops import search
+from crops.models import Crop
+from users.models import FarmerProfile, User
+
+
+WORDS = [
+    'tomato', 'onion', 'potato', 'mango', 'banana', 'rice', 'wheat', 'chilli',
+    'turmeric', 'ginger', 'garlic', 'okra', 'brinjal', 'spinach', 'guava',
+    'papaya', 'millet', 'maize', 'cotton', 'groundnut', 'organic', 'fresh',
+    'premium', 'local', 'heirloom', 'hybrid', 'sweet', 'red', 'green', 'golden',
+]
+CATEGORIES = ['Vegetable', 'Fruit', 'Grain', 'Spice', 'Pulse']
+# Filler vocabulary so descriptions look like free text rather than
+# repeating the product words.
+FILLER = [f'{prefix}{suffix}' for prefix in ('har', 'lo', 'mi', 'ven', 'sol', 'tri', 'qua', 'zen')
+          for suffix in ('ta', 'vo', 'rin', 'das', 'pel', 'mor', 'quin', 'lex', 'dun', 'sar')]
+QUERIES = ['tomato', 'tom', 'organic mango', 'golden rice', 'spice', 'heirloom chilli']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the full-text crop search with the old name__icontains filter "
+        "on a synthetic catalog. All rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--crops', type=int, default=100_000)
+        parser.add_argument('--farmers', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if search.search_backend() is None:
+            self.stdout.write(self.style.WARNING("No search index on this database."))
+            return
+
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(42)
+        farmers = User.objects.bulk_create([
+            User(username=f'bench_farmer_{i}', role='FARMER')
+            for i in range(options['farmers'])
+        ])
+        FarmerProfile.objects.bulk_create([
+            FarmerProfile(user=farmer, farm_name=f'{rng.choice(WORDS).title()} Farm', location='Bench')
+            for farmer in farmers
+        ])
+
+        started = time.perf_counter()
+        batch = []
+        for i in range(options['crops']):
+            batch.append(Crop(
+                farmer=rng.choice(farmers),
+                name=' '.join(rng.sample(WORDS, 2)).title(),
+                category=rng.choice(CATEGORIES),
+                description=' '.join(rng.choices(FILLER, k=11) + [rng.choice(WORDS)]),
+                price_per_kg=rng.randint(10, 300),
+                quantity_kg=rng.randint(1, 1000),
+                harvest_date=date(2026, 1, 1),
+            ))
+            if len(batch) == 5000:
+                Crop.objects.bulk_create(batch)
+                batch = []
+        Crop.objects.bulk_create(batch)
+        seeded = time.perf_counter() - started
+
+        started = time.perf_counter()
+        search.rebuild_index()
+        indexed = time.perf_counter() - started
+        self.stdout.write(
+            f"Seeded {options['crops']} crops in {seeded:.1f}s, built index in {indexed:.1f}s"
+        )
+
+        base = Crop.objects.with_listing_data()
+        self.stdout.write(
+            f"{'query':<18}{'name icontains':>16}{'all-field icontains':>21}"
+            f"{'fts':>8}{'fts ranked':>12}{'hits':>8}   (median ms)"
+        )
+        for text in QUERIES:
+            icontains = self._time(
+                lambda: list(base.filter(name__icontains=text).order_by('-created_at', '-id')[:20]),
+                options['repeat']
+            )
+            all_fields = self._time(
+                lambda: list(base.filter(
+                    Q(name__icontains=text) |
+                    Q(category__icontains=text) |
+                    Q(description__icontains=text) |
+                    Q(farmer__farmerprofile__farm_name__icontains=text)
+                ).order_by('-created_at', '-id')[:20]),
+                options['repeat']
+            )
+            fts = self._time(
+                lambda: list(search.search_crops(base, text).order_by('-created_at', '-id')[:20]),
+                options['repeat']
+            )
+            ranked = self._time(
+                lambda: list(search.search_crops(base, text, ranked=True).order_by('-search_rank', '-id')[:20]),
+                options['repeat']
+            )
+            hits = search.search_crops(Crop.objects.all(), text).count()
+            self.stdout.write(
+                f"{text:<18}{icontains:>16.1f}{all_fields:>21.1f}{fts:>8.1f}{ranked:>12.1f}{hits:>8}"
+            )
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2]
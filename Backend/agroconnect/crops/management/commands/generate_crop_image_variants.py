@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from crops.images import generate_image_variants
+from crops.models import Crop
+
+
+class Command(BaseCommand):
+    help = "Generate resized image variants for crops that have an image but no variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate variants for every crop image.")
+
+    def handle(self, *args, **options):
+        crops = Crop.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            crops = crops.filter(image_variants={})
+
+        done = 0
+        for crop_id, image_name, variants in crops.values_list('id', 'image', 'image_variants').iterator():
+            try:
+                generate_image_variants(crop_id, image_name, variants)
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f"Crop {crop_id}: {exc}")
+                continue
+            done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Generated image variants for {done} crops."))
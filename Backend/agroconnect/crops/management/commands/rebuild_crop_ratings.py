@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from crops.models import Crop, CropReview, RATING_STAT_FIELDS, RATING_VALUES
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized review aggregates stored on Crop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        histogram_fields = [f'rating_{rating}_count' for rating in RATING_VALUES]
+        fields = list(RATING_STAT_FIELDS)
+
+        stats = CropReview.objects.values('crop_id').annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{
+                f'rating_{rating}_count': Count('id', filter=Q(rating=rating))
+                for rating in RATING_VALUES
+            }
+        ).order_by('crop_id')
+
+        updated = 0
+        with transaction.atomic():
+            Crop.objects.update(**{field: 0 for field in fields})
+
+            batch = []
+            for row in stats.iterator(chunk_size=batch_size):
+                crop = Crop(id=row['crop_id'])
+                crop.review_count = row['review_count']
+                crop.rating_sum = row['rating_sum']
+                crop.rating_avg = row['rating_sum'] / row['review_count']
+                for field in histogram_fields:
+                    setattr(crop, field, row[field])
+                batch.append(crop)
+
+                if len(batch) >= batch_size:
+                    Crop.objects.bulk_update(batch, fields)
+                    updated += len(batch)
+                    batch = []
+
+            if batch:
+                Crop.objects.bulk_update(batch, fields)
+                updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} crops."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crops import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the crop full-text search index from the crop and farmer profile tables."
+
+    def handle(self, *args, **options):
+        backend = search.search_backend()
+        if backend is None:
+            self.stdout.write(self.style.WARNING("No search index on this database; nothing to do."))
+            return
+
+        with transaction.atomic():
+            search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt crop search index ({backend})."))
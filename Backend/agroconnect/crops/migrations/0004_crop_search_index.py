@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE crops_crop_search USING fts5("
+    "name, category, farm_name, description, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "INSERT INTO crops_crop_search (rowid, name, category, farm_name, description) "
+    "SELECT c.id, c.name, c.category, COALESCE(p.farm_name, ''), c.description "
+    "FROM crops_crop c LEFT JOIN users_farmerprofile p ON p.user_id = c.farmer_id",
+]
+
+# The key column is named rowid on PostgreSQL too, so CropSearchDocument
+# maps onto both tables.
+POSTGRES_STATEMENTS = [
+    "CREATE TABLE crops_crop_search ("
+    "rowid bigint PRIMARY KEY, document tsvector NOT NULL)",
+    "CREATE INDEX crops_crop_search_document_gin "
+    "ON crops_crop_search USING GIN (document)",
+    "INSERT INTO crops_crop_search (rowid, document) "
+    "SELECT c.id, "
+    "setweight(to_tsvector('simple', c.name), 'A') || "
+    "setweight(to_tsvector('simple', c.category), 'B') || "
+    "setweight(to_tsvector('simple', COALESCE(p.farm_name, '')), 'C') || "
+    "setweight(to_tsvector('simple', c.description), 'D') "
+    "FROM crops_crop c LEFT JOIN users_farmerprofile p ON p.user_id = c.farmer_id",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            for statement in SQLITE_STATEMENTS:
+                schema_editor.execute(statement)
+        except OperationalError:
+            # SQLite built without FTS5: crops.search falls back to icontains.
+            pass
+    elif vendor == 'postgresql':
+        for statement in POSTGRES_STATEMENTS:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS crops_crop_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0003_crop_rating_aggregates'),
+        ('users', '0004_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='CropSearchDocument',
+            fields=[
+                ('crop', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='crops.crop')),
+            ],
+            options={
+                'db_table': 'crops_crop_search',
+                'managed': False,
+            },
+        ),
+    ]
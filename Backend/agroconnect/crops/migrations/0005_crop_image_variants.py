@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0004_crop_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crop',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0006_crop_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crop',
+            name='reserved_kg',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:39
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0007_crop_reserved_kg'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='crop',
+            name='rating_avg',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['created_at', 'id'], name='crop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['price_per_kg', 'id'], name='crop_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['rating_avg', 'review_count', 'id'], name='crop_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(django.db.models.functions.text.Lower('category'), models.F('created_at'), models.F('id'), name='crop_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(django.db.models.functions.text.Lower('category'), models.F('price_per_kg'), models.F('id'), name='crop_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropreview',
+            index=models.Index(fields=['crop', 'created_at', 'id'], name='cropreview_crop_created_idx'),
+        ),
+    ]
@@ -1,25 +1,117 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
+from django.db.models.functions import Cast, Lower
 from users.models import User
 
 
+RATING_VALUES = (1, 2, 3, 4, 5)
+RATING_STAT_FIELDS = (
+    'review_count',
+    'rating_sum',
+    'rating_avg',
+    *(f'rating_{rating}_count' for rating in RATING_VALUES),
+)
+# Columns written only through queryset updates, never by Crop.save().
+DERIVED_FIELDS = (*RATING_STAT_FIELDS, 'image_variants', 'reserved_kg')
+
+
+class CropQuerySet(models.QuerySet):
+    def with_listing_data(self):
+        """Join the farmer and profile rows read by CropSerializer."""
+        return self.select_related('farmer', 'farmer__farmerprofile')
+
+    def adjust_rating_stats(self, rating, delta):
+        """Add (delta=1) or remove (delta=-1) one review's rating in a single UPDATE."""
+        new_count = F('review_count') + delta
+        new_sum = F('rating_sum') + rating * delta
+        changes = {
+            'review_count': new_count,
+            'rating_sum': new_sum,
+            'rating_avg': Case(
+                When(review_count=-delta, then=Value(0.0)),
+                default=ExpressionWrapper(
+                    Cast(new_sum, FloatField()) / new_count,
+                    output_field=FloatField()
+                ),
+                output_field=FloatField()
+            ),
+        }
+        if rating in RATING_VALUES:
+            field = f'rating_{rating}_count'
+            changes[field] = F(field) + delta
+        return self.update(**changes)
+
+
 class Crop(models.Model):
     farmer = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         limit_choices_to={'role': 'FARMER'}
     )
+    # Farmer-supplied stock keeping unit, used as the key for bulk imports.
+    sku = models.CharField(max_length=64, null=True, blank=True)
     name = models.CharField(max_length=100)
     category = models.CharField(max_length=50)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='crops/', null=True, blank=True)
+    # {variant: {"width": px, "webp": name, "jpeg": name}}, see crops.images.
+    image_variants = models.JSONField(default=dict, blank=True)
     price_per_kg = models.DecimalField(max_digits=8, decimal_places=2)
     quantity_kg = models.PositiveIntegerField()
+    # Sum of active StockReservation holds, maintained by orders.reservations.
+    reserved_kg = models.PositiveIntegerField(default=0)
     harvest_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized review aggregates, maintained by crops.signals.
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    objects = CropQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('farmer', 'sku')
+        # One index per catalog sort, each ending in id like the orderings
+        # in crops.views, so a page is an index walk rather than a sort.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='crop_created_idx'),
+            models.Index(fields=['price_per_kg', 'id'], name='crop_price_idx'),
+            models.Index(fields=['rating_avg', 'review_count', 'id'], name='crop_rating_idx'),
+            # The category filter is case-insensitive.
+            models.Index(Lower('category'), 'created_at', 'id', name='crop_category_created_idx'),
+            models.Index(Lower('category'), 'price_per_kg', 'id', name='crop_category_price_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.farmer.username}"
 
+    def save(self, *args, **kwargs):
+        # Rating aggregates, image variants and holds are written by queryset
+        # updates; saving a stale instance must not overwrite them.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def available_kg(self):
+        return max(self.quantity_kg - self.reserved_kg, 0)
+
+    @property
+    def rating_histogram(self):
+        return {
+            str(rating): getattr(self, f'rating_{rating}_count')
+            for rating in RATING_VALUES
+        }
+
 
 class CropReview(models.Model):
     crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='reviews')
@@ -34,6 +126,39 @@ class CropReview(models.Model):
 
     class Meta:
         unique_together = ('crop', 'customer')
+        indexes = [
+            models.Index(fields=['crop', 'created_at', 'id'], name='cropreview_crop_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.crop.name} review by {self.customer.username}"
+
+    # The signal handlers in crops.signals update Crop's rating aggregates;
+    # wrapping the write keeps the review row and the counters consistent.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class CropSearchDocument(models.Model):
+    """
+    Read-only view of the full-text index table created by migration 0004
+    (an FTS5 table on SQLite, a tsvector + GIN table on PostgreSQL).
+    Rows are written by crops.search, never through the ORM.
+    """
+    crop = models.OneToOneField(
+        Crop,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_document'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'crops_crop_search'
@@ -0,0 +1,202 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _parse_ordering(queryset):
+    """Return [(lookup, descending), ...] for the queryset's ORDER BY."""
+    ordering = []
+    for item in queryset.query.order_by:
+        if not isinstance(item, str):
+            raise ImproperlyConfigured("Keyset pagination needs string orderings.")
+        ordering.append((item.lstrip('-'), item.startswith('-')))
+    if not ordering or ordering[-1][0] not in ('id', 'pk'):
+        raise ImproperlyConfigured("Keyset pagination ordering must end with 'id'.")
+    return ordering
+
+
+def _resolve_field(model, lookup):
+    field = None
+    for part in lookup.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model or model
+    return field
+
+
+def _read_value(instance, lookup):
+    value = instance
+    for part in lookup.split('__'):
+        value = getattr(value, part)
+    return value
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _sort_rows(rows, ordering, reverse=False):
+    # Stable sorts from the last key to the first merge sorted runs.
+    for lookup, descending in reversed(ordering):
+        rows.sort(key=lambda row: _read_value(row, lookup), reverse=descending != reverse)
+
+
+def merge_querysets(querysets, offset=0, limit=None):
+    """
+    Rows ``offset:limit`` of querysets sharing one ordering, read as one
+    sequence, e.g. a table and its archive. Each queryset is read up to
+    ``limit`` rows.
+    """
+    if len(querysets) == 1:
+        return list(querysets[0][offset:limit])
+    ordering = _parse_ordering(querysets[0])
+    rows = []
+    for queryset in querysets:
+        rows.extend(queryset[:limit])
+    _sort_rows(rows, ordering)
+    return rows[offset:limit]
+
+
+def keyset_filter(ordering, values, forward=True):
+    """
+    Build the "row comes after `values`" predicate for a multi-column
+    ordering, i.e. (a < x) OR (a = x AND b < y) ... for descending keys.
+    """
+    condition = Q()
+    equal_prefix = {}
+    for (lookup, descending), value in zip(ordering, values):
+        operator = 'lt' if descending == forward else 'gt'
+        condition |= Q(**equal_prefix, **{f'{lookup}__{operator}': value})
+        equal_prefix[lookup] = value
+    return condition
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination over the queryset's own ordering (which must end in
+    'id'). Pages are fetched with a WHERE on the last seen key instead of
+    OFFSET, so page 1000 costs the same as page 1.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'k': [_dump_value(v) for v in values], 'r': int(reverse)})
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, queryset, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            raw_values = payload['k']
+            reverse = bool(payload.get('r'))
+            if len(raw_values) != len(ordering):
+                raise ValueError
+
+            values = []
+            for (lookup, _), raw in zip(ordering, raw_values):
+                field = _resolve_field(queryset.model, lookup)
+                values.append(field.to_python(raw) if field is not None else raw)
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request, view=view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Paginate querysets sharing one ordering as a single sequence, e.g. a
+        table and its archive. Ids must not repeat across them.
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.ordering = _parse_ordering(querysets[0])
+
+        position, reverse = self.decode_cursor(request, querysets[0], self.ordering)
+        rows = []
+        for queryset in querysets:
+            if reverse:
+                queryset = queryset.order_by(*[
+                    lookup if descending else f'-{lookup}'
+                    for lookup, descending in self.ordering
+                ])
+            if position is not None:
+                queryset = queryset.filter(
+                    keyset_filter(self.ordering, position, forward=not reverse)
+                )
+            rows.extend(queryset[:self.page_size_value + 1])
+
+        if len(querysets) > 1:
+            _sort_rows(rows, self.ordering, reverse)
+
+        has_extra = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            has_next, has_previous = position is not None, has_extra
+        else:
+            has_next, has_previous = has_extra, position is not None
+
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows and has_next:
+            self.next_cursor = self.encode_cursor(self._key(rows[-1]), reverse=False)
+        if rows and has_previous:
+            self.previous_cursor = self.encode_cursor(self._key(rows[0]), reverse=True)
+        return rows
+
+    def _key(self, instance):
+        return [_read_value(instance, lookup) for lookup, _ in self.ordering]
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "page_size": self.page_size_value,
+            "results": data
+        })
@@ -0,0 +1,195 @@
+"""
+Full-text search over crops.
+
+The index lives in a side table, ``crops_crop_search``, created by
+migration 0004: an FTS5 virtual table on SQLite (rowid = crop id) and a
+``tsvector`` column with a GIN index on PostgreSQL, keyed by ``rowid`` =
+crop id on both and mapped read-only as CropSearchDocument. It covers the
+crop name, category, farm name and description and is kept in sync by the
+handlers in crops.signals. Other backends fall back to icontains.
+"""
+import re
+
+from django.db import NotSupportedError, connection
+from django.db.models import BooleanField, Expression, F, FloatField, Q
+
+
+SEARCH_TABLE = 'crops_crop_search'  # CropSearchDocument._meta.db_table
+CROP_TABLE = 'crops_crop'
+PROFILE_TABLE = 'users_farmerprofile'
+
+# Column weights: name, category, farm name, description.
+SQLITE_BM25_WEIGHTS = '10.0, 5.0, 3.0, 1.0'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_index_available = {}
+
+
+def search_backend():
+    """Return 'sqlite', 'postgresql' or None when no index table exists."""
+    vendor = connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return None
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if key not in _index_available:
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        _index_available[key] = SEARCH_TABLE in tables
+    return vendor if _index_available[key] else None
+
+
+def _tokens(text):
+    return [token.lower() for token in _TOKEN_RE.findall(text or '')][:8]
+
+
+def _match_query(backend, tokens):
+    # Every token must match, and each is a prefix so "tom" finds "tomato".
+    if backend == 'sqlite':
+        return ' '.join(f'"{token}"*' for token in tokens)
+    return ' & '.join(f"{token}:*" for token in tokens)
+
+
+class _SearchExpression(Expression):
+    """
+    Base for expressions over the joined search table. The join comes from
+    referencing Crop.search_document, so the index drives the query instead
+    of being probed once per crop row.
+    """
+
+    def __init__(self, query, output_field):
+        super().__init__(output_field=output_field)
+        self.query = query
+        self.document = F('search_document__pk')
+
+    def get_source_expressions(self):
+        return [self.document]
+
+    def set_source_expressions(self, exprs):
+        (self.document,) = exprs
+
+    def _table(self, compiler):
+        return compiler.quote_name_unless_alias(self.document.alias)
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError("Crop search index is only available on SQLite and PostgreSQL.")
+
+
+class SearchMatch(_SearchExpression):
+    def __init__(self, query):
+        super().__init__(query, output_field=BooleanField())
+
+    def as_sqlite(self, compiler, connection):
+        column = connection.ops.quote_name(SEARCH_TABLE)
+        return f"{self._table(compiler)}.{column} MATCH %s", [self.query]
+
+    def as_postgresql(self, compiler, connection):
+        return f"{self._table(compiler)}.document @@ to_tsquery('simple', %s)", [self.query]
+
+
+class SearchRank(_SearchExpression):
+    """Relevance score; higher is better on both backends."""
+
+    def __init__(self, query):
+        super().__init__(query, output_field=FloatField())
+
+    def as_sqlite(self, compiler, connection):
+        column = connection.ops.quote_name(SEARCH_TABLE)
+        return f"-bm25({self._table(compiler)}.{column}, {SQLITE_BM25_WEIGHTS})", []
+
+    def as_postgresql(self, compiler, connection):
+        return (
+            f"ts_rank({self._table(compiler)}.document, to_tsquery('simple', %s))",
+            [self.query]
+        )
+
+
+def search_crops(queryset, text, ranked=False):
+    """
+    Restrict a Crop queryset to rows matching ``text``. With ``ranked``,
+    also annotate ``search_rank`` so the caller can order by it.
+    """
+    backend = search_backend()
+    tokens = _tokens(text)
+    if backend is None or not tokens:
+        return queryset.filter(
+            Q(name__icontains=text) |
+            Q(category__icontains=text) |
+            Q(description__icontains=text) |
+            Q(farmer__farmerprofile__farm_name__icontains=text)
+        )
+
+    query = _match_query(backend, tokens)
+    # isnull=False turns the join into an INNER JOIN, letting the database
+    # start from the index instead of scanning crops.
+    queryset = queryset.filter(SearchMatch(query), search_document__isnull=False)
+    if ranked:
+        queryset = queryset.annotate(search_rank=SearchRank(query))
+    return queryset
+
+
+def _reindex(where_sql, params):
+    backend = search_backend()
+    if backend is None:
+        return
+
+    with connection.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+                f"(SELECT c.id FROM {CROP_TABLE} c WHERE {where_sql})",
+                params
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, name, category, farm_name, description) "
+                f"SELECT c.id, c.name, c.category, COALESCE(p.farm_name, ''), c.description "
+                f"FROM {CROP_TABLE} c LEFT JOIN {PROFILE_TABLE} p ON p.user_id = c.farmer_id "
+                f"WHERE {where_sql}",
+                params
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, document) "
+                f"SELECT c.id, "
+                f"setweight(to_tsvector('simple', c.name), 'A') || "
+                f"setweight(to_tsvector('simple', c.category), 'B') || "
+                f"setweight(to_tsvector('simple', COALESCE(p.farm_name, '')), 'C') || "
+                f"setweight(to_tsvector('simple', c.description), 'D') "
+                f"FROM {CROP_TABLE} c LEFT JOIN {PROFILE_TABLE} p ON p.user_id = c.farmer_id "
+                f"WHERE {where_sql} "
+                f"ON CONFLICT (rowid) DO UPDATE SET document = EXCLUDED.document",
+                params
+            )
+
+
+def index_crops(crop_ids):
+    crop_ids = list(crop_ids)
+    if crop_ids:
+        placeholders = ', '.join(['%s'] * len(crop_ids))
+        _reindex(f"c.id IN ({placeholders})", crop_ids)
+
+
+def index_farmer_crops(farmer_id):
+    _reindex("c.farmer_id = %s", [farmer_id])
+
+
+def remove_crops(crop_ids):
+    crop_ids = list(crop_ids)
+    backend = search_backend()
+    if backend is None or not crop_ids:
+        return
+
+    placeholders = ', '.join(['%s'] * len(crop_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})",
+            crop_ids
+        )
+
+
+def rebuild_index():
+    backend = search_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    _reindex("1 = 1", [])
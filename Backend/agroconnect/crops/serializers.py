@@ -9,8 +9,11 @@ class CropSerializer(serializers.ModelSerializer):
     farm_name = serializers.SerializerMethodField()
     farmer_location = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     avg_rating = serializers.SerializerMethodField()
-    review_count = serializers.SerializerMethodField()
+    rating_histogram = serializers.ReadOnlyField()
+    available_kg = serializers.ReadOnlyField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Crop
@@ -20,26 +23,39 @@ class CropSerializer(serializers.ModelSerializer):
             'farmer_name',
             'farm_name',
             'farmer_location',
+            'sku',
             'name',
             'category',
             'description',
             'image',
             'image_url',
+            'image_variants',
             'price_per_kg',
             'quantity_kg',
+            'available_kg',
             'harvest_date',
             'created_at',
             'avg_rating',
-            'review_count'
+            'review_count',
+            'rating_histogram',
+            'distance_km'
         ]
-        read_only_fields = ['farmer']
+        read_only_fields = ['farmer', 'review_count']
+
+    def _get_profile(self, obj):
+        # with_listing_data() select_related()s the profile; fall back to a
+        # lookup for instances that did not come through that queryset.
+        try:
+            return obj.farmer.farmerprofile
+        except FarmerProfile.DoesNotExist:
+            return None
 
     def get_farm_name(self, obj):
-        profile = FarmerProfile.objects.filter(user=obj.farmer).first()
+        profile = self._get_profile(obj)
         return profile.farm_name if profile else None
 
     def get_farmer_location(self, obj):
-        profile = FarmerProfile.objects.filter(user=obj.farmer).first()
+        profile = self._get_profile(obj)
         return profile.location if profile else None
 
     def get_image_url(self, obj):
@@ -47,14 +63,45 @@ class CropSerializer(serializers.ModelSerializer):
             return None
         return obj.image.url
 
+    def get_image_variants(self, obj):
+        """Variant URLs per format plus a ready-made srcset string."""
+        if not obj.image or not obj.image_variants:
+            return None
+        storage = obj.image.storage
+        variants = {}
+        srcset = {}
+        for name, entry in obj.image_variants.items():
+            variants[name] = {'width': entry['width']}
+            for extension in ('webp', 'jpeg'):
+                if entry.get(extension):
+                    url = storage.url(entry[extension])
+                    variants[name][extension] = url
+                    srcset.setdefault(extension, []).append(f"{url} {entry['width']}w")
+        variants['srcset'] = {extension: ', '.join(items) for extension, items in srcset.items()}
+        return variants
+
     def get_avg_rating(self, obj):
-        ratings = obj.reviews.values_list('rating', flat=True)
-        if not ratings:
+        if not obj.review_count:
+            return None
+        return round(obj.rating_avg, 2)
+
+    def get_distance_km(self, obj):
+        # Only annotated when the catalog is filtered with ?near=.
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 1) if distance is not None else None
+
+    def validate_sku(self, value):
+        value = (value or '').strip() or None
+        if value is None:
             return None
-        return round(sum(ratings) / len(ratings), 2)
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
+        farmer = self.instance.farmer if self.instance else self.context['request'].user
+        duplicates = Crop.objects.filter(farmer=farmer, sku=value)
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("You already have a crop with this SKU.")
+        return value
 
     def validate_harvest_date(self, value):
         if value and value > date.today():
@@ -62,6 +109,22 @@ class CropSerializer(serializers.ModelSerializer):
         return value
 
 
+class CropImportRowSerializer(serializers.Serializer):
+    """One row of a bulk crop import; validated without touching the database."""
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=100)
+    category = serializers.CharField(max_length=50)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    price_per_kg = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0)
+    quantity_kg = serializers.IntegerField(min_value=0)
+    harvest_date = serializers.DateField()
+
+    def validate_harvest_date(self, value):
+        if value > date.today():
+            raise serializers.ValidationError("Harvest date cannot be in the future.")
+        return value
+
+
 class CropReviewSerializer(serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.username', read_only=True)
 
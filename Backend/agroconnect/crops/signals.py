@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import FarmerProfile
+from . import search
+from .images import delete_image_variants
+from .cache import (
+    bump_catalog_cache_version,
+    bump_facets_cache_version,
+    bump_reviews_cache_version
+)
+from .models import Crop, CropReview
+
+
+SEARCH_FIELDS = {'name', 'category', 'description'}
+
+
+def _bump_on_commit(facets=False, crop_ids=None, review_crop_ids=()):
+    # A bump before commit lets a concurrent reader cache the new version
+    # with the old rows, so the caches are only invalidated once committed.
+    crop_ids = None if crop_ids is None else list(crop_ids)
+
+    def bump():
+        if review_crop_ids:
+            bump_reviews_cache_version(*review_crop_ids)
+        if facets:
+            bump_facets_cache_version()
+        if crop_ids is not None:
+            bump_catalog_cache_version(crop_ids)
+
+    transaction.on_commit(bump)
+
+
+@receiver(pre_save, sender=CropReview)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = CropReview.objects.filter(
+            pk=instance.pk
+        ).values_list('crop_id', 'rating').first()
+
+
+@receiver(post_save, sender=CropReview)
+def apply_review_rating(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    current = (instance.crop_id, instance.rating)
+    review_crop_ids = [instance.crop_id] + ([previous[0]] if previous else [])
+    if not created and previous == current:
+        _bump_on_commit(review_crop_ids=review_crop_ids)
+        return
+
+    if previous is not None:
+        Crop.objects.filter(pk=previous[0]).adjust_rating_stats(previous[1], -1)
+    Crop.objects.filter(pk=instance.crop_id).adjust_rating_stats(instance.rating, 1)
+    _bump_on_commit(facets=True, crop_ids=review_crop_ids, review_crop_ids=review_crop_ids)
+
+
+@receiver(post_delete, sender=CropReview)
+def remove_review_rating(sender, instance, **kwargs):
+    Crop.objects.filter(pk=instance.crop_id).adjust_rating_stats(instance.rating, -1)
+    _bump_on_commit(facets=True, crop_ids=[instance.crop_id], review_crop_ids=[instance.crop_id])
+
+
+@receiver(post_save, sender=Crop)
+@receiver(post_delete, sender=Crop)
+def invalidate_crop_caches(sender, instance, **kwargs):
+    _bump_on_commit(facets=True, crop_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Crop)
+def index_crop(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    search.index_crops([instance.pk])
+
+
+@receiver(post_delete, sender=Crop)
+def unindex_crop(sender, instance, **kwargs):
+    search.remove_crops([instance.pk])
+
+
+@receiver(post_delete, sender=Crop)
+def delete_crop_image_variants(sender, instance, **kwargs):
+    variants = instance.image_variants or {}
+    if variants:
+        transaction.on_commit(lambda: delete_image_variants(variants))
+
+
+@receiver(post_save, sender=FarmerProfile)
+def index_farmer_profile(sender, instance, **kwargs):
+    search.index_farmer_crops(instance.user_id)
+    # Search and near filters match farm_name and location, facets included.
+    _bump_on_commit(
+        facets=True,
+        crop_ids=Crop.objects.filter(farmer_id=instance.user_id).values_list('id', flat=True)
+    )
@@ -1,3 +1,467 @@
-from django.test import TestCase
+import tempfile
+from datetime import date
+from io import BytesIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+from agroconnect.query_plans import QueryPlanTestCase
+from orders.models import Order, OrderItem
+from users.models import FarmerProfile, User
+from .models import Crop, CropReview
+
+
+class CatalogQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        FarmerProfile.objects.create(user=cls.farmer, farm_name='Farm', location='Pune')
+        cls.customer = User.objects.create_user('customer', password='x', role='CUSTOMER')
+        cls.crop = Crop.objects.create(
+            farmer=cls.farmer, name='Apple', category='Fruit', price_per_kg=40,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        Crop.objects.create(
+            farmer=cls.farmer, name='Bean', category='Vegetable', price_per_kg=20,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        order = Order.objects.create(customer=cls.customer, status='CONFIRMED', total_amount=40)
+        OrderItem.objects.create(order=order, crop=cls.crop, quantity_kg=1, price_per_kg=40)
+        CropReview.objects.create(crop=cls.crop, customer=cls.customer, rating=5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_public_list_sorts(self):
+        for sort in ('newest', 'oldest', 'price_low', 'price_high', 'rating'):
+            with self.subTest(sort=sort), self.assertUsesIndexes():
+                self.assertEqual(self.client.get('/api/crops/', {'sort': sort}).status_code, 200)
+
+    def test_public_list_filters(self):
+        for params in ({'category': 'fruit'}, {'category': 'FRUIT', 'sort': 'price_low'}):
+            with self.subTest(params=params), self.assertUsesIndexes():
+                response = self.client.get('/api/crops/', params)
+            self.assertEqual([crop['name'] for crop in response.data['results']], ['Apple'])
+
+        with self.assertUsesIndexes():
+            self.assertEqual(self.client.get('/api/crops/', {'min_price': 10}).status_code, 200)
+
+    def test_public_list_ranked_orders(self):
+        # Relevance and distance are computed per row, so matches are
+        # sorted; the indexes only have to find them.
+        for params in ({'search': 'apple'}, {'near': '18.52,73.85', 'sort': 'distance'}):
+            with self.subTest(params=params), self.assertUsesIndexes(allow_sort=True):
+                self.assertEqual(self.client.get('/api/crops/', params).status_code, 200)
+
+    def test_crop_detail_and_facets(self):
+        with self.assertUsesIndexes():
+            self.client.get(f'/api/crops/{self.crop.id}/')
+            self.client.get('/api/crops/facets/', {'category': 'fruit'})
+
+    def test_reviews(self):
+        with self.assertUsesIndexes():
+            response = self.client.get(f'/api/crops/{self.crop.id}/reviews/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self.client.force_authenticate(self.customer)
+        with self.assertUsesIndexes():
+            response = self.client.post(f'/api/crops/{self.crop.id}/reviews/', {'rating': 4})
+        self.assertEqual(response.status_code, 400)
+
+    def test_farmer_crops(self):
+        self.client.force_authenticate(self.farmer)
+        with self.assertUsesIndexes():
+            self.assertEqual(self.client.get('/api/farmer/crops/').status_code, 200)
+
+
+class RatingAggregateTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        cls.customers = [
+            User.objects.create_user(f'customer{i}', password='x', role='CUSTOMER') for i in range(2)
+        ]
+        cls.crop = Crop.objects.create(
+            farmer=cls.farmer, name='Apple', category='Fruit', price_per_kg=40,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        for customer in cls.customers:
+            order = Order.objects.create(customer=customer, status='CONFIRMED', total_amount=40)
+            OrderItem.objects.create(order=order, crop=cls.crop, quantity_kg=1, price_per_kg=40)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertRatings(self, count, average, histogram):
+        # Served from the catalog cache, so this also checks it was invalidated.
+        crop = self.client.get(f'/api/crops/{self.crop.id}/').data
+        self.assertEqual(crop['review_count'], count)
+        self.assertEqual(crop['avg_rating'], average)
+        self.assertEqual(crop['rating_histogram'], {**dict.fromkeys('12345', 0), **histogram})
+
+    def test_aggregates_follow_reviews(self):
+        self.assertRatings(0, None, {})
+
+        for customer, rating in zip(self.customers, (5, 2)):
+            self.client.force_authenticate(customer)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/crops/{self.crop.id}/reviews/', {'rating': rating})
+            self.assertEqual(response.status_code, 201)
+        self.assertRatings(2, 3.5, {'5': 1, '2': 1})
+
+        review = CropReview.objects.get(customer=self.customers[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            review.rating = 4
+            review.save()
+        self.assertRatings(2, 4.5, {'5': 1, '4': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CropReview.objects.get(customer=self.customers[0]).delete()
+        self.assertRatings(1, 4, {'4': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        self.assertRatings(0, None, {})
+
+
+class CatalogCursorTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        for i in range(20):
+            Crop.objects.create(
+                farmer=farmer, name=f'Crop {i}', category='Fruit', price_per_kg=(10, 20, 30)[i % 3],
+                quantity_kg=100, harvest_date=date(2026, 1, 1)
+            )
+        # Equal sort keys make the id tie-breaker decide the order.
+        Crop.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_crop_appears_once_in_order(self):
+        for sort in ('newest', 'oldest', 'price_low', 'price_high', 'rating'):
+            with self.subTest(sort=sort):
+                expected = [
+                    crop['id'] for crop in
+                    self.client.get('/api/crops/', {'sort': sort, 'page_size': 100}).data['results']
+                ]
+                self.assertEqual(len(expected), 20)
+
+                ids = []
+                url = f'/api/crops/?sort={sort}&page_size=7'
+                while url:
+                    response = self.client.get(url)
+                    ids += [crop['id'] for crop in response.data['results']]
+                    url = response.data['next']
+                self.assertEqual(ids, expected)
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get('/api/crops/', {'cursor': 'nonsense'}).status_code, 404)
+
+
+class BulkImportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        cls.existing = Crop.objects.create(
+            farmer=cls.farmer, sku='A1', name='Apple', category='Fruit', price_per_kg=40,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.farmer)
+
+    def upload(self, body, content_type='text/csv'):
+        return self.client.post('/api/farmer/crops/bulk/', body.encode(), content_type=content_type)
+
+    def test_upserts_on_sku_and_reports_row_errors(self):
+        body = (
+            "sku,name,category,description,price_per_kg,quantity_kg,harvest_date\n"
+            "A1,Red Apple,Fruit,,45,80,2026-01-02\n"
+            "B1,Bean,Vegetable,,20,50,2026-01-03\n"
+            "C1,,Vegetable,,x,10,2026-01-03\n"
+        )
+        response = self.upload(body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ('rows', 'created', 'updated', 'failed')},
+            {'rows': 3, 'created': 1, 'updated': 1, 'failed': 1}
+        )
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+        self.assertEqual(response.data['errors'][0]['sku'], 'C1')
+        self.assertEqual(set(response.data['errors'][0]['errors']), {'name', 'price_per_kg'})
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.quantity_kg), ('Red Apple', 80))
+        self.assertEqual(Crop.objects.get(sku='B1').name, 'Bean')
+        self.assertFalse(Crop.objects.filter(sku='C1').exists())
+
+        response = self.upload(body)
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 2))
+        self.assertEqual(Crop.objects.filter(farmer=self.farmer).count(), 2)
+
+    def test_json_lines(self):
+        response = self.upload(
+            '{"sku": "A1", "name": "Apple", "category": "Fruit", "price_per_kg": "41", '
+            '"quantity_kg": 5, "harvest_date": "2026-01-01"}\n[1]\n',
+            content_type='application/x-ndjson'
+        )
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertEqual(self.upload('x', content_type='application/json').status_code, 415)
+
+
+class CatalogCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        cls.profile = FarmerProfile.objects.create(user=cls.farmer, farm_name='Farm', location='Pune')
+        cls.customer = User.objects.create_user('customer', password='x', role='CUSTOMER')
+        cls.crop = Crop.objects.create(
+            farmer=cls.farmer, name='Apple', category='Fruit', price_per_kg=40,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        cls.urls = ('/api/crops/', f'/api/crops/{cls.crop.id}/')
+
+    def setUp(self):
+        cache.clear()
+
+    def etags(self):
+        self.client.force_authenticate(None)
+        etags = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etags.append(response['ETag'])
+        return etags
+
+    def test_unchanged_catalog_is_revalidated_without_queries(self):
+        etags = self.etags()
+        self.assertEqual(self.etags(), etags)
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url), self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_writes_change_the_etag(self):
+        def patch_crop(**fields):
+            self.client.force_authenticate(self.farmer)
+            response = self.client.patch(f'/api/farmer/crops/{self.crop.id}/', fields, format='multipart')
+            self.assertEqual(response.status_code, 200)
+
+        def reserve():
+            self.client.force_authenticate(self.customer)
+            response = self.client.post('/api/orders/reservations/', {
+                'items': [{'crop_id': self.crop.id, 'quantity_kg': 5}]
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+
+        def move_farm():
+            self.profile.location = 'Nashik'
+            self.profile.save()
+
+        writes = (
+            ('price', lambda: patch_crop(price_per_kg='45')),
+            ('stock', lambda: patch_crop(quantity_kg=80)),
+            ('reservation', reserve),
+            ('profile', move_farm),
+        )
+        for name, write in writes:
+            with self.subTest(write=name):
+                before = self.etags()
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                after = self.etags()
+                for old, new in zip(before, after):
+                    self.assertNotEqual(old, new)
+
+        crop = self.client.get(f'/api/crops/{self.crop.id}/').data
+        self.assertEqual(
+            (crop['price_per_kg'], crop['quantity_kg'], crop['available_kg'], crop['farmer_location']),
+            ('45.00', 80, 75, 'Nashik')
+        )
+
+
+class CatalogSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        FarmerProfile.objects.create(user=farmer, farm_name='Green Acres', location='Pune')
+        cls.sauce = Crop.objects.create(
+            farmer=farmer, name='Sauce Base', category='Vegetable', description='Ripe tomatoes, crushed',
+            price_per_kg=30, quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        cls.tomato = Crop.objects.create(
+            farmer=farmer, name='Tomato', category='Vegetable', description='Grown outdoors',
+            price_per_kg=20, quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        Crop.objects.create(
+            farmer=farmer, name='Potato', category='Vegetable', description='Washed',
+            price_per_kg=10, quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, text, **params):
+        response = self.client.get('/api/crops/', {'search': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return [crop['id'] for crop in response.data['results']]
+
+    def test_name_match_ranks_above_description_match(self):
+        self.assertEqual(self.search('tomato'), [self.tomato.id, self.sauce.id])
+        self.assertEqual(self.search('tomato', sort='relevance'), [self.tomato.id, self.sauce.id])
+
+    def test_prefix_and_multi_word_search(self):
+        self.assertEqual(self.search('tom'), [self.tomato.id, self.sauce.id])
+        self.assertEqual(self.search('sauce tom'), [self.sauce.id])
+        self.assertEqual(len(self.search('green acres')), 3)
+        self.assertEqual(self.search('cabbage'), [])
+
+
+class CatalogFacetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        for name, category, price in (
+            ('Apple', 'Fruit', 20), ('Mango', 'fruit', 50), ('Grape', 'Fruit', 250),
+            ('Bean', 'Vegetable', 99), ('Rice', 'Grain', 150),
+        ):
+            Crop.objects.create(
+                farmer=cls.farmer, name=name, category=category, price_per_kg=price,
+                quantity_kg=100, harvest_date=date(2026, 1, 1)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        response = self.client.get('/api/crops/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return (
+            response.data['total'],
+            {row['value']: row['count'] for row in response.data['categories']},
+            {row['value']: row['count'] for row in response.data['price_bands']},
+        )
+
+    def test_counts_per_category_and_price_band(self):
+        self.assertEqual(self.facets(), (
+            5,
+            {'Fruit': 3, 'Vegetable': 1, 'Grain': 1},
+            {'0-50': 1, '50-100': 2, '100-200': 1, '200+': 1},
+        ))
+        self.assertEqual(self.facets(category='FRUIT', max_price='100'), (
+            2,
+            {'Fruit': 2},
+            {'0-50': 1, '50-100': 1, '100-200': 0, '200+': 0},
+        ))
+
+    def test_new_crop_is_counted(self):
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            Crop.objects.create(
+                farmer=self.farmer, name='Wheat', category='Grain', price_per_kg=30,
+                quantity_kg=100, harvest_date=date(2026, 1, 1)
+            )
+        total, categories, price_bands = self.facets()
+        self.assertEqual((total, categories['Grain'], price_bands['0-50']), (6, 2, 2))
+
+
+class NearMeTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.crops = {}
+        for location in ('Pune', 'Mumbai', 'Nashik', 'Nowhere'):
+            farmer = User.objects.create_user(location.lower(), password='x', role='FARMER')
+            FarmerProfile.objects.create(user=farmer, farm_name=f'{location} Farm', location=location)
+            cls.crops[location] = Crop.objects.create(
+                farmer=farmer, name='Onion', category='Vegetable', price_per_kg=20,
+                quantity_kg=100, harvest_date=date(2026, 1, 1)
+            ).id
+
+    def setUp(self):
+        cache.clear()
+
+    def near(self, **params):
+        response = self.client.get('/api/crops/', {'near': '18.52,73.85', 'sort': 'distance', **params})
+        self.assertEqual(response.status_code, 200)
+        return [(crop['id'], crop['distance_km']) for crop in response.data['results']]
+
+    def test_only_crops_inside_the_radius_nearest_first(self):
+        results = self.near()
+        self.assertEqual([crop_id for crop_id, _ in results], [self.crops['Pune']])
+        self.assertLess(results[0][1], 1)
+
+        results = self.near(radius_km='150')
+        self.assertEqual([crop_id for crop_id, _ in results], [self.crops['Pune'], self.crops['Mumbai']])
+        self.assertTrue(100 < results[1][1] < 150)
+
+        facets = self.client.get('/api/crops/facets/', {'near': '18.52,73.85', 'radius_km': '150'}).data
+        self.assertEqual(facets['total'], 2)
+
+    def test_bad_near_is_rejected(self):
+        for params in (
+            {'near': 'pune'}, {'near': '18.52'}, {'near': '91,73'}, {'near': '18.52,181'},
+            {'near': '18.52,73.85', 'radius_km': 'far'}, {'near': '18.52,73.85', 'radius_km': '0'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/crops/', params).status_code, 400)
+                self.assertEqual(self.client.get('/api/crops/facets/', params).status_code, 400)
+
+
+class CropImageVariantTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root, CROP_IMAGE_VARIANTS_SYNC=True))
+        self.client.force_authenticate(self.farmer)
+
+    def png(self, size):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 40, 40)).save(buffer, format='PNG')
+        return SimpleUploadedFile('apple.png', buffer.getvalue(), content_type='image/png')
+
+    def test_upload_writes_every_variant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/farmer/crops/', {
+                'name': 'Apple', 'category': 'Fruit', 'price_per_kg': '40', 'quantity_kg': 10,
+                'harvest_date': '2026-01-01', 'image': self.png((800, 400)),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+        crop = Crop.objects.get(pk=response.data['id'])
+        self.assertEqual(set(crop.image_variants), {'thumb', 'card', 'full'})
+        # Never upscaled past the 800px original.
+        self.assertEqual(
+            {name: entry['width'] for name, entry in crop.image_variants.items()},
+            {'thumb': 200, 'card': 480, 'full': 800}
+        )
+        files = [entry[extension] for entry in crop.image_variants.values() for extension in ('webp', 'jpeg')]
+        for name in files:
+            with default_storage.open(name, 'rb') as handle:
+                self.assertIn(Image.open(handle).format, ('WEBP', 'JPEG'))
+
+        variants = self.client.get(f'/api/crops/{crop.id}/').data['image_variants']
+        self.assertEqual(set(variants), {'thumb', 'card', 'full', 'srcset'})
+        self.assertIn('200w', variants['srcset']['webp'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/farmer/crops/{crop.id}/', {'image': self.png((100, 100))}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 200)
+        crop.refresh_from_db()
+        self.assertEqual(crop.image_variants['full']['width'], 100)
+        self.assertFalse(any(default_storage.exists(name) for name in files))
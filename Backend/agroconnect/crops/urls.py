@@ -2,15 +2,19 @@ from django.urls import path
 from .views import (
     FarmerCropListCreateView,
     FarmerCropDetailView,
+    FarmerCropBulkImportView,
     PublicCropListView,
     PublicCropDetailView,
-    CropReviewListCreateView
+    CropReviewListCreateView,
+    CropFacetView
 )
 
 urlpatterns = [
     path('farmer/crops/', FarmerCropListCreateView.as_view()),
+    path('farmer/crops/bulk/', FarmerCropBulkImportView.as_view()),
     path('farmer/crops/<int:crop_id>/', FarmerCropDetailView.as_view()),
     path('crops/', PublicCropListView.as_view()),
+    path('crops/facets/', CropFacetView.as_view()),
     path('crops/<int:id>/', PublicCropDetailView.as_view()),
     path('crops/<int:crop_id>/reviews/', CropReviewListCreateView.as_view()),
 ]
@@ -9,42 +9,219 @@ from .serializers import CropSerializer, CropReviewSerializer
 from users.permissions import IsFarmer
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.permissions import AllowAny
-from orders.models import OrderItem
+from orders.models import ArchivedOrderItem, OrderItem
+from .pagination import KeysetCursorPagination
+from .search import search_crops
+from .images import refresh_image_variants
+from .imports import CropImport, iter_csv_rows, iter_jsonl_rows
+from users.geo import MAX_RADIUS_KM, within_radius
+from rest_framework.exceptions import ValidationError
+from .cache import (
+    etag_matches,
+    get_catalog_cache_version,
+    get_crop_cache_version,
+    get_facets_cache_version,
+    get_reviews_cache_version
+)
+from django.core.cache import cache
+from django.db.models import (
+    Case, CharField, Count, Exists, IntegerField, OuterRef, Q, Value, When
+)
+from django.db.models.functions import Lower
+from urllib.parse import urlencode
+import csv
+import hashlib
 
 
+CROP_SORT_MAP = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'price_low': ('price_per_kg', 'id'),
+    'price_high': ('-price_per_kg', '-id'),
+    'rating': ('-rating_avg', '-review_count', '-id'),
+}
+
+
+PRICE_BANDS = [
+    ('0-50', 0, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200+', 200, None),
+]
+FACET_FILTER_PARAMS = (
+    'category', 'min_price', 'max_price', 'search', 'min_rating', 'near', 'radius_km'
+)
+DEFAULT_RADIUS_KM = 50
+
+
+def _parse_near(params):
+    """Return (latitude, longitude, radius_km) for ?near=lat,lon&radius_km=, or None."""
+    near = params.get('near')
+    if not near:
+        return None
+    try:
+        latitude, longitude = (float(part) for part in near.split(','))
+        radius_km = float(params.get('radius_km') or DEFAULT_RADIUS_KM)
+    except ValueError:
+        raise ValidationError({"near": "Use near=<latitude>,<longitude> and a numeric radius_km."})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius_km <= 0:
+        raise ValidationError({"near": "Coordinates or radius out of range."})
+    return latitude, longitude, min(radius_km, MAX_RADIUS_KM)
+
+
+def _filter_crops(queryset, params, ranked=False):
+    """Apply the public catalog filters shared by the list and facet views."""
+    category = params.get('category')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    search = params.get('search')
+    min_rating = params.get('min_rating')
+    near = _parse_near(params)
+
+    if category:
+        # Same match as category__iexact, but in a form the
+        # LOWER(category) index can serve.
+        queryset = queryset.alias(category_key=Lower('category')).filter(
+            category_key=category.lower()
+        )
+
+    if min_price:
+        queryset = queryset.filter(price_per_kg__gte=min_price)
+
+    if max_price:
+        queryset = queryset.filter(price_per_kg__lte=max_price)
+
+    if search:
+        queryset = search_crops(queryset, search, ranked=ranked)
+
+    if min_rating:
+        try:
+            min_rating_val = float(min_rating)
+            queryset = queryset.filter(
+                review_count__gt=0,
+                rating_avg__gte=min_rating_val
+            )
+        except ValueError:
+            pass
+
+    if near:
+        queryset = within_radius(queryset, *near, profile_path='farmer__farmerprofile')
+
+    return queryset
+
+
+def _cached_catalog_response(request, scope, version, build_response):
+    """
+    Serve a public catalog response from the versioned cache. The ETag is
+    derived from the cache version and normalized request, so a matching
+    If-None-Match is answered with 304 before any database work.
+    """
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    fingerprint = hashlib.md5(
+        f"{request.get_host()}|{request.accepted_renderer.format}|{params}".encode('utf-8')
+    ).hexdigest()
+    etag = f'"{scope}-{version}-{fingerprint[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache_key = f"crop_response_{scope}_v{version}_{fingerprint}"
+    data = cache.get(cache_key)
+    if data is None:
+        response = build_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(cache_key, data, timeout=300)
+    return Response(data, headers=headers)
+
 
 class FarmerCropListCreateView(APIView):
     permission_classes = [IsAuthenticated, IsFarmer]
     parser_classes = [MultiPartParser, FormParser]
 
     def get(self, request):
-        crops = Crop.objects.filter(farmer=request.user)
+        crops = Crop.objects.filter(farmer=request.user).with_listing_data()
         serializer = CropSerializer(crops, many=True, context={'request': request})
         return Response(serializer.data)
 
     def post(self, request):
         serializer = CropSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(farmer=request.user)
+            crop = serializer.save(farmer=request.user)
+            refresh_image_variants(crop)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+class FarmerCropBulkImportView(APIView):
+    """
+    Create or update many crops at once, keyed on ``sku``. Send either a
+    raw body (Content-Type text/csv or application/x-ndjson) or a
+    multipart upload in the ``file`` field; both are read line by line.
+    """
+    permission_classes = [IsAuthenticated, IsFarmer]
+    parser_classes = [MultiPartParser]
+    csv_content_types = {'text/csv', 'application/csv'}
+    jsonl_content_types = {'application/x-ndjson', 'application/jsonl', 'application/json-lines'}
+
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip().lower()
+
+        if content_type == 'multipart/form-data':
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+            lines = upload
+            is_csv = not upload.name.lower().endswith(('.jsonl', '.ndjson'))
+        elif content_type in self.csv_content_types | self.jsonl_content_types:
+            # Iterating the underlying HttpRequest reads the body lazily.
+            lines = request._request
+            is_csv = content_type in self.csv_content_types
+        else:
+            return Response(
+                {"error": "Upload a CSV or JSON-lines file"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        try:
+            chunk_size = min(max(int(request.query_params.get('chunk_size', 500)), 1), 900)
+        except ValueError:
+            chunk_size = 500
+
+        rows = iter_csv_rows(lines) if is_csv else iter_jsonl_rows(lines)
+        try:
+            report = CropImport(request.user, chunk_size=chunk_size).run(rows)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            return Response(
+                {"error": f"Could not read upload: {exc}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(report)
+
+
 class FarmerCropDetailView(APIView):
     permission_classes = [IsAuthenticated, IsFarmer]
     parser_classes = [MultiPartParser, FormParser]
 
     def get_object(self, crop_id, user):
-        return Crop.objects.get(id=crop_id, farmer=user)
+        return Crop.objects.select_related('farmer', 'farmer__farmerprofile').get(
+            id=crop_id,
+            farmer=user
+        )
 
     def put(self, request, crop_id):
         crop = self.get_object(crop_id, request.user)
+        previous_image, previous_variants = crop.image.name, crop.image_variants
         serializer = CropSerializer(crop, data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            crop = serializer.save()
+            refresh_image_variants(crop, previous_image, previous_variants)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def patch(self, request, crop_id):
         crop = self.get_object(crop_id, request.user)
+        previous_image, previous_variants = crop.image.name, crop.image_variants
         serializer = CropSerializer(
             crop,
             data=request.data,
@@ -52,7 +229,8 @@ class FarmerCropDetailView(APIView):
             context={'request': request}
         )
         if serializer.is_valid():
-            serializer.save()
+            crop = serializer.save()
+            refresh_image_variants(crop, previous_image, previous_variants)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -61,57 +239,50 @@ class FarmerCropDetailView(APIView):
         crop.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 class PublicCropListView(ListAPIView):
-    queryset = Crop.objects.all().order_by('-created_at')
+    queryset = Crop.objects.with_listing_data().order_by('-created_at')
     serializer_class = CropSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        return _cached_catalog_response(
+            request,
+            'list',
+            get_catalog_cache_version(),
+            lambda: super(PublicCropListView, self).get(request, *args, **kwargs)
+        )
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-
-        category = self.request.query_params.get('category')
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        search = self.request.query_params.get('search')
-        min_rating = self.request.query_params.get('min_rating')
-
-        if category:
-            queryset = queryset.filter(category__iexact=category)
-
-        if min_price:
-            queryset = queryset.filter(price_per_kg__gte=min_price)
-
-        if max_price:
-            queryset = queryset.filter(price_per_kg__lte=max_price)
-
-        if search:
-            queryset = queryset.filter(name__icontains=search)
-
-        if min_rating:
-            try:
-                min_rating_val = float(min_rating)
-                matching_ids = []
-                for crop in queryset:
-                    ratings = crop.reviews.values_list('rating', flat=True)
-                    if ratings:
-                        avg = sum(ratings) / len(ratings)
-                        if avg >= min_rating_val:
-                            matching_ids.append(crop.id)
-                queryset = queryset.filter(id__in=matching_ids)
-            except ValueError:
-                pass
-
-        return queryset
+        params = self.request.query_params
+        sort_key = params.get('sort')
+        rank_results = bool(params.get('search')) and sort_key in (None, '', 'relevance')
+
+        queryset = _filter_crops(super().get_queryset(), params, ranked=rank_results)
+
+        if sort_key == 'distance' and 'distance_km' in queryset.query.annotations:
+            return queryset.order_by('distance_km', 'id')
+        if rank_results and 'search_rank' in queryset.query.annotations:
+            return queryset.order_by('-search_rank', '-id')
+        return queryset.order_by(*CROP_SORT_MAP.get(sort_key, CROP_SORT_MAP['newest']))
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 class PublicCropDetailView(RetrieveAPIView):
-    queryset = Crop.objects.all()
+    queryset = Crop.objects.with_listing_data()
     serializer_class = CropSerializer
     permission_classes = [AllowAny]
     lookup_field = 'id'
 
+    def get(self, request, *args, **kwargs):
+        return _cached_catalog_response(
+            request,
+            f"crop{kwargs['id']}",
+            get_crop_cache_version(kwargs['id']),
+            lambda: super(PublicCropDetailView, self).get(request, *args, **kwargs)
+        )
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
@@ -122,9 +293,25 @@ class CropReviewListCreateView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, crop_id):
-        reviews = CropReview.objects.filter(crop_id=crop_id).order_by('-created_at')
-        serializer = CropReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
+        if request.query_params.get(KeysetCursorPagination.cursor_query_param):
+            return self._list_reviews(request, crop_id)
+        # The first page is what the crop page shows; serve it from cache
+        # until a review for this crop is written or deleted.
+        return _cached_catalog_response(
+            request,
+            f"reviews{crop_id}",
+            get_reviews_cache_version(crop_id),
+            lambda: self._list_reviews(request, crop_id)
+        )
+
+    def _list_reviews(self, request, crop_id):
+        reviews = CropReview.objects.filter(crop_id=crop_id).select_related(
+            'customer'
+        ).order_by('-created_at', '-id')
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        serializer = CropReviewSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, crop_id):
         if not request.user.is_authenticated:
@@ -133,18 +320,35 @@ class CropReviewListCreateView(APIView):
         if request.user.role != "CUSTOMER":
             return Response({"error": "Only customers can review"}, status=status.HTTP_403_FORBIDDEN)
 
-        has_purchase = OrderItem.objects.filter(
-            crop_id=crop_id,
-            order__customer=request.user,
-            order__status="CONFIRMED"
-        ).exists()
-        if not has_purchase:
+        # Both eligibility checks in one round trip; each EXISTS is served
+        # by the (crop, order) and (customer, status) indexes. Purchases
+        # may have been moved to the order archive.
+        eligibility = Crop.objects.filter(pk=crop_id).annotate(
+            has_purchase=Exists(OrderItem.objects.filter(
+                crop_id=OuterRef('pk'),
+                order__customer=request.user,
+                order__status="CONFIRMED"
+            )) | Exists(ArchivedOrderItem.objects.filter(
+                crop_id=OuterRef('pk'),
+                order__customer=request.user,
+                order__status="CONFIRMED"
+            )),
+            has_review=Exists(CropReview.objects.filter(
+                crop_id=OuterRef('pk'),
+                customer=request.user
+            ))
+        ).values('has_purchase', 'has_review').first()
+
+        if eligibility is None:
+            return Response({"error": "Crop not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not eligibility['has_purchase']:
             return Response(
                 {"error": "Only verified buyers can review"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        if CropReview.objects.filter(crop_id=crop_id, customer=request.user).exists():
+        if eligibility['has_review']:
             return Response(
                 {"error": "You have already reviewed this crop"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -156,3 +360,85 @@ class CropReviewListCreateView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+
+
+class CropFacetView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = {
+            key: request.query_params.get(key, '').strip()
+            for key in FACET_FILTER_PARAMS
+        }
+        params['category'] = params['category'].lower()
+        cache_key = (
+            f"crop_facets_v{get_facets_cache_version()}_"
+            + hashlib.md5(urlencode(sorted(params.items())).encode('utf-8')).hexdigest()
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        price_band = Case(
+            *[
+                When(
+                    Q(price_per_kg__gte=low) & (Q(price_per_kg__lt=high) if high else Q()),
+                    then=Value(label)
+                )
+                for label, low, high in PRICE_BANDS
+            ],
+            output_field=CharField()
+        )
+        rating_band = Case(
+            When(review_count=0, then=Value(0)),
+            *[When(rating_avg__gte=stars, then=Value(stars)) for stars in (5, 4, 3, 2, 1)],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+
+        # One GROUP BY over (category, price band, rating band); the three
+        # facets are folded from its rows.
+        rows = _filter_crops(Crop.objects.all(), params).values(
+            'category',
+            price_band=price_band,
+            rating_band=rating_band
+        ).annotate(count=Count('id')).order_by()
+
+        categories = {}
+        price_bands = {label: 0 for label, _, _ in PRICE_BANDS}
+        rating_bands = {stars: 0 for stars in (0, 1, 2, 3, 4, 5)}
+        total = 0
+        for row in rows:
+            # The category filter is case-insensitive, so merge case variants.
+            name, count = categories.get(row['category'].lower(), (row['category'], 0))
+            categories[row['category'].lower()] = (name, count + row['count'])
+            if row['price_band'] in price_bands:
+                price_bands[row['price_band']] += row['count']
+            rating_bands[row['rating_band']] += row['count']
+            total += row['count']
+
+        # Rating facets match the min_rating filter, so they are cumulative.
+        ratings = {}
+        running = 0
+        for stars in (5, 4, 3, 2, 1):
+            running += rating_bands[stars]
+            ratings[f'{stars}+'] = running
+        ratings['unrated'] = rating_bands[0]
+
+        payload = {
+            "total": total,
+            "categories": [
+                {"value": name, "count": count}
+                for name, count in sorted(categories.values(), key=lambda item: (-item[1], item[0]))
+            ],
+            "price_bands": [
+                {"value": label, "count": price_bands[label]}
+                for label, _, _ in PRICE_BANDS
+            ],
+            "ratings": [
+                {"value": label, "count": count}
+                for label, count in ratings.items()
+            ],
+        }
+        cache.set(cache_key, payload, timeout=300)
+        return Response(payload)
@@ -0,0 +1,174 @@
+"""
+Farmer sales analytics: orders, kilograms and revenue per crop, bucketed
+by day, week or month, from the CropDailyStats rollups.
+
+Buckets before the current one only change when an older order changes
+status or a crop (and its rollup rows) is deleted. Both bump the farmer's
+analytics version, so the buckets are cached per farmer, interval and
+range. The current bucket is summed fresh on every
+request from its few rollup rows.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .archive import parse_date_range
+from .models import CropDailyStats
+
+
+# Rollup rows are already per day, so day buckets need no truncation.
+INTERVALS = {'day': F, 'week': TruncWeek, 'month': TruncMonth}
+DEFAULT_BUCKETS = {'day': 30, 'week': 12, 'month': 12}
+MAX_BUCKETS = {'day': 366, 'week': 260, 'month': 120}
+CLOSED_TTL = 3600
+METRICS = ('order_count', 'quantity_kg', 'revenue')
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def _version_key(farmer_id):
+    return f"farmer_analytics_v_{farmer_id}"
+
+
+def get_farmer_analytics_version(farmer_id):
+    key = _version_key(farmer_id)
+    version = cache.get(key)
+    if version is None:
+        # Clock-seeded so a recreated key never revives old entries.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_farmer_analytics_versions(farmer_ids):
+    """Invalidate the cached closed buckets of ``farmer_ids``."""
+    for farmer_id in farmer_ids:
+        key = _version_key(farmer_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def bucket_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, interval):
+    if interval == 'week':
+        return start + timedelta(days=7)
+    if interval == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _buckets(date_from, date_to, interval):
+    buckets = []
+    start = date_from
+    while start <= date_to:
+        buckets.append(start)
+        start = next_bucket(start, interval)
+    return buckets
+
+
+def _bucket_rows(farmer_id, interval, date_from, date_to):
+    """Per-bucket, per-crop sums of the rollup rows between two days."""
+    return list(CropDailyStats.objects.filter(
+        farmer_id=farmer_id, day__gte=date_from, day__lte=date_to
+    ).annotate(
+        bucket=INTERVALS[interval]('day')
+    ).values('bucket', 'crop_id', 'crop__name').annotate(
+        order_count=Sum('order_count'),
+        quantity_kg=Sum('quantity_kg'),
+        revenue=Sum('revenue', output_field=DecimalField(max_digits=14, decimal_places=2))
+    ).order_by())
+
+
+class FarmerAnalyticsQuery:
+    def __init__(self, farmer_id, params):
+        self.farmer_id = farmer_id
+
+        interval = (params.get('interval') or 'day').lower()
+        if interval not in INTERVALS:
+            raise AnalyticsError("interval must be one of: day, week, month")
+        self.interval = interval
+
+        try:
+            date_from, date_to = parse_date_range(params)
+        except ValueError as error:
+            raise AnalyticsError(str(error))
+        self.today = timezone.localdate()
+        date_to = date_to or self.today
+        if date_from is None:
+            date_from = bucket_start(date_to, interval)
+            for _ in range(DEFAULT_BUCKETS[interval] - 1):
+                date_from = bucket_start(date_from - timedelta(days=1), interval)
+        if date_from > date_to:
+            raise AnalyticsError("from must not be after to")
+
+        # Whole buckets only, so the closed/current split never cuts one.
+        self.date_from = bucket_start(date_from, interval)
+        self.date_to = date_to
+        self.buckets = _buckets(self.date_from, self.date_to, interval)
+        if len(self.buckets) > MAX_BUCKETS[interval]:
+            raise AnalyticsError(f"At most {MAX_BUCKETS[interval]} {interval} buckets per request")
+
+    def _closed_rows(self, date_to):
+        key = (
+            f"farmer_analytics_{self.farmer_id}_{get_farmer_analytics_version(self.farmer_id)}"
+            f"_{self.interval}_{self.date_from}_{date_to}"
+        )
+        rows = cache.get(key)
+        if rows is None:
+            rows = _bucket_rows(self.farmer_id, self.interval, self.date_from, date_to)
+            cache.set(key, rows, CLOSED_TTL)
+        return rows
+
+    def rows(self):
+        current = bucket_start(self.today, self.interval)
+        rows = []
+        if self.date_from < current:
+            rows += self._closed_rows(min(self.date_to, current - timedelta(days=1)))
+        if self.date_to >= current:
+            rows += _bucket_rows(self.farmer_id, self.interval, max(self.date_from, current), self.date_to)
+        return rows
+
+    def payload(self):
+        series = {
+            bucket: {'bucket': bucket, 'order_count': 0, 'quantity_kg': 0, 'revenue': Decimal('0.00'), 'crops': []}
+            for bucket in self.buckets
+        }
+        crops = {}
+        for row in sorted(self.rows(), key=lambda row: (row['crop__name'], row['crop_id'])):
+            if not any(row[metric] for metric in METRICS):
+                continue
+            point = series[row['bucket']]
+            crop = crops.setdefault(row['crop_id'], {
+                'crop_id': row['crop_id'], 'crop_name': row['crop__name'],
+                'order_count': 0, 'quantity_kg': 0, 'revenue': Decimal('0.00')
+            })
+            for metric in METRICS:
+                point[metric] += row[metric]
+                crop[metric] += row[metric]
+            point['crops'].append({
+                'crop_id': row['crop_id'], 'crop_name': row['crop__name'],
+                **{metric: row[metric] for metric in METRICS}
+            })
+        return {
+            'interval': self.interval,
+            'from': self.date_from,
+            'to': self.date_to,
+            'crops': list(crops.values()),
+            'series': list(series.values()),
+        }
@@ -0,0 +1,146 @@
+"""
+Archival of closed orders.
+
+CONFIRMED and CANCELLED orders can no longer change, so once they are old
+enough archive_orders moves them (with their items, sub-orders and status
+history) to ArchivedOrder/ArchivedOrderItem/ArchivedFarmerOrder in bounded
+batches. Order and OrderItem then hold only recent and open orders, which
+is what nearly every read wants.
+
+Read paths query the archive only when a date range reaches back past the
+newest archived order (reaches_archive). Customer counters are recounted
+from the running per-customer sums kept in ArchivedOrderTotals instead of
+reading the archive; farmer counters come from the daily rollups.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max
+
+from .models import (
+    ArchivedFarmerOrder,
+    ArchivedOrder,
+    ArchivedOrderItem,
+    ArchivedOrderTotals,
+    FarmerOrder,
+    Order,
+    OrderItem,
+    OrderStatusHistory
+)
+
+
+ARCHIVABLE_STATUSES = ('CONFIRMED', 'CANCELLED')
+DEFAULT_ARCHIVE_AFTER_DAYS = 180
+# Dashboards count the last 7 days from the hot tables only.
+MIN_ARCHIVE_AFTER_DAYS = 30
+
+ORDER_FIELDS = [
+    field.attname for field in ArchivedOrder._meta.concrete_fields
+    if field.name not in ('status_history', 'archived_at')
+]
+ITEM_FIELDS = [field.attname for field in ArchivedOrderItem._meta.concrete_fields]
+# Archived sub-orders get their own ids; nothing refers to FarmerOrder ids.
+FARMER_ORDER_FIELDS = [
+    field.attname for field in ArchivedFarmerOrder._meta.concrete_fields if field.name != 'id'
+]
+
+
+def parse_date_range(params):
+    """The ``from`` and ``to`` query params as dates (or None); ValueError if malformed."""
+    dates = []
+    for name in ('from', 'to'):
+        value = params.get(name)
+        try:
+            dates.append(date.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+    return tuple(dates)
+
+
+def archive_horizon():
+    """created_at of the newest archived order, or None if nothing is archived."""
+    return ArchivedOrder.objects.aggregate(newest=Max('created_at'))['newest']
+
+
+def reaches_archive(date_from=None, date_to=None):
+    """
+    Whether a date range can include archived orders. No range means the
+    recent orders only.
+    """
+    if date_from is None and date_to is None:
+        return False
+    horizon = archive_horizon()
+    return horizon is not None and (date_from is None or date_from <= horizon.date())
+
+
+def _add_totals(totals):
+    for (user_id, role, status), (order_count, amount) in sorted(totals.items()):
+        ArchivedOrderTotals.objects.get_or_create(user_id=user_id, role=role, status=status)
+        ArchivedOrderTotals.objects.filter(user_id=user_id, role=role, status=status).update(
+            order_count=F('order_count') + order_count,
+            amount=F('amount') + amount
+        )
+
+
+def _bump_farmers(farmer_ids):
+    # farmer_orders reads the archive, so import it late.
+    from .farmer_orders import bump_farmer_orders_version
+
+    for farmer_id in farmer_ids:
+        bump_farmer_orders_version(farmer_id)
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move up to ``batch_size`` closed orders created before ``cutoff`` into
+    the archive, in one transaction. Returns the number of orders moved.
+    """
+    with transaction.atomic():
+        order_ids = list(Order.objects.select_for_update(skip_locked=True).filter(
+            status__in=ARCHIVABLE_STATUSES,
+            created_at__lt=cutoff
+        ).order_by('created_at', 'id').values_list('id', flat=True)[:batch_size])
+        if not order_ids:
+            return 0
+
+        history = defaultdict(list)
+        for row in OrderStatusHistory.objects.filter(order_id__in=order_ids).order_by('id').values(
+            'from_status', 'to_status', 'changed_by_id', 'created_at', 'order_id'
+        ):
+            history[row.pop('order_id')].append(row)
+
+        orders = list(Order.objects.filter(id__in=order_ids).values(*ORDER_FIELDS))
+        items = list(OrderItem.objects.filter(order_id__in=order_ids).values(
+            *ITEM_FIELDS, 'crop__farmer_id'
+        ))
+
+        ArchivedOrder.objects.bulk_create(
+            ArchivedOrder(**order, status_history=history[order['id']]) for order in orders
+        )
+        ArchivedOrderItem.objects.bulk_create(
+            ArchivedOrderItem(**{field: item[field] for field in ITEM_FIELDS}) for item in items
+        )
+        ArchivedFarmerOrder.objects.bulk_create(
+            ArchivedFarmerOrder(**row) for row in FarmerOrder.objects.filter(
+                order_id__in=order_ids
+            ).values(*FARMER_ORDER_FIELDS)
+        )
+
+        totals = defaultdict(lambda: [0, Decimal('0.00')])
+        for order in orders:
+            customer_totals = totals[(order['customer_id'], ArchivedOrderTotals.CUSTOMER, order['status'])]
+            customer_totals[0] += 1
+            customer_totals[1] += order['total_amount']
+        _add_totals(totals)
+
+        OrderStatusHistory.objects.filter(order_id__in=order_ids).delete()
+        FarmerOrder.objects.filter(order_id__in=order_ids).delete()
+        OrderItem.objects.filter(order_id__in=order_ids).delete()
+        Order.objects.filter(id__in=order_ids).delete()
+
+        # Archived items drop out of the farmers' cached order lists.
+        farmer_ids = {item['crop__farmer_id'] for item in items}
+        transaction.on_commit(lambda: _bump_farmers(farmer_ids))
+    return len(order_ids)
@@ -0,0 +1,293 @@
+"""
+Pub/sub for order notifications pushed to farmers over SSE.
+
+Each server process runs one OrderEventBroker inside its ASGI event loop.
+Connected streams subscribe to a channel (``farmer:<id>``) and wait on an
+asyncio queue, so an idle connection costs a coroutine rather than a
+thread. Messages reach the broker through a backend:
+
+* DatabaseBackend (default) stores each message as a BrokerMessage row.
+  One task per process polls for new rows, so every worker sees a publish
+  made by any other. Row ids double as SSE event ids for Last-Event-ID
+  resume. Ids can commit out of order, so ids skipped by a poll are
+  looked for again for a few seconds.
+* InProcessBackend keeps everything in memory. It suits a single-process
+  deployment or development, but publishes from other processes are lost.
+  Its ids are clock-seeded so they keep growing across restarts.
+
+Publishing waits for the caller's transaction to commit: rolled back
+writes never notify anyone, and a listener never refetches before the
+change is visible.
+
+Streams served by a WSGI server have no event loop to wait on; they poll
+the backend from the request thread instead (OrderEventBroker.poll).
+
+Pick one with settings.ORDER_EVENTS_BACKEND (a dotted path).
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'orders.broker.DatabaseBackend'
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_LIMIT = 100
+FETCH_LIMIT = 1000
+
+
+def farmer_channel(farmer_id):
+    return f"farmer:{farmer_id}"
+
+
+class DatabaseBackend:
+    poll_interval = 1.0
+    retention = timedelta(hours=1)
+    prune_every = 60  # polls
+    # How long an id skipped by a poll may still commit. Publishes are
+    # single autocommit inserts, so anything later was rolled back.
+    gap_timeout = 10.0
+
+    def __init__(self):
+        # A single thread, and so a single DB connection, per process.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-events')
+
+    def publish(self, channel, data):
+        from .models import BrokerMessage
+
+        BrokerMessage.objects.create(channel=channel, payload=data)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def latest_id(self):
+        from .models import BrokerMessage
+
+        close_old_connections()
+        return BrokerMessage.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _fetch(self, after_id, gap_ids):
+        from .models import BrokerMessage
+
+        close_old_connections()
+        condition = Q(id__gt=after_id)
+        if gap_ids:
+            condition |= Q(id__in=gap_ids)
+        return list(BrokerMessage.objects.filter(condition).order_by('id').values_list(
+            'id', 'channel', 'payload'
+        )[:FETCH_LIMIT])
+
+    def _prune(self):
+        from .models import BrokerMessage
+
+        BrokerMessage.objects.filter(created_at__lt=timezone.now() - self.retention).delete()
+
+    def _replay(self, channel, after_id):
+        from .models import BrokerMessage
+
+        close_old_connections()
+        return list(BrokerMessage.objects.filter(
+            channel=channel,
+            id__gt=after_id,
+            created_at__gte=timezone.now() - self.retention
+        ).order_by('id').values_list('id', 'payload')[:REPLAY_LIMIT])
+
+    async def replay(self, channel, after_id):
+        return await self._run(self._replay, channel, after_id)
+
+    def poll(self, channel, after_id):
+        """
+        (id, data) of messages after ``after_id``, plus the channel's recent
+        ones: a lower id can still commit for ``gap_timeout`` seconds, so
+        callers skip the ids they already sent.
+        """
+        from .models import BrokerMessage
+
+        close_old_connections()
+        recent = timezone.now() - timedelta(seconds=self.gap_timeout)
+        return list(BrokerMessage.objects.filter(
+            Q(id__gt=after_id) | Q(created_at__gte=recent),
+            channel=channel,
+            created_at__gte=timezone.now() - self.retention
+        ).order_by('id').values_list('id', 'payload')[:REPLAY_LIMIT])
+
+    async def listen(self):
+        """Yield (id, channel, data) for every message published after start."""
+        last_id = await self._run(self.latest_id)
+        # id -> when it was first found missing below last_id.
+        gaps = {}
+        for polls in itertools.count(1):
+            try:
+                rows = await self._run(self._fetch, last_id, list(gaps))
+                if polls % self.prune_every == 0:
+                    await self._run(self._prune)
+            except Exception:
+                logger.exception("Polling order events failed")
+                rows = []
+            now = time.monotonic()
+            for row in rows:
+                message_id = row[0]
+                if message_id > last_id:
+                    skipped = range(max(last_id + 1, message_id - FETCH_LIMIT), message_id)
+                    gaps.update(dict.fromkeys(skipped, now))
+                    last_id = message_id
+                gaps.pop(message_id, None)
+                yield row
+            gaps = {
+                message_id: seen for message_id, seen in gaps.items()
+                if now - seen < self.gap_timeout
+            }
+            if len(rows) < FETCH_LIMIT:
+                await asyncio.sleep(self.poll_interval)
+
+
+class InProcessBackend:
+    history_size = 1000
+
+    def __init__(self):
+        # Clock-seeded so a client resuming with an id from before a
+        # restart does not filter out new messages.
+        self._ids = itertools.count(int(time.time() * 1000) * 1000)
+        self._history = deque(maxlen=self.history_size)
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def publish(self, channel, data):
+        with self._lock:
+            message = (next(self._ids), channel, data)
+            self._history.append(message)
+            listeners = list(self._listeners)
+        # Publishers are sync views running in worker threads.
+        for loop, queue in listeners:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    def latest_id(self):
+        with self._lock:
+            return self._history[-1][0] if self._history else 0
+
+    def poll(self, channel, after_id):
+        # Ids are handed out under the lock, so they are never seen out of order.
+        with self._lock:
+            return [
+                (message_id, data) for message_id, message_channel, data in self._history
+                if message_channel == channel and message_id > after_id
+            ][-REPLAY_LIMIT:]
+
+    async def replay(self, channel, after_id):
+        return self.poll(channel, after_id)
+
+    async def listen(self):
+        listener = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._listeners.append(listener)
+        try:
+            while True:
+                yield await listener[1].get()
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+
+
+class Subscription:
+    def __init__(self, channel):
+        self.channel = channel
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+
+class OrderEventBroker:
+    def __init__(self, backend):
+        self.backend = backend
+        self._subscriptions = defaultdict(set)
+        self._pump_task = None
+        self._loop = None
+        self.stats = {
+            'connections': 0,
+            'peak_connections': 0,
+            'delivered': 0,
+            'dropped': 0,
+        }
+
+    def publish(self, channel, data):
+        """Publish once the caller's transaction commits (at once outside one)."""
+        transaction.on_commit(lambda: self.backend.publish(channel, data))
+
+    async def subscribe(self, channel, last_event_id=None):
+        """
+        Register a subscriber. Messages after ``last_event_id`` that the
+        backend still holds are queued first.
+        """
+        self._ensure_pump()
+        subscription = Subscription(channel)
+        self._subscriptions[channel].add(subscription)
+        self.stats['connections'] += 1
+        self.stats['peak_connections'] = max(self.stats['peak_connections'], self.stats['connections'])
+
+        if last_event_id is not None:
+            for message_id, data in await self.backend.replay(channel, last_event_id):
+                self._deliver(subscription, (message_id, data))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscribers = self._subscriptions.get(subscription.channel)
+        if subscribers and subscription in subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[subscription.channel]
+            self.stats['connections'] -= 1
+
+    def latest_id(self):
+        """The newest message id, where a stream without Last-Event-ID starts polling."""
+        return self.backend.latest_id()
+
+    def poll(self, channel, after_id):
+        """Blocking read of ``channel`` for streams outside the event loop (WSGI)."""
+        return self.backend.poll(channel, after_id)
+
+    def metrics(self):
+        return {**self.stats, 'channels': len(self._subscriptions)}
+
+    def _ensure_pump(self):
+        loop = asyncio.get_running_loop()
+        if self._pump_task is None or self._pump_task.done() or self._loop is not loop:
+            self._loop = loop
+            self._pump_task = loop.create_task(self._pump())
+
+    async def _pump(self):
+        async for message_id, channel, data in self.backend.listen():
+            for subscription in list(self._subscriptions.get(channel, ())):
+                self._deliver(subscription, (message_id, data))
+
+    def _deliver(self, subscription, message):
+        if subscription.queue.full():
+            # Notifications only say "refetch"; a slow reader loses the
+            # oldest one rather than holding memory for it.
+            subscription.queue.get_nowait()
+            self.stats['dropped'] += 1
+        subscription.queue.put_nowait(message)
+        self.stats['delivered'] += 1
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend_path = getattr(settings, 'ORDER_EVENTS_BACKEND', DEFAULT_BACKEND)
+                _broker = OrderEventBroker(import_string(backend_path)())
+    return _broker
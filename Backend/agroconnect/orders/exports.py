@@ -0,0 +1,181 @@
+"""
+Streaming order exports.
+
+Rows come from a ``values()`` query with the joins done in SQL, read with
+``.iterator()`` and written out in small batches. Memory stays flat and
+the first bytes go out as soon as the first batch is read, however many
+rows the export has.
+"""
+import csv
+import heapq
+import io
+import json
+from datetime import date, datetime
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .archive import parse_date_range, reaches_archive
+from .models import Order
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+ITERATOR_CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+STATUSES = {value for value, _ in Order._meta.get_field('status').choices}
+
+FARMER_COLUMNS = {
+    'order_id': 'order_id',
+    'order_date': 'order__created_at',
+    'status': 'order__status',
+    'payment_method': 'order__payment_method',
+    'payment_status': 'order__payment_status',
+    'customer': 'order__customer__username',
+    'delivery_city': 'order__delivery_city',
+    'delivery_state': 'order__delivery_state',
+    'crop_id': 'crop_id',
+    'crop_name': 'crop__name',
+    'quantity_kg': 'quantity_kg',
+    'price_per_kg': 'price_per_kg',
+    'line_total': 'line_total',
+}
+CUSTOMER_COLUMNS = {
+    'order_id': 'order_id',
+    'order_date': 'order__created_at',
+    'status': 'order__status',
+    'payment_method': 'order__payment_method',
+    'payment_status': 'order__payment_status',
+    'order_total': 'order__total_amount',
+    'farmer': 'crop__farmer__username',
+    'crop_id': 'crop_id',
+    'crop_name': 'crop__name',
+    'quantity_kg': 'quantity_kg',
+    'price_per_kg': 'price_per_kg',
+    'line_total': 'line_total',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _date_range(params):
+    try:
+        return parse_date_range(params)
+    except ValueError as error:
+        raise ExportError(str(error))
+
+
+def filter_order_items(items, params):
+    """Apply the status, search, from and to filters to an (archived) OrderItem queryset."""
+    status = (params.get('status') or 'ALL').upper()
+    if status != 'ALL':
+        if status not in STATUSES:
+            raise ExportError("Unknown status")
+        items = items.filter(order__status=status)
+
+    search = (params.get('search') or '').strip()
+    if search:
+        items = items.filter(crop__name__icontains=search)
+
+    date_from, date_to = _date_range(params)
+    if date_from:
+        items = items.filter(order__created_at__date__gte=date_from)
+    if date_to:
+        items = items.filter(order__created_at__date__lte=date_to)
+    return items
+
+
+def export_rows(items, columns):
+    line_total = ExpressionWrapper(
+        F('quantity_kg') * F('price_per_kg'),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+    return items.annotate(line_total=line_total).order_by('order_id', 'id').values_list(
+        *columns.values()
+    ).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # Keep spreadsheet apps from evaluating user-entered text.
+        return "'" + value
+    return value
+
+
+def _csv_chunks(rows, header):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_csv_cell(value) for value in row])
+        if count % ROWS_PER_WRITE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_chunks(rows, header):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(header, row)), default=_json_default))
+        if len(lines) == ROWS_PER_WRITE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+async def _async_chunks(chunks):
+    # Django serves sync iterators under ASGI by reading them to the end
+    # first. Pull one chunk at a time instead, on the request's thread so
+    # the database cursor stays on its connection.
+    sentinel = object()
+    next_chunk = sync_to_async(lambda: next(chunks, sentinel))
+    while (chunk := await next_chunk()) is not sentinel:
+        yield chunk
+
+
+def streaming_export(request, items, columns, name, archived_items=None):
+    """
+    Stream ``items`` as CSV or JSONL. ``archived_items`` are included when
+    the requested date range reaches into the archive.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_FORMATS:
+        raise ExportError(f"output must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    items = filter_order_items(items, request.query_params)
+    header = list(columns)
+    rows = export_rows(items, columns)
+    if archived_items is not None and reaches_archive(*_date_range(request.query_params)):
+        archived_rows = export_rows(filter_order_items(archived_items, request.query_params), columns)
+        # Both are sorted by order id (the first column), which is never in both.
+        rows = heapq.merge(archived_rows, rows, key=itemgetter(0))
+    chunks = _csv_chunks(rows, header) if output == 'csv' else _jsonl_chunks(rows, header)
+    if isinstance(request._request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[output])
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.{output}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,267 @@
+"""
+Cached query engine behind FarmerOrderListView, over FarmerOrder rows.
+
+Requests are normalized into a FarmerOrderListQuery whose cache key is
+known before any database work, so a hit costs one cache read. Totals are
+cached under their own key, which depends only on the filters (not on
+sort or page) and on separate count versions. Every page and sort of a
+filter therefore shares one COUNT, and a status change keeps the
+unfiltered totals. ``count=none`` skips counting altogether and reports
+``has_more`` instead.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Prefetch, Sum
+
+from crops.pagination import merge_querysets
+from .archive import parse_date_range, reaches_archive
+from .models import ArchivedFarmerOrder, ArchivedOrderItem, FarmerOrder, Order, OrderItem
+from .serializers import FarmerOrderSerializer
+
+
+PAGE_TTL = 30
+COUNT_TTL = 300
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+SORT_MAP = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'quantity_desc': ('-quantity_kg', '-id'),
+    'quantity_asc': ('quantity_kg', 'id'),
+    'price_desc': ('-subtotal', '-id'),
+    'price_asc': ('subtotal', 'id'),
+}
+STATUSES = {value for value, _ in Order._meta.get_field('status').choices}
+STATS_KEYS = ('page_hits', 'page_misses', 'count_hits', 'count_misses')
+
+
+def create_farmer_orders(order_ids):
+    """
+    Write the FarmerOrder rows of ``order_ids``, summing their items per
+    farmer in one query. Rows that already exist are left alone.
+    """
+    rows = OrderItem.objects.filter(order_id__in=order_ids).values(
+        'order_id', 'crop__farmer_id', 'order__status', 'order__created_at'
+    ).annotate(
+        subtotal=Sum(
+            F('quantity_kg') * F('price_per_kg'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+        item_count=Count('id'),
+        total_kg=Sum('quantity_kg')
+    ).order_by()
+    return FarmerOrder.objects.bulk_create([
+        FarmerOrder(
+            farmer_id=row['crop__farmer_id'],
+            order_id=row['order_id'],
+            status=row['order__status'],
+            created_at=row['order__created_at'],
+            subtotal=row['subtotal'],
+            item_count=row['item_count'],
+            quantity_kg=row['total_kg']
+        )
+        for row in rows
+    ], ignore_conflicts=True)
+
+
+def farmer_items(farmer_id, item_model=OrderItem):
+    """Prefetch of the farmer's own lines onto ``order.farmer_items``."""
+    return Prefetch(
+        'order__items',
+        queryset=item_model.objects.filter(crop__farmer_id=farmer_id).select_related('crop').only(
+            'id', 'order_id', 'crop_id', 'crop__name', 'quantity_kg', 'price_per_kg'
+        ).order_by('order_id', 'id'),
+        to_attr='farmer_items'
+    )
+
+
+def _version_key(farmer_id):
+    return f"farmer_orders_v_{farmer_id}"
+
+
+def _count_version_key(farmer_id):
+    return f"farmer_orders_count_v_{farmer_id}"
+
+
+def _status_count_version_key(farmer_id):
+    return f"farmer_orders_status_count_v_{farmer_id}"
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Clock-seeded so a recreated key never revives old entries.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_farmer_orders_version(farmer_id, rows_changed=True):
+    """
+    Invalidate a farmer's cached pages and the totals the change can move;
+    returns the new page version. Pass ``rows_changed=False`` for status
+    changes: they move orders between status filters but leave the
+    unfiltered totals alone.
+    """
+    keys = [_version_key(farmer_id), _status_count_version_key(farmer_id)]
+    if rows_changed:
+        keys.append(_count_version_key(farmer_id))
+    versions = []
+    for key in keys:
+        try:
+            versions.append(cache.incr(key))
+        except ValueError:
+            versions.append(int(time.time() * 1000))
+            cache.set(key, versions[-1], timeout=None)
+    return versions[0]
+
+
+def get_farmer_orders_version(farmer_id):
+    return _get_version(_version_key(farmer_id))
+
+
+def _record(stat):
+    key = f"farmer_orders_stats_{stat}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cache_stats():
+    values = cache.get_many([f"farmer_orders_stats_{stat}" for stat in STATS_KEYS])
+    stats = {stat: values.get(f"farmer_orders_stats_{stat}", 0) for stat in STATS_KEYS}
+    for prefix in ('page', 'count'):
+        total = stats[f'{prefix}_hits'] + stats[f'{prefix}_misses']
+        stats[f'{prefix}_hit_ratio'] = round(stats[f'{prefix}_hits'] / total, 3) if total else None
+    return stats
+
+
+def _positive_int(value, default):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return default
+
+
+class FarmerOrderListQuery:
+    """Raises ValueError for a malformed ``from`` or ``to`` date."""
+
+    def __init__(self, farmer_id, params):
+        self.farmer_id = farmer_id
+
+        status = (params.get('status') or 'ALL').upper()
+        self.status = status if status in STATUSES else 'ALL'
+        self.search = (params.get('search') or '').strip().lower()
+        sort = params.get('sort')
+        self.sort = sort if sort in SORT_MAP else 'newest'
+        self.date_from, self.date_to = parse_date_range(params)
+
+        self.paginated = 'page' in params or 'page_size' in params
+        self.page = _positive_int(params.get('page'), 1)
+        self.page_size = min(_positive_int(params.get('page_size'), DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        self.counted = params.get('count', 'exact') != 'none'
+        self._sources = None
+
+    def _filter_hash(self):
+        filters = f"{self.status}|{self.search}|{self.date_from}|{self.date_to}"
+        return hashlib.md5(filters.encode('utf-8')).hexdigest()[:12]
+
+    def page_cache_key(self):
+        shape = (
+            f"p{self.page}_s{self.page_size}_c{int(self.counted)}"
+            if self.paginated else "all"
+        )
+        return (
+            f"farmer_orders_{self.farmer_id}_v{get_farmer_orders_version(self.farmer_id)}"
+            f"_{self._filter_hash()}_{self.sort}_{shape}"
+        )
+
+    def count_cache_key(self):
+        version = f"v{_get_version(_count_version_key(self.farmer_id))}"
+        if self.status != 'ALL':
+            version += f"_{_get_version(_status_count_version_key(self.farmer_id))}"
+        return f"farmer_orders_count_{self.farmer_id}_{version}_{self._filter_hash()}"
+
+    def sources(self):
+        """(sub-order model, item model) pairs to read: the archive only if the range reaches it."""
+        if self._sources is None:
+            self._sources = [(FarmerOrder, OrderItem)]
+            if reaches_archive(self.date_from, self.date_to):
+                self._sources.append((ArchivedFarmerOrder, ArchivedOrderItem))
+        return self._sources
+
+    def queryset(self, model=FarmerOrder, item_model=OrderItem):
+        orders = model.objects.filter(farmer_id=self.farmer_id)
+        if self.status != 'ALL':
+            orders = orders.filter(status=self.status)
+        if self.search:
+            orders = orders.filter(Exists(item_model.objects.filter(
+                order_id=OuterRef('order_id'),
+                crop__farmer_id=self.farmer_id,
+                crop__name__icontains=self.search
+            )))
+        if self.date_from:
+            orders = orders.filter(created_at__date__gte=self.date_from)
+        if self.date_to:
+            orders = orders.filter(created_at__date__lte=self.date_to)
+        return orders
+
+    def count(self):
+        key = self.count_cache_key()
+        total = cache.get(key)
+        if total is None:
+            _record('count_misses')
+            total = sum(self.queryset(*source).count() for source in self.sources())
+            cache.set(key, total, timeout=COUNT_TTL)
+        else:
+            _record('count_hits')
+        return total
+
+    def payload(self):
+        """The response body, from cache when possible."""
+        key = self.page_cache_key()
+        payload = cache.get(key)
+        if payload is not None:
+            _record('page_hits')
+            return payload
+        _record('page_misses')
+
+        querysets = [
+            self.queryset(model, item_model).select_related('order', 'order__customer').prefetch_related(
+                farmer_items(self.farmer_id, item_model)
+            ).order_by(*SORT_MAP[self.sort])
+            for model, item_model in self.sources()
+        ]
+
+        if not self.paginated:
+            payload = FarmerOrderSerializer(merge_querysets(querysets), many=True).data
+        elif self.counted:
+            total = self.count()
+            # Out-of-range pages show the last page, as the paginator did.
+            page = min(self.page, max(1, -(-total // self.page_size)))
+            start = (page - 1) * self.page_size
+            payload = {
+                "count": total,
+                "page": page,
+                "page_size": self.page_size,
+                "results": FarmerOrderSerializer(
+                    merge_querysets(querysets, start, start + self.page_size), many=True
+                ).data
+            }
+        else:
+            start = (self.page - 1) * self.page_size
+            rows = merge_querysets(querysets, start, start + self.page_size + 1)
+            payload = {
+                "page": self.page,
+                "page_size": self.page_size,
+                "has_more": len(rows) > self.page_size,
+                "results": FarmerOrderSerializer(rows[:self.page_size], many=True).data
+            }
+
+        cache.set(key, payload, timeout=PAGE_TTL)
+        return payload
@@ -0,0 +1,187 @@
+"""
+Idempotency-Key support for order writes.
+
+The first request with a given key inserts an IdempotencyKey row (committed
+on its own, so concurrent duplicates see it), runs the view and stores the
+response. Retries with the same key replay that response without touching
+the write path; a retry that arrives while the first request is still
+running gets 409 and should try again shortly.
+
+A key whose request never finished is only taken over once that request
+is known to be gone. On PostgreSQL the running request holds a session
+advisory lock on the key for as long as the handler runs; the lock goes
+away with the request or with its database session, so a retry that gets
+the lock knows the work was abandoned. Other databases have no such lock
+and fall back to IN_FLIGHT_TIMEOUT, which must stay well above the
+slowest request the view can take.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL = timedelta(hours=24)
+# Without advisory locks, an unfinished key older than this is taken to
+# belong to a request that died. Order writes finish in seconds; this
+# leaves a wide margin over any slow or queued request.
+IN_FLIGHT_TIMEOUT = timedelta(minutes=15)
+MAX_KEY_LENGTH = 255
+# First key of the two-key advisory locks, so they cannot collide with
+# locks taken elsewhere.
+ADVISORY_LOCK_NAMESPACE = 0x1DE0
+
+
+def _request_hash(request, kwargs):
+    payload = json.dumps(
+        [request.method, request.path, kwargs, request.data],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _lock_id(user, scope, key):
+    digest = hashlib.sha256(f"{user.pk}|{scope}|{key}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big', signed=True)
+
+
+def _try_lock(lock_id):
+    """
+    Take the key's advisory lock for this session: True if taken, False
+    if another request holds it, None if the database has no such locks.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, lock_id])
+        return cursor.fetchone()[0]
+
+
+def _unlock(lock_id):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, lock_id])
+
+
+def _claim(user, scope, key, request_hash, locked):
+    """
+    Return (record, created) for the key, taking over expired records and
+    ones whose request is gone. ``locked`` is the result of _try_lock().
+    """
+    now = timezone.now()
+    if locked is False:
+        # The key's request is running; only a finished outcome is usable.
+        return IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first(), False
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user,
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                expires_at=now + IDEMPOTENCY_TTL
+            ), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+    if record is None:
+        # Deleted between our insert and read; let the client retry.
+        return None, False
+
+    if record.status_code is None:
+        # Holding the lock means the request that created the row is gone.
+        abandoned = locked or record.created_at < now - IN_FLIGHT_TIMEOUT
+    else:
+        abandoned = False
+    if record.expires_at <= now or abandoned:
+        # Conditional on the row we read, so only one retry takes it over.
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk,
+            created_at=record.created_at
+        ).update(
+            request_hash=request_hash,
+            status_code=None,
+            response_body=None,
+            created_at=now,
+            expires_at=now + IDEMPOTENCY_TTL
+        )
+        if taken:
+            record.request_hash, record.status_code, record.response_body = request_hash, None, None
+            record.created_at = now
+            return record, True
+        record.refresh_from_db()
+    return record, False
+
+
+def idempotent(scope):
+    """
+    Decorate an APIView handler so that requests carrying an
+    Idempotency-Key header are executed at most once per user and key.
+    Requests without the header run as before.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+            if not key:
+                return handler(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            request_hash = _request_hash(request, kwargs)
+            lock_id = _lock_id(request.user, scope, key)
+            locked = _try_lock(lock_id)
+            try:
+                record, created = _claim(request.user, scope, key, request_hash, locked)
+
+                if not created:
+                    if record is None or record.status_code is None:
+                        return Response(
+                            {"error": "A request with this Idempotency-Key is still in progress"},
+                            status=status.HTTP_409_CONFLICT,
+                            headers={"Retry-After": "1"}
+                        )
+                    if record.request_hash != request_hash:
+                        return Response(
+                            {"error": f"{IDEMPOTENCY_HEADER} was already used with a different request"},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                        )
+                    return Response(
+                        record.response_body,
+                        status=record.status_code,
+                        headers={"Idempotent-Replayed": "true"}
+                    )
+
+                try:
+                    response = handler(view, request, *args, **kwargs)
+                except Exception:
+                    record.delete()
+                    raise
+
+                if response.status_code >= 500:
+                    # Server errors are not a final outcome; allow a clean retry.
+                    record.delete()
+                else:
+                    IdempotencyKey.objects.filter(pk=record.pk).update(
+                        status_code=response.status_code,
+                        response_body=response.data
+                    )
+                return response
+            finally:
+                if locked:
+                    _unlock(lock_id)
+        return wrapper
+    return decorator
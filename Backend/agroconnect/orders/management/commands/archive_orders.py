@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.archive import (
+    DEFAULT_ARCHIVE_AFTER_DAYS,
+    MIN_ARCHIVE_AFTER_DAYS,
+    archive_batch
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move CONFIRMED and CANCELLED orders older than --days into the "
+        "archive tables, one bounded transaction per batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'ORDER_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['days'] < MIN_ARCHIVE_AFTER_DAYS:
+            raise CommandError(f"--days must be at least {MIN_ARCHIVE_AFTER_DAYS}")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        archived = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} orders created before {cutoff:%Y-%m-%d} in {batches} batches."
+        ))
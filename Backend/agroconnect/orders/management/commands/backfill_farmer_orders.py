@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from orders.farmer_orders import bump_farmer_orders_version, create_farmer_orders
+from orders.models import FarmerOrder, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the FarmerOrder rows of orders placed before sub-orders "
+        "existed. Safe to re-run; orders that have them are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        missing = Order.objects.filter(
+            ~Exists(FarmerOrder.objects.filter(order=OuterRef('pk')))
+        ).order_by('id')
+        last_id = 0
+        orders = created = 0
+        farmer_ids = set()
+        while True:
+            batch = list(missing.filter(id__gt=last_id).values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1]
+            with transaction.atomic():
+                # Lock the orders so a concurrent status change lands either
+                # before the copy or after it, on the new rows.
+                list(Order.objects.select_for_update().filter(id__in=batch).values_list('id'))
+                rows = create_farmer_orders(batch)
+            orders += len(batch)
+            created += len(rows)
+            farmer_ids.update(row.farmer_id for row in rows)
+
+        for farmer_id in farmer_ids:
+            bump_farmer_orders_version(farmer_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} farmer orders for {orders} orders."
+        ))
@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Sum
+from rest_framework.test import APIClient
+
+from crops.models import Crop
+from orders.models import Order, OrderItem
+from users.models import CustomerProfile, FarmerProfile, User
+
+
+PREFIX = 'bench_order_'
+DELIVERY = {
+    'name': 'Bench',
+    'phone': '9999999999',
+    'address_line1': '1 Bench Road',
+    'city': 'Pune',
+    'state': 'MH',
+    'postal_code': '411001',
+}
+
+
+class _Rejected(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Place orders from parallel threads against a few hot crops and "
+        "report orders/sec and whether any stock was oversold. Seeded rows "
+        "are deleted afterwards. SQLite serialises writers, so run this "
+        "against PostgreSQL (DATABASE_URL) for meaningful concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--crops', type=int, default=5)
+        parser.add_argument('--stock', type=int, default=1000, help="Initial kg per crop.")
+        parser.add_argument(
+            '--reserve',
+            action='store_true',
+            help="Take a stock hold first and check out with reservation_ids."
+        )
+
+    def handle(self, *args, **options):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        try:
+            self._run(options)
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    def _run(self, options):
+        farmer = User.objects.create(username=f'{PREFIX}farmer', role='FARMER')
+        FarmerProfile.objects.create(user=farmer, farm_name='Bench Farm', location='Pune')
+        crops = Crop.objects.bulk_create([
+            Crop(
+                farmer=farmer,
+                name=f'Bench crop {i}',
+                category='Vegetable',
+                price_per_kg=20,
+                quantity_kg=options['stock'],
+                harvest_date=date(2026, 1, 1),
+            )
+            for i in range(options['crops'])
+        ])
+        crop_ids = [crop.id for crop in crops]
+        customers = User.objects.bulk_create([
+            User(username=f'{PREFIX}customer_{i}', role='CUSTOMER')
+            for i in range(options['threads'])
+        ])
+        CustomerProfile.objects.bulk_create([
+            CustomerProfile(user=customer, address='Bench') for customer in customers
+        ])
+
+        local = threading.local()
+        outcomes = {'placed': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+        checkout_ms = []
+
+        def place(index):
+            if not hasattr(local, 'client'):
+                local.client = APIClient()
+                local.client.force_authenticate(customers[index % len(customers)])
+            rng = random.Random(index)
+            items = [
+                {'crop_id': crop_id, 'quantity_kg': rng.randint(1, 5)}
+                for crop_id in rng.sample(crop_ids, rng.randint(1, min(3, len(crop_ids))))
+            ]
+            payload = {'items': items, 'payment_method': 'COD', 'delivery_address': DELIVERY}
+            try:
+                if options['reserve']:
+                    response = local.client.post('/api/orders/reservations/', {'items': items}, format='json')
+                    if response.status_code != 201:
+                        raise _Rejected
+                    payload = {
+                        'reservation_ids': [hold['id'] for hold in response.data],
+                        'payment_method': 'COD',
+                        'delivery_address': DELIVERY,
+                    }
+                placing = time.perf_counter()
+                response = local.client.post('/api/orders/place/', payload, format='json')
+                with lock:
+                    checkout_ms.append((time.perf_counter() - placing) * 1000)
+                outcome = 'placed' if response.status_code == 201 else 'rejected'
+            except _Rejected:
+                outcome = 'rejected'
+            except Exception:
+                outcome = 'errors'
+            with lock:
+                outcomes[outcome] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            for index in range(options['orders']):
+                executor.submit(place, index)
+        elapsed = time.perf_counter() - started
+
+        sold = dict(
+            OrderItem.objects.filter(crop_id__in=crop_ids).values('crop_id').annotate(
+                kg=Sum('quantity_kg')
+            ).values_list('crop_id', 'kg')
+        )
+        remaining = dict(Crop.objects.filter(id__in=crop_ids).values_list('id', 'quantity_kg'))
+        oversold = [
+            crop_id for crop_id in crop_ids
+            if remaining[crop_id] < 0 or sold.get(crop_id, 0) + remaining[crop_id] != options['stock']
+        ]
+        orphans = Order.objects.filter(
+            customer__username__startswith=PREFIX,
+            items__isnull=True
+        ).count()
+
+        self.stdout.write(
+            f"{options['orders']} {'reserved ' if options['reserve'] else ''}checkouts on "
+            f"{len(crop_ids)} crops, {options['threads']} threads in {elapsed:.2f}s: "
+            f"{outcomes['placed'] / elapsed:.1f} orders/sec placed"
+        )
+        checkout_ms.sort()
+        if checkout_ms:
+            self.stdout.write(
+                f"place-order latency p50={checkout_ms[len(checkout_ms) // 2]:.1f}ms "
+                f"p95={checkout_ms[int(len(checkout_ms) * 0.95)]:.1f}ms"
+            )
+        self.stdout.write(
+            f"placed={outcomes['placed']} rejected={outcomes['rejected']} errors={outcomes['errors']} "
+            f"kg sold={sum(sold.values())} of {options['stock'] * len(crop_ids)}"
+        )
+        held = Crop.objects.filter(id__in=crop_ids, reserved_kg__gt=0).count()
+        if oversold or orphans or held:
+            self.stdout.write(self.style.ERROR(
+                f"Stock mismatch on crops {oversold}; {orphans} orders without items; "
+                f"{held} crops with leftover holds."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("No oversell and no orphan orders."))
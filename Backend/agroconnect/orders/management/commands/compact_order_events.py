@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from orders.models import OrderEvent, OrderEventSequence
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete order change-feed events older than --days. Clients whose "
+        "cursor falls before a compacted event get 410 and reload in full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old = OrderEvent.objects.filter(created_at__lt=cutoff)
+
+        # Record the watermark before deleting, so a reader never sees a
+        # gap without also seeing the 410.
+        with transaction.atomic():
+            for row in old.values('farmer_id').annotate(max_seq=Max('seq')).order_by():
+                OrderEventSequence.objects.filter(
+                    farmer_id=row['farmer_id'],
+                    compacted_seq__lt=row['max_seq']
+                ).update(compacted_seq=row['max_seq'])
+
+        deleted = 0
+        while True:
+            batch = list(old.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted += OrderEvent.objects.filter(id__in=batch).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} order events older than {cutoff:%Y-%m-%d}."))
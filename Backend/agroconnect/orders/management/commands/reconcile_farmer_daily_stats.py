@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from orders.analytics import bump_farmer_analytics_versions
+from orders.models import CropDailyStats, FarmerDailyStats
+from orders.rollups import CROP_STAT_FIELDS, STAT_FIELDS, recompute, recompute_crops
+from users.models import User
+
+
+# (rollup model, key fields, stat fields, recompute function)
+ROLLUPS = (
+    (FarmerDailyStats, ('farmer_id', 'day'), STAT_FIELDS, recompute),
+    (CropDailyStats, ('farmer_id', 'day', 'crop_id'), CROP_STAT_FIELDS, recompute_crops),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute FarmerDailyStats and CropDailyStats from the order tables "
+        "and the order archive, report rows that drifted and (unless "
+        "--dry-run) repair them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', type=int, action='append', dest='farmer_ids')
+        parser.add_argument('--batch-size', type=int, default=200, help="Farmers per batch.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        farmers = User.objects.filter(role='FARMER').order_by('id')
+        if options['farmer_ids']:
+            farmers = farmers.filter(id__in=options['farmer_ids'])
+        farmer_ids = list(farmers.values_list('id', flat=True))
+
+        checked = drifted = 0
+        for start in range(0, len(farmer_ids), options['batch_size']):
+            batch = farmer_ids[start:start + options['batch_size']]
+            repaired = set()
+            with transaction.atomic():
+                # Rollups in the order writers lock them; the batch's rows
+                # stay locked so live updates wait for the repair.
+                for model, key_fields, fields, rebuild in ROLLUPS:
+                    stored = {
+                        tuple(getattr(row, field) for field in key_fields): row
+                        for row in model.objects.select_for_update().filter(farmer_id__in=batch)
+                    }
+                    expected = rebuild(batch)
+                    for key in sorted(set(stored) | set(expected)):
+                        checked += 1
+                        row = stored.get(key)
+                        want = expected.get(key, dict.fromkeys(fields, 0))
+                        have = dict.fromkeys(fields, 0)
+                        if row is not None:
+                            have = {field: getattr(row, field) for field in fields}
+                        if have == want:
+                            continue
+                        drifted += 1
+                        diff = ", ".join(
+                            f"{field} {have[field]} -> {want[field]}"
+                            for field in fields if have[field] != want[field]
+                        )
+                        self.stdout.write(f"{model.__name__} {' '.join(map(str, key))}: {diff}")
+                        if options['dry_run']:
+                            continue
+                        repaired.add(key[0])
+                        if key not in expected:
+                            row.delete()
+                        else:
+                            model.objects.update_or_create(**dict(zip(key_fields, key)), defaults=want)
+            if repaired:
+                bump_farmer_analytics_versions(repaired)
+
+        action = "found" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} rollup rows for {len(farmer_ids)} farmers; {action} {drifted} drifted."
+        ))
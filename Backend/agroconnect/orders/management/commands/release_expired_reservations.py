@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.reservations import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Return the stock of expired checkout holds, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help="Keep sweeping every N seconds instead of running once."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_reservations(options['batch_size'])
+            if released or not options['interval']:
+                self.stdout.write(f"Released {released} expired reservations.")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:36
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0007_crop_reserved_kg'),
+        ('orders', '0008_order_event_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(max_length=20)),
+                ('payment_method', models.CharField(max_length=20)),
+                ('payment_status', models.CharField(max_length=20)),
+                ('delivery_name', models.CharField(blank=True, default='', max_length=120)),
+                ('delivery_phone', models.CharField(blank=True, default='', max_length=20)),
+                ('delivery_address_line1', models.CharField(blank=True, default='', max_length=200)),
+                ('delivery_address_line2', models.CharField(blank=True, default='', max_length=200)),
+                ('delivery_city', models.CharField(blank=True, default='', max_length=100)),
+                ('delivery_state', models.CharField(blank=True, default='', max_length=100)),
+                ('delivery_postal_code', models.CharField(blank=True, default='', max_length=20)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('status_history', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity_kg', models.PositiveIntegerField()),
+                ('price_per_kg', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='crops.crop')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('FARMER', 'Farmer'), ('CUSTOMER', 'Customer')], max_length=10)),
+                ('status', models.CharField(max_length=20)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['customer', 'created_at'], name='archivedorder_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorderitem',
+            index=models.Index(fields=['crop', 'order'], name='archivedorderitem_crop_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedordertotals',
+            constraint=models.UniqueConstraint(fields=('user', 'role', 'status'), name='archivedtotals_user_uniq'),
+        ),
+    ]
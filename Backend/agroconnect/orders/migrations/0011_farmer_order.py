@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_farmer_orders(apps, schema_editor):
+    # Existing orders get their sub-orders here, or they would vanish from
+    # the farmer lists (and fail the ownership checks) that read FarmerOrder.
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    FarmerOrder = apps.get_model('orders', 'FarmerOrder')
+    last_id = 0
+    while True:
+        order_ids = list(Order.objects.filter(id__gt=last_id).order_by('id').values_list(
+            'id', flat=True
+        )[:BATCH_SIZE])
+        if not order_ids:
+            return
+        last_id = order_ids[-1]
+        rows = OrderItem.objects.filter(order_id__in=order_ids).values(
+            'order_id', 'crop__farmer_id', 'order__status', 'order__created_at'
+        ).annotate(
+            subtotal=models.Sum(
+                models.F('quantity_kg') * models.F('price_per_kg'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+            item_count=models.Count('id'),
+            total_kg=models.Sum('quantity_kg')
+        ).order_by()
+        FarmerOrder.objects.bulk_create([
+            FarmerOrder(
+                farmer_id=row['crop__farmer_id'],
+                order_id=row['order_id'],
+                status=row['order__status'],
+                created_at=row['order__created_at'],
+                subtotal=row['subtotal'],
+                item_count=row['item_count'],
+                quantity_kg=row['total_kg']
+            )
+            for row in rows
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmerOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('item_count', models.PositiveIntegerField()),
+                ('quantity_kg', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('farmer', models.ForeignKey(limit_choices_to={'role': 'FARMER'}, on_delete=django.db.models.deletion.CASCADE, related_name='farmer_orders', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='farmer_orders', to='orders.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farmer', 'created_at', 'id'], name='farmerorder_farmer_created_idx'), models.Index(fields=['farmer', 'status', 'created_at', 'id'], name='farmerorder_farmer_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('farmer', 'order'), name='farmerorder_farmer_order_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_farmer_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:44
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+STAT_FIELDS = (
+    'order_count', 'pending_count', 'confirmed_count', 'cancelled_count', 'confirmed_revenue'
+)
+
+
+def seed_farmer_daily_stats(apps, schema_editor):
+    # What orders.rollups.recompute() derives, for every farmer, so the
+    # dashboards keep their history from the first request.
+    FarmerOrder = apps.get_model('orders', 'FarmerOrder')
+    ArchivedOrderItem = apps.get_model('orders', 'ArchivedOrderItem')
+    FarmerDailyStats = apps.get_model('orders', 'FarmerDailyStats')
+    expected = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+
+    hot = FarmerOrder.objects.annotate(day=TruncDate('created_at')).values('farmer_id', 'day').annotate(
+        orders=models.Count('id'),
+        pending=models.Count('id', filter=models.Q(status='PENDING')),
+        confirmed=models.Count('id', filter=models.Q(status='CONFIRMED')),
+        cancelled=models.Count('id', filter=models.Q(status='CANCELLED')),
+        revenue=models.Sum('subtotal', filter=models.Q(status='CONFIRMED')),
+    ).order_by()
+    for row in hot.iterator():
+        stats = expected[(row['farmer_id'], row['day'])]
+        stats['order_count'] += row['orders']
+        stats['pending_count'] += row['pending']
+        stats['confirmed_count'] += row['confirmed']
+        stats['cancelled_count'] += row['cancelled']
+        stats['confirmed_revenue'] += row['revenue'] or 0
+
+    archived = ArchivedOrderItem.objects.annotate(day=TruncDate('order__created_at')).values(
+        'crop__farmer_id', 'day', 'order_id', 'order__status'
+    ).annotate(
+        subtotal=models.Sum(
+            models.F('quantity_kg') * models.F('price_per_kg'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+    ).order_by()
+    for row in archived.iterator():
+        stats = expected[(row['crop__farmer_id'], row['day'])]
+        stats['order_count'] += 1
+        stats[f"{row['order__status'].lower()}_count"] += 1
+        if row['order__status'] == 'CONFIRMED':
+            stats['confirmed_revenue'] += row['subtotal']
+
+    FarmerDailyStats.objects.bulk_create([
+        FarmerDailyStats(farmer_id=farmer_id, day=day, **stats)
+        for (farmer_id, day), stats in expected.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_farmer_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('confirmed_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('confirmed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('farmer', 'day'), name='farmerdailystats_farmer_day_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_farmer_daily_stats, migrations.RunPython.noop),
+    ]
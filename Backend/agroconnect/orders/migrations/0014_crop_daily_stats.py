@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+STAT_FIELDS = ('order_count', 'quantity_kg', 'revenue')
+
+
+def seed_crop_daily_stats(apps, schema_editor):
+    # What orders.rollups.recompute_crops() derives, for every farmer, so
+    # the analytics keep their history from the first request.
+    CropDailyStats = apps.get_model('orders', 'CropDailyStats')
+    expected = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for model_name in ('OrderItem', 'ArchivedOrderItem'):
+        lines = apps.get_model('orders', model_name).objects.exclude(
+            order__status='CANCELLED'
+        ).annotate(
+            day=TruncDate('order__created_at')
+        ).values('crop__farmer_id', 'day', 'crop_id').annotate(
+            orders=models.Count('order_id', distinct=True),
+            total_kg=models.Sum('quantity_kg'),
+            revenue=models.Sum(
+                models.F('quantity_kg') * models.F('price_per_kg'),
+                filter=models.Q(order__status='CONFIRMED'),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2)
+            )
+        ).order_by()
+        for row in lines.iterator():
+            stats = expected[(row['crop__farmer_id'], row['day'], row['crop_id'])]
+            stats['order_count'] += row['orders']
+            stats['quantity_kg'] += row['total_kg']
+            stats['revenue'] += row['revenue'] or 0
+
+    CropDailyStats.objects.bulk_create([
+        CropDailyStats(farmer_id=farmer_id, day=day, crop_id=crop_id, **stats)
+        for (farmer_id, day, crop_id), stats in expected.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0008_catalog_indexes'),
+        ('orders', '0013_customer_order_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('quantity_kg', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='crops.crop')),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crop_daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('farmer', 'day', 'crop'), name='cropdailystats_farmer_day_crop_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_crop_daily_stats, migrations.RunPython.noop),
+    ]
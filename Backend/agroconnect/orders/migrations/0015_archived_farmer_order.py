@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_archived_farmer_orders(apps, schema_editor):
+    # Orders archived before this migration lost their FarmerOrder rows.
+    ArchivedOrderItem = apps.get_model('orders', 'ArchivedOrderItem')
+    ArchivedFarmerOrder = apps.get_model('orders', 'ArchivedFarmerOrder')
+    rows = ArchivedOrderItem.objects.values(
+        'order_id', 'crop__farmer_id', 'order__status', 'order__created_at'
+    ).annotate(
+        subtotal=models.Sum(
+            models.F('quantity_kg') * models.F('price_per_kg'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ),
+        item_count=models.Count('id'),
+        total_kg=models.Sum('quantity_kg')
+    ).order_by('order_id', 'crop__farmer_id')
+    ArchivedFarmerOrder.objects.bulk_create([
+        ArchivedFarmerOrder(
+            farmer_id=row['crop__farmer_id'],
+            order_id=row['order_id'],
+            status=row['order__status'],
+            created_at=row['order__created_at'],
+            subtotal=row['subtotal'],
+            item_count=row['item_count'],
+            quantity_kg=row['total_kg']
+        )
+        for row in rows.iterator()
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0014_crop_daily_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedFarmerOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('item_count', models.PositiveIntegerField()),
+                ('quantity_kg', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='farmer_orders', to='orders.archivedorder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farmer', 'created_at', 'id'], name='archivedfarmerorder_farmer_idx'), models.Index(fields=['farmer', 'status', 'created_at', 'id'], name='archivedfarmerorder_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('farmer', 'order'), name='archivedfarmerorder_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_archived_farmer_orders, migrations.RunPython.noop),
+    ]
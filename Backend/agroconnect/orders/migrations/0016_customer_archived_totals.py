@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def delete_farmer_totals(apps, schema_editor):
+    # Farmer dashboards read the daily rollups; nothing reads these rows.
+    ArchivedOrderTotals = apps.get_model('orders', 'ArchivedOrderTotals')
+    ArchivedOrderTotals.objects.filter(role='FARMER').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0015_archived_farmer_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_farmer_totals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='archivedordertotals',
+            name='role',
+            field=models.CharField(choices=[('CUSTOMER', 'Customer')], max_length=10),
+        ),
+    ]
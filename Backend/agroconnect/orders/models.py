@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from users.models import User
 from crops.models import Crop
@@ -46,6 +47,20 @@ class Order(models.Model):
     delivery_postal_code = models.CharField(max_length=20, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Customer order list, newest first.
+            models.Index(fields=['customer', 'created_at', 'id'], name='order_customer_created_idx'),
+            # Dashboard counts by status, review eligibility.
+            models.Index(fields=['customer', 'status', 'created_at'], name='order_customer_status_idx'),
+            # Only closed orders are ever archived; see orders.archive.
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(status__in=['CONFIRMED', 'CANCELLED']),
+                name='order_closed_created_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.customer.username}"
 
@@ -71,5 +86,318 @@ class OrderItem(models.Model):
     quantity_kg = models.PositiveIntegerField()
     price_per_kg = models.DecimalField(max_digits=8, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['crop', 'order'], name='orderitem_crop_order_idx'),
+        ]
+
     def __str__(self):
         return f"{self.crop.name} ({self.quantity_kg}kg)"
+
+
+class FarmerOrder(models.Model):
+    """
+    One farmer's share of an order: the lines on their crops, summed.
+    Created with the order; ``status`` and ``created_at`` mirror the order
+    so farmer-side reads stay on this table.
+    """
+    farmer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        limit_choices_to={'role': 'FARMER'},
+        related_name='farmer_orders'
+    )
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='farmer_orders')
+    status = models.CharField(max_length=20, choices=Order._meta.get_field('status').choices)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    item_count = models.PositiveIntegerField()
+    quantity_kg = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'order'], name='farmerorder_farmer_order_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['farmer', 'created_at', 'id'], name='farmerorder_farmer_created_idx'),
+            models.Index(
+                fields=['farmer', 'status', 'created_at', 'id'],
+                name='farmerorder_farmer_status_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} for farmer {self.farmer_id}"
+
+
+class FarmerDailyStats(models.Model):
+    """
+    Per-farmer, per-day rollup of sub-orders, by the day they were placed.
+    Maintained in the same transactions as the orders (orders.rollups) and
+    never pruned, so archived orders stay counted. Counts are signed so a
+    drifted row can go negative instead of failing a write;
+    reconcile_farmer_daily_stats repairs it.
+    """
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    order_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    confirmed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    confirmed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'day'], name='farmerdailystats_farmer_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Farmer {self.farmer_id} on {self.day}"
+
+
+class CropDailyStats(models.Model):
+    """
+    Per-crop, per-day rollup of order lines, by the day the order was
+    placed, for farmer analytics. Cancelled orders are not counted and
+    revenue covers confirmed orders only. Maintained and reconciled with
+    FarmerDailyStats.
+    """
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='crop_daily_stats')
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    order_count = models.IntegerField(default=0)
+    quantity_kg = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['farmer', 'day', 'crop'], name='cropdailystats_farmer_day_crop_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Crop {self.crop_id} on {self.day}"
+
+
+class CustomerOrderStats(models.Model):
+    """
+    All-time order counters of a customer, archived orders included.
+    Created by the first order write after it is missing, from a full
+    recount, then adjusted in the same transactions as the orders
+    (orders.rollups).
+    """
+    customer = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='order_stats'
+    )
+    total_orders = models.IntegerField(default=0)
+    pending_orders = models.IntegerField(default=0)
+    confirmed_orders = models.IntegerField(default=0)
+    cancelled_orders = models.IntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Customer {self.customer_id}: {self.total_orders} orders"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored outcome of a write request sent with an Idempotency-Key
+    header. ``status_code`` stays null while the first request is running.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=50)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'scope', 'key')
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.user_id})"
+
+
+class StockReservation(models.Model):
+    """
+    A checkout hold on part of a crop's stock. Active holds are summed on
+    Crop.reserved_kg; rows are deleted when converted into an order or
+    released, so every row here is either live or awaiting the sweeper.
+    """
+    customer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        limit_choices_to={'role': 'CUSTOMER'},
+        related_name='stock_reservations'
+    )
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='reservations')
+    quantity_kg = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'expires_at', 'id'], name='reservation_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"Hold {self.quantity_kg}kg of crop #{self.crop_id} for {self.customer_id}"
+
+
+class BrokerMessage(models.Model):
+    """A notification on the cross-process channel polled by orders.broker."""
+    channel = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['channel', 'id'], name='brokermessage_channel_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.channel}"
+
+
+class OrderEventSequence(models.Model):
+    """
+    Per-farmer counter for OrderEvent.seq. Writers lock this row while
+    appending, so a farmer's events commit in sequence order and a reader
+    polling ``seq > since`` never skips one.
+    """
+    farmer = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    last_seq = models.PositiveBigIntegerField(default=0)
+    # Events up to here may have been deleted by compact_order_events.
+    compacted_seq = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Farmer {self.farmer_id} at {self.last_seq}"
+
+
+class OrderEvent(models.Model):
+    """Append-only outbox of order changes, one row per affected farmer."""
+    PLACED = 'PLACED'
+    STATUS_CHANGED = 'STATUS_CHANGED'
+
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    seq = models.PositiveBigIntegerField()
+    # Not a foreign key: events outlive archived orders.
+    order_id = models.BigIntegerField()
+    event_type = models.CharField(
+        max_length=20,
+        choices=[(PLACED, 'Placed'), (STATUS_CHANGED, 'Status changed')]
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'seq'], name='orderevent_farmer_seq_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} order #{self.order_id} ({self.farmer_id}:{self.seq})"
+
+
+class ArchivedOrder(models.Model):
+    """
+    A closed order moved out of Order by the archive_orders command. Ids are
+    kept, so an order id means the same order in either table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20)
+    payment_method = models.CharField(max_length=20)
+    payment_status = models.CharField(max_length=20)
+    delivery_name = models.CharField(max_length=120, blank=True, default="")
+    delivery_phone = models.CharField(max_length=20, blank=True, default="")
+    delivery_address_line1 = models.CharField(max_length=200, blank=True, default="")
+    delivery_address_line2 = models.CharField(max_length=200, blank=True, default="")
+    delivery_city = models.CharField(max_length=100, blank=True, default="")
+    delivery_state = models.CharField(max_length=100, blank=True, default="")
+    delivery_postal_code = models.CharField(max_length=20, blank=True, default="")
+    created_at = models.DateTimeField(db_index=True)
+    # OrderStatusHistory rows, folded in since the order can no longer change.
+    status_history = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'created_at', 'id'], name='archivedorder_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id}"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='+')
+    quantity_kg = models.PositiveIntegerField()
+    price_per_kg = models.DecimalField(max_digits=8, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['crop', 'order'], name='archivedorderitem_crop_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.crop_id} ({self.quantity_kg}kg)"
+
+
+class ArchivedFarmerOrder(models.Model):
+    """A FarmerOrder of an archived order, moved with it by archive_orders."""
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='farmer_orders')
+    status = models.CharField(max_length=20)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    item_count = models.PositiveIntegerField()
+    quantity_kg = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'order'], name='archivedfarmerorder_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['farmer', 'created_at', 'id'], name='archivedfarmerorder_farmer_idx'),
+            models.Index(
+                fields=['farmer', 'status', 'created_at', 'id'],
+                name='archivedfarmerorder_status_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.order_id} for farmer {self.farmer_id}"
+
+
+class ArchivedOrderTotals(models.Model):
+    """
+    Running per-customer totals of archived orders, by status, so the
+    customer dashboard can count them without reading the archive. Farmer
+    dashboards read the FarmerDailyStats rollups, which cover archived
+    orders too.
+    """
+    CUSTOMER = 'CUSTOMER'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    role = models.CharField(max_length=10, choices=[(CUSTOMER, 'Customer')])
+    status = models.CharField(max_length=20)
+    order_count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'role', 'status'], name='archivedtotals_user_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.role} {self.user_id} {self.status}: {self.order_count}"
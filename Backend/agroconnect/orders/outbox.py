@@ -0,0 +1,54 @@
+"""
+Transactional outbox of order changes for the farmer change feed.
+
+record_order_events() must be called inside the transaction that changes
+the orders, so an event exists exactly when its change committed. Sequence
+numbers are allocated per farmer under a row lock on OrderEventSequence.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import OrderEvent, OrderEventSequence
+
+
+def _lock_sequence(farmer_id):
+    sequence = OrderEventSequence.objects.select_for_update().filter(farmer_id=farmer_id).first()
+    if sequence is not None:
+        return sequence
+    try:
+        with transaction.atomic():
+            return OrderEventSequence.objects.create(farmer_id=farmer_id)
+    except IntegrityError:
+        # Another transaction created it first; wait for its lock instead.
+        return OrderEventSequence.objects.select_for_update().get(farmer_id=farmer_id)
+
+
+def record_order_events(event_type, orders_by_farmer, payload=None):
+    """
+    Append one ``event_type`` event per (farmer, order) in
+    ``{farmer_id: order_ids}``. Returns {farmer_id: last seq}.
+    """
+    last_seqs = {}
+    events = []
+    # Farmers in id order so concurrent writers lock sequences consistently.
+    for farmer_id in sorted(orders_by_farmer):
+        order_ids = sorted(set(orders_by_farmer[farmer_id]))
+        if not order_ids:
+            continue
+        sequence = _lock_sequence(farmer_id)
+        OrderEventSequence.objects.filter(pk=farmer_id).update(
+            last_seq=F('last_seq') + len(order_ids)
+        )
+        events.extend(
+            OrderEvent(
+                farmer_id=farmer_id,
+                seq=sequence.last_seq + offset,
+                order_id=order_id,
+                event_type=event_type,
+                payload=payload or {}
+            )
+            for offset, order_id in enumerate(order_ids, start=1)
+        )
+        last_seqs[farmer_id] = sequence.last_seq + len(order_ids)
+    OrderEvent.objects.bulk_create(events)
+    return last_seqs
@@ -0,0 +1,148 @@
+"""
+Time-limited stock holds taken when a buyer starts checkout.
+
+Taking a hold is a single conditional UPDATE on the crop row
+(``quantity_kg - reserved_kg >= n``), so holds never oversubscribe stock
+and no row stays locked while the buyer fills in the delivery form.
+Placing the order converts the holds (see PlaceOrderView); holds that
+expire are given back in batches by release_expired_reservations().
+
+A customer has at most one live hold per crop, of at most
+settings.RESERVATION_MAX_HOLD_KG, so one account cannot take a crop's
+whole stock off the market for the TTL.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from crops.cache import bump_catalog_cache_version
+from crops.models import Crop
+from .models import StockReservation
+
+
+RESERVATION_TTL = timedelta(minutes=10)
+DEFAULT_MAX_HOLD_KG = 100
+
+
+class ReservationError(Exception):
+    pass
+
+
+def reserve_stock(customer, quantities):
+    """
+    Hold {crop_id: kg} for ``customer``. All or nothing: raises
+    ReservationError if any crop is missing, short of available stock,
+    over the per-hold limit or already held by the customer.
+    """
+    max_kg = getattr(settings, 'RESERVATION_MAX_HOLD_KG', DEFAULT_MAX_HOLD_KG)
+    now = timezone.now()
+    expires_at = now + RESERVATION_TTL
+    with transaction.atomic():
+        # One reservation request per customer at a time, so two cannot
+        # both pass the check for an existing hold.
+        list(type(customer).objects.select_for_update().filter(pk=customer.pk).values_list('pk'))
+
+        names = dict(Crop.objects.filter(id__in=list(quantities)).values_list('id', 'name'))
+        missing_ids = [crop_id for crop_id in quantities if crop_id not in names]
+        if missing_ids:
+            raise ReservationError(f"Crop not found: {', '.join(map(str, missing_ids))}")
+
+        for crop_id, quantity in sorted(quantities.items()):
+            if quantity > max_kg:
+                raise ReservationError(f"At most {max_kg} kg of {names[crop_id]} can be held")
+
+        held = list(StockReservation.objects.filter(
+            customer=customer,
+            expires_at__gt=now,
+            crop_id__in=list(quantities)
+        ).values_list('crop_id', flat=True)[:1])
+        if held:
+            raise ReservationError(
+                f"You already hold {names[held[0]]}; check out or release that hold first"
+            )
+
+        for crop_id, quantity in sorted(quantities.items()):
+            held = Crop.objects.filter(
+                id=crop_id,
+                quantity_kg__gte=F('reserved_kg') + quantity
+            ).update(reserved_kg=F('reserved_kg') + quantity)
+            if not held:
+                raise ReservationError(f"Insufficient stock for {names[crop_id]}")
+
+        reservations = StockReservation.objects.bulk_create([
+            StockReservation(
+                customer=customer,
+                crop_id=crop_id,
+                quantity_kg=quantity,
+                expires_at=expires_at
+            )
+            for crop_id, quantity in quantities.items()
+        ])
+    bump_catalog_cache_version(quantities)
+    return reservations
+
+
+def _give_back(reservations):
+    """Delete ``reservations`` and return their kg to the crops' available stock."""
+    released = defaultdict(int)
+    for reservation in reservations:
+        released[reservation.crop_id] += reservation.quantity_kg
+    for crop_id, quantity in sorted(released.items()):
+        Crop.objects.filter(id=crop_id).update(reserved_kg=F('reserved_kg') - quantity)
+    StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).delete()
+    return list(released)
+
+
+def release_reservation(customer, reservation_id):
+    """Release one of the customer's holds; returns False if it is gone."""
+    with transaction.atomic():
+        reservation = StockReservation.objects.select_for_update().filter(
+            pk=reservation_id,
+            customer=customer
+        ).first()
+        if reservation is None:
+            return False
+        crop_ids = _give_back([reservation])
+    bump_catalog_cache_version(crop_ids)
+    return True
+
+
+def claim_reservations(customer, reservation_ids):
+    """
+    Lock and delete the customer's unexpired holds for checkout, returning
+    them. Must run inside the order transaction; the caller moves the held
+    kg out of reserved_kg and quantity_kg. Raises ReservationError if any
+    hold is unknown or has expired.
+    """
+    if not reservation_ids:
+        return []
+    reservations = list(StockReservation.objects.select_for_update().filter(
+        pk__in=reservation_ids,
+        customer=customer,
+        expires_at__gt=timezone.now()
+    ).order_by('pk'))
+    if len(reservations) != len(set(reservation_ids)):
+        raise ReservationError("Reservation expired or not found; please check out again")
+    StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).delete()
+    return reservations
+
+
+def release_expired_reservations(batch_size=500):
+    """Give back expired holds, ``batch_size`` rows per transaction. Returns the count."""
+    released = 0
+    while True:
+        with transaction.atomic():
+            # Rows locked by a checkout that is converting them are skipped.
+            expired = StockReservation.objects.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked
+            ).filter(expires_at__lte=timezone.now())
+            batch = list(expired.order_by('expires_at', 'pk')[:batch_size])
+            if not batch:
+                return released
+            crop_ids = _give_back(batch)
+        bump_catalog_cache_version(crop_ids)
+        released += len(batch)
@@ -0,0 +1,334 @@
+"""
+Incremental order rollups: per-farmer and per-crop daily rows
+(FarmerDailyStats, CropDailyStats) and per-customer counters
+(CustomerOrderStats).
+
+Each sub-order counts once in ``order_count`` and once in the count of its
+current status, on the day it was placed. Per crop, pending and confirmed
+orders count with their kilograms, and confirmed ones with their revenue.
+Order placement and status
+changes adjust the affected rows in their own transaction, so a dashboard
+read is one aggregate over the farmer's days.
+
+recompute() and recompute_crops() derive the same numbers from the order
+tables and the archive; reconcile_farmer_daily_stats uses them to find
+and repair drift.
+
+A customer's counters row is created by the first order write that finds
+it missing, from a full recount in that transaction; until then the
+dashboard runs the same recount.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .analytics import bump_farmer_analytics_versions
+from .models import (
+    ArchivedOrderItem,
+    ArchivedOrderTotals,
+    CropDailyStats,
+    CustomerOrderStats,
+    FarmerDailyStats,
+    FarmerOrder,
+    Order,
+    OrderItem
+)
+
+
+STAT_FIELDS = (
+    'order_count', 'pending_count', 'confirmed_count', 'cancelled_count', 'confirmed_revenue'
+)
+CROP_STAT_FIELDS = ('order_count', 'quantity_kg', 'revenue')
+CUSTOMER_STAT_FIELDS = (
+    'total_orders', 'pending_orders', 'confirmed_orders', 'cancelled_orders', 'total_spent'
+)
+RECENT_DAYS = 7
+
+
+def _status_share(status, subtotal, sign=1):
+    share = {f'{status.lower()}_count': sign}
+    if status == 'CONFIRMED':
+        share['confirmed_revenue'] = subtotal * sign
+    return share
+
+
+def _apply(model, key_fields, deltas):
+    # Rows in key order so concurrent writers lock them alike.
+    for key, changes in sorted(deltas.items()):
+        changes = {field: value for field, value in changes.items() if value}
+        if not changes:
+            continue
+        lookup = dict(zip(key_fields, key))
+        rows = model.objects.filter(**lookup)
+        updates = {field: F(field) + value for field, value in changes.items()}
+        if rows.update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **changes)
+        except IntegrityError:
+            # Another transaction created the row first.
+            rows.update(**updates)
+
+
+def _crop_share(status, quantity_kg, amount, sign=1):
+    if status == 'CANCELLED':
+        return {}
+    share = {'order_count': sign, 'quantity_kg': quantity_kg * sign}
+    if status == 'CONFIRMED':
+        share['revenue'] = amount * sign
+    return share
+
+
+def _crop_lines(order_ids):
+    """Order lines of ``order_ids`` summed per order and crop."""
+    return OrderItem.objects.filter(order_id__in=order_ids).values(
+        'order_id', 'crop_id', 'crop__farmer_id', 'order__created_at'
+    ).annotate(
+        total_kg=Sum('quantity_kg'),
+        amount=Sum(F('quantity_kg') * F('price_per_kg'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    ).order_by()
+
+
+def _apply_farmer_rollups(farmer_deltas, crop_deltas):
+    # Farmer rows before crop rows, on every write path.
+    _apply(FarmerDailyStats, ('farmer_id', 'day'), farmer_deltas)
+    _apply(CropDailyStats, ('farmer_id', 'day', 'crop_id'), crop_deltas)
+
+
+def record_orders_placed(farmer_orders):
+    """Count new FarmerOrder rows. Call inside the transaction creating them."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    status_by_order = {}
+    for farmer_order in farmer_orders:
+        status_by_order[farmer_order.order_id] = farmer_order.status
+        row = deltas[(farmer_order.farmer_id, timezone.localdate(farmer_order.created_at))]
+        row['order_count'] += 1
+        for field, value in _status_share(farmer_order.status, farmer_order.subtotal).items():
+            row[field] += value
+
+    crop_deltas = defaultdict(lambda: defaultdict(int))
+    for line in _crop_lines(status_by_order):
+        row = crop_deltas[(line['crop__farmer_id'], timezone.localdate(line['order__created_at']), line['crop_id'])]
+        share = _crop_share(status_by_order[line['order_id']], line['total_kg'], line['amount'])
+        for field, value in share.items():
+            row[field] += value
+    _apply_farmer_rollups(deltas, crop_deltas)
+
+
+def record_status_change(order_ids, new_status):
+    """
+    Move the sub-orders of ``order_ids`` to ``new_status`` in the rollups.
+    Call before FarmerOrder.status is updated, in the same transaction.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    previous_status = {}
+    rows = FarmerOrder.objects.filter(order_id__in=order_ids).exclude(status=new_status).values_list(
+        'farmer_id', 'order_id', 'created_at', 'status', 'subtotal'
+    )
+    for farmer_id, order_id, created_at, status, subtotal in rows:
+        previous_status[order_id] = status
+        row = deltas[(farmer_id, timezone.localdate(created_at))]
+        for share in (_status_share(status, subtotal, -1), _status_share(new_status, subtotal)):
+            for field, value in share.items():
+                row[field] += value
+
+    crop_deltas = defaultdict(lambda: defaultdict(int))
+    for line in _crop_lines(previous_status):
+        row = crop_deltas[(line['crop__farmer_id'], timezone.localdate(line['order__created_at']), line['crop_id'])]
+        for share in (
+            _crop_share(previous_status[line['order_id']], line['total_kg'], line['amount'], -1),
+            _crop_share(new_status, line['total_kg'], line['amount'])
+        ):
+            for field, value in share.items():
+                row[field] += value
+    _apply_farmer_rollups(deltas, crop_deltas)
+
+    # Changes to earlier days reach buckets analytics keeps cached.
+    today = timezone.localdate()
+    farmer_ids = {farmer_id for farmer_id, day in deltas if day < today}
+    if farmer_ids:
+        transaction.on_commit(lambda: bump_farmer_analytics_versions(farmer_ids))
+
+
+def dashboard_totals(farmer_id):
+    """All-time order metrics of a farmer, in one query."""
+    money = DecimalField(max_digits=14, decimal_places=2)
+    recent_from = timezone.localdate() - timedelta(days=RECENT_DAYS - 1)
+    return FarmerDailyStats.objects.filter(farmer_id=farmer_id).aggregate(
+        total_orders=Coalesce(Sum('order_count'), 0),
+        pending_orders=Coalesce(Sum('pending_count'), 0),
+        confirmed_orders=Coalesce(Sum('confirmed_count'), 0),
+        cancelled_orders=Coalesce(Sum('cancelled_count'), 0),
+        confirmed_revenue=Coalesce(
+            Sum('confirmed_revenue'), Value(Decimal('0.00')), output_field=money
+        ),
+        recent_orders=Coalesce(Sum('order_count', filter=Q(day__gte=recent_from)), 0),
+    )
+
+
+def recompute(farmer_ids):
+    """{(farmer_id, day): {field: value}} rebuilt from the source rows."""
+    expected = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+
+    hot = FarmerOrder.objects.filter(farmer_id__in=farmer_ids).annotate(
+        day=TruncDate('created_at')
+    ).values('farmer_id', 'day').annotate(
+        orders=Count('id'),
+        pending=Count('id', filter=Q(status='PENDING')),
+        confirmed=Count('id', filter=Q(status='CONFIRMED')),
+        cancelled=Count('id', filter=Q(status='CANCELLED')),
+        revenue=Sum('subtotal', filter=Q(status='CONFIRMED')),
+    ).order_by()
+    for row in hot:
+        stats = expected[(row['farmer_id'], row['day'])]
+        stats['order_count'] += row['orders']
+        stats['pending_count'] += row['pending']
+        stats['confirmed_count'] += row['confirmed']
+        stats['cancelled_count'] += row['cancelled']
+        stats['confirmed_revenue'] += row['revenue'] or 0
+
+    archived = ArchivedOrderItem.objects.filter(crop__farmer_id__in=farmer_ids).annotate(
+        day=TruncDate('order__created_at')
+    ).values('crop__farmer_id', 'day', 'order_id', 'order__status').annotate(
+        subtotal=Sum(F('quantity_kg') * F('price_per_kg'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    ).order_by()
+    for row in archived:
+        stats = expected[(row['crop__farmer_id'], row['day'])]
+        stats['order_count'] += 1
+        for field, value in _status_share(row['order__status'], row['subtotal']).items():
+            stats[field] += value
+    return expected
+
+
+def recompute_crops(farmer_ids):
+    """{(farmer_id, day, crop_id): {field: value}} rebuilt from the source rows."""
+    expected = defaultdict(lambda: dict.fromkeys(CROP_STAT_FIELDS, 0))
+    money = DecimalField(max_digits=14, decimal_places=2)
+    for model in (OrderItem, ArchivedOrderItem):
+        lines = model.objects.filter(crop__farmer_id__in=farmer_ids).exclude(
+            order__status='CANCELLED'
+        ).annotate(
+            day=TruncDate('order__created_at')
+        ).values('crop__farmer_id', 'day', 'crop_id').annotate(
+            orders=Count('order_id', distinct=True),
+            total_kg=Sum('quantity_kg'),
+            revenue=Sum(
+                F('quantity_kg') * F('price_per_kg'),
+                filter=Q(order__status='CONFIRMED'),
+                output_field=money
+            )
+        ).order_by()
+        for row in lines:
+            stats = expected[(row['crop__farmer_id'], row['day'], row['crop_id'])]
+            stats['order_count'] += row['orders']
+            stats['quantity_kg'] += row['total_kg']
+            stats['revenue'] += row['revenue'] or 0
+    return expected
+
+
+def _customer_share(status, total_amount, sign=1):
+    share = {f'{status.lower()}_orders': sign}
+    if status == 'CONFIRMED':
+        share['total_spent'] = total_amount * sign
+    return share
+
+
+def _apply_customers(deltas):
+    for customer_id, changes in sorted(deltas.items()):
+        changes = {field: value for field, value in changes.items() if value}
+        if not changes:
+            continue
+        rows = CustomerOrderStats.objects.filter(customer_id=customer_id)
+        updates = {field: F(field) + value for field, value in changes.items()}
+        if rows.update(**updates):
+            continue
+        # The recount already sees this transaction's order writes.
+        totals = customer_totals(customer_id)
+        try:
+            with transaction.atomic():
+                CustomerOrderStats.objects.create(
+                    customer_id=customer_id,
+                    **{field: totals[field] for field in CUSTOMER_STAT_FIELDS}
+                )
+        except IntegrityError:
+            # Another transaction created the row first, without our writes.
+            rows.update(**updates)
+
+
+def record_customer_order_placed(order):
+    """Count a new order. Call after it is saved, in the same transaction."""
+    row = {'total_orders': 1, **_customer_share(order.status, order.total_amount)}
+    _apply_customers({order.customer_id: row})
+
+
+def record_customer_status_change(changes, new_status):
+    """
+    Move orders, given as (customer_id, previous_status, total_amount), to
+    ``new_status``. Call after the Order rows are updated, in the same
+    transaction.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for customer_id, previous_status, total_amount in changes:
+        if previous_status == new_status:
+            continue
+        row = deltas[customer_id]
+        for share in (
+            _customer_share(previous_status, total_amount, -1),
+            _customer_share(new_status, total_amount)
+        ):
+            for field, value in share.items():
+                row[field] += value
+    _apply_customers(deltas)
+
+
+def _recent_orders_since():
+    return timezone.now() - timedelta(days=RECENT_DAYS)
+
+
+def customer_totals(customer_id):
+    """
+    A customer's counters and recent order count recomputed from Order and
+    ArchivedOrderTotals, in one query. Recent orders are never archived.
+    """
+    money = DecimalField(max_digits=14, decimal_places=2)
+    archived = ArchivedOrderTotals.objects.filter(
+        user_id=customer_id, role=ArchivedOrderTotals.CUSTOMER
+    ).values('user_id')
+
+    def archived_sum(field, **filters):
+        return Coalesce(
+            Subquery(archived.filter(**filters).annotate(total=Sum(field)).values('total')),
+            Value(0),
+            output_field=money if field == 'amount' else None
+        )
+
+    zero = Value(Decimal('0.00'))
+    return Order.objects.filter(customer_id=customer_id).aggregate(
+        total_orders=Count('id') + archived_sum('order_count'),
+        pending_orders=Count('id', filter=Q(status='PENDING')),
+        confirmed_orders=Count('id', filter=Q(status='CONFIRMED'))
+        + archived_sum('order_count', status='CONFIRMED'),
+        cancelled_orders=Count('id', filter=Q(status='CANCELLED'))
+        + archived_sum('order_count', status='CANCELLED'),
+        total_spent=Coalesce(
+            Sum('total_amount', filter=Q(status='CONFIRMED')), zero, output_field=money
+        ) + archived_sum('amount', status='CONFIRMED'),
+        recent_orders=Count('id', filter=Q(created_at__gte=_recent_orders_since())),
+    )
+
+
+def customer_dashboard_totals(customer_id):
+    """A customer's dashboard metrics: one row read, or the recount if missing."""
+    recent = Order.objects.filter(
+        customer_id=OuterRef('customer_id'), created_at__gte=_recent_orders_since()
+    ).values('customer_id').annotate(total=Count('id')).values('total')
+    row = CustomerOrderStats.objects.filter(customer_id=customer_id).values(
+        *CUSTOMER_STAT_FIELDS, recent_orders=Coalesce(Subquery(recent), 0)
+    ).first()
+    return row if row is not None else customer_totals(customer_id)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Order, OrderItem
+from .models import FarmerOrder, Order, OrderItem, StockReservation
 from crops.models import Crop
 
 
@@ -34,26 +34,43 @@ class OrderSerializer(serializers.ModelSerializer):
             'items'
         ]
         read_only_fields = ['customer', 'total_amount', 'status', 'payment_status']
-class FarmerOrderItemSerializer(serializers.ModelSerializer):
+class FarmerOrderSerializer(serializers.ModelSerializer):
+    """A farmer's sub-order; ``items`` are only the lines on their crops."""
     customer = serializers.CharField(source='order.customer.username', read_only=True)
-    order_id = serializers.IntegerField(source='order.id', read_only=True)
-    order_status = serializers.CharField(source='order.status', read_only=True)
+    order_status = serializers.CharField(source='status', read_only=True)
     payment_method = serializers.CharField(source='order.payment_method', read_only=True)
     payment_status = serializers.CharField(source='order.payment_status', read_only=True)
-    crop_name = serializers.CharField(source='crop.name', read_only=True)
+    items = OrderItemSerializer(source='order.farmer_items', many=True, read_only=True)
 
     class Meta:
-        model = OrderItem
+        model = FarmerOrder
         fields = [
             'order_id',
             'customer',
-            'crop',
-            'crop_name',
-            'quantity_kg',
-            'price_per_kg',
+            'created_at',
             'order_status',
             'payment_method',
-            'payment_status'
+            'payment_status',
+            'subtotal',
+            'item_count',
+            'quantity_kg',
+            'items'
         ]
 class OrderStatusUpdateSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=['CONFIRMED', 'CANCELLED'])
+
+
+class OrderStatusBulkUpdateSerializer(OrderStatusUpdateSerializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500
+    )
+
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    crop_name = serializers.CharField(source='crop.name', read_only=True)
+
+    class Meta:
+        model = StockReservation
+        fields = ['id', 'crop', 'crop_name', 'quantity_kg', 'created_at', 'expires_at']
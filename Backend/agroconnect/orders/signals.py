@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from crops.models import Crop
+from .analytics import bump_farmer_analytics_versions
+
+
+@receiver(post_delete, sender=Crop)
+def invalidate_crop_analytics(sender, instance, **kwargs):
+    # The crop's CropDailyStats rows cascade away with it.
+    farmer_id = instance.farmer_id
+    transaction.on_commit(lambda: bump_farmer_analytics_versions([farmer_id]))
@@ -1,3 +1,533 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from agroconnect.query_plans import QueryPlanTestCase
+from crops.models import Crop
+from users.models import FarmerProfile, User
+from .archive import archive_batch
+from .farmer_orders import cache_stats
+from .models import (
+    ArchivedFarmerOrder,
+    ArchivedOrder,
+    ArchivedOrderItem,
+    CropDailyStats,
+    FarmerDailyStats,
+    FarmerOrder,
+    IdempotencyKey,
+    Order,
+    OrderEvent,
+    OrderItem,
+    StockReservation
+)
+from .reservations import release_expired_reservations
+
+
+DELIVERY = {
+    'name': 'Asha', 'phone': '9999999999', 'address_line1': '1 Main Road',
+    'city': 'Pune', 'state': 'MH', 'postal_code': '411001',
+}
+
+
+class OrderQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        FarmerProfile.objects.create(user=cls.farmer, farm_name='Farm', location='Pune')
+        cls.customer = User.objects.create_user('customer', password='x', role='CUSTOMER')
+        cls.crop = Crop.objects.create(
+            farmer=cls.farmer, name='Apple', category='Fruit', price_per_kg=40,
+            quantity_kg=1000, harvest_date=date(2026, 1, 1)
+        )
+        archived = ArchivedOrder.objects.create(
+            id=10**9, customer=cls.customer, total_amount=40, status='CONFIRMED',
+            payment_method='COD', payment_status='PAID',
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        ArchivedOrderItem.objects.create(
+            id=10**9, order=archived, crop=cls.crop, quantity_kg=1, price_per_kg=40
+        )
+        ArchivedFarmerOrder.objects.create(
+            farmer=cls.farmer, order=archived, status='CONFIRMED', subtotal=40,
+            item_count=1, quantity_kg=1, created_at=archived.created_at
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.farmer_client = APIClient()
+        self.farmer_client.force_authenticate(self.farmer)
+        self.customer_client = APIClient()
+        self.customer_client.force_authenticate(self.customer)
+
+    def place_order(self):
+        response = self.customer_client.post('/api/orders/place/', {
+            'items': [{'crop_id': self.crop.id, 'quantity_kg': 1}],
+            'delivery_address': DELIVERY,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_checkout(self):
+        with self.assertUsesIndexes():
+            self.place_order()
+            response = self.customer_client.post('/api/orders/reservations/', {
+                'items': [{'crop_id': self.crop.id, 'quantity_kg': 1}]
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.customer_client.get('/api/orders/reservations/')
+
+    def test_customer_order_list(self):
+        self.place_order()
+        for params in ({}, {'include_count': 1}, {'page': 1}, {'from': '2020-01-01'}):
+            with self.subTest(params=params), self.assertUsesIndexes():
+                response = self.customer_client.get('/api/orders/', params)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+        with self.assertUsesIndexes():
+            response = self.customer_client.get('/api/orders/', {'page': 1, 'from': '2020-01-01'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][1]['id'], 10**9)
+
+    def test_status_updates_and_changes(self):
+        first, second = self.place_order(), self.place_order()
+        with self.assertUsesIndexes():
+            self.farmer_client.patch(f'/api/farmer/orders/{first}/status/', {'status': 'CONFIRMED'})
+            self.farmer_client.patch(
+                '/api/farmer/orders/status/',
+                {'order_ids': [second], 'status': 'CANCELLED'},
+                format='json'
+            )
+        with self.assertUsesIndexes():
+            response = self.farmer_client.get('/api/farmer/orders/changes/')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_farmer_order_list(self):
+        self.place_order()
+        for params in ({}, {'page': 1}, {'page': 1, 'status': 'PENDING'}, {'page': 1, 'count': 'none'}):
+            with self.subTest(params=params), self.assertUsesIndexes():
+                response = self.farmer_client.get('/api/farmer/orders/', params)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['items'][0]['crop_name'], 'Apple')
+
+        # Only the page's archived lines are sorted, whichever index SQLite picks.
+        with self.assertUsesIndexes(allow_sort=True):
+            response = self.farmer_client.get('/api/farmer/orders/', {'page': 1, 'from': '2020-01-01'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [order['order_status'] for order in response.data['results']], ['PENDING', 'CONFIRMED']
+        )
+        self.assertEqual(response.data['results'][1]['items'][0]['crop_name'], 'Apple')
+
+    def test_exports(self):
+        self.place_order()
+        # Exports are sorted by order id across the joined rows so hot and
+        # archived rows can be merged.
+        with self.assertUsesIndexes(allow_sort=True):
+            for client, url in (
+                (self.customer_client, '/api/orders/export/'),
+                (self.farmer_client, '/api/farmer/orders/export/'),
+            ):
+                response = client.get(url, {'from': '2020-01-01'})
+                self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+    def test_archive_batch(self):
+        order_id = self.place_order()
+        Order.objects.filter(id=order_id).update(
+            status='CONFIRMED', created_at=timezone.now() - timedelta(days=400)
+        )
+        with self.assertUsesIndexes():
+            self.assertEqual(archive_batch(timezone.now() - timedelta(days=180), 100), 1)
+
+    def test_farmer_analytics(self):
+        self.place_order()
+        date_from = timezone.localdate() - timedelta(days=300)
+        for interval in ('day', 'week', 'month'):
+            with self.subTest(interval=interval), self.assertUsesIndexes():
+                response = self.farmer_client.get(
+                    '/api/farmer/analytics/', {'interval': interval, 'from': date_from.isoformat()}
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['series'][-1]['quantity_kg'], 1)
+            self.assertEqual(response.data['crops'][0]['crop_name'], 'Apple')
+
+
+class OrderAPITestCase(APITestCase):
+    headers = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        FarmerProfile.objects.create(user=cls.farmer, farm_name='Farm', location='Pune')
+        cls.other_farmer = User.objects.create_user('other', password='x', role='FARMER')
+        cls.customer = User.objects.create_user('customer', password='x', role='CUSTOMER')
+        cls.other_customer = User.objects.create_user('customer2', password='x', role='CUSTOMER')
+        cls.apple = Crop.objects.create(
+            farmer=cls.farmer, name='Apple', category='Fruit', price_per_kg=10,
+            quantity_kg=10, harvest_date=date(2026, 1, 1)
+        )
+        cls.bean = Crop.objects.create(
+            farmer=cls.farmer, name='Bean', category='Vegetable', price_per_kg=5,
+            quantity_kg=5, harvest_date=date(2026, 1, 1)
+        )
+        cls.corn = Crop.objects.create(
+            farmer=cls.other_farmer, name='Corn', category='Grain', price_per_kg=2,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def place(self, user, items=None, **extra):
+        self.client.force_authenticate(user)
+        body = {'delivery_address': DELIVERY, **extra}
+        if items is not None:
+            body['items'] = [{'crop_id': crop.id, 'quantity_kg': kg} for crop, kg in items]
+        return self.client.post('/api/orders/place/', body, format='json', **self.headers)
+
+    def stock(self, crop):
+        crop.refresh_from_db()
+        return crop.quantity_kg, crop.reserved_kg
+
+
+class PlaceOrderTests(OrderAPITestCase):
+    def test_places_order_and_decrements_stock(self):
+        response = self.place(self.customer, [(self.apple, 3), (self.bean, 2), (self.apple, 1)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_amount'], '50.00')
+        self.assertEqual(self.stock(self.apple), (6, 0))
+        self.assertEqual(self.stock(self.bean), (3, 0))
+
+    def test_oversell_rolls_back_the_whole_order(self):
+        response = self.place(self.customer, [(self.apple, 3), (self.bean, 6)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Insufficient stock for Bean')
+        self.assertEqual(self.stock(self.apple), (10, 0))
+        self.assertFalse(Order.objects.exists())
+
+    def test_duplicate_lines_are_checked_together(self):
+        response = self.place(self.customer, [(self.apple, 6), (self.apple, 5)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stock(self.apple), (10, 0))
+
+        response = self.place(self.customer, [(self.apple, 6), (self.apple, 4)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.stock(self.apple), (0, 0))
+
+
+class IdempotencyTests(OrderAPITestCase):
+    headers = {'HTTP_IDEMPOTENCY_KEY': 'checkout-1'}
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.place(self.customer, [(self.apple, 2)])
+        retry = self.place(self.customer, [(self.apple, 2)])
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.stock(self.apple), (8, 0))
+
+    def test_reused_key_with_another_body_is_rejected(self):
+        self.place(self.customer, [(self.apple, 2)])
+        response = self.place(self.customer, [(self.apple, 3)])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_request_in_flight_conflicts(self):
+        IdempotencyKey.objects.create(
+            user=self.customer, scope='place-order', key='checkout-1', request_hash='pending',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        response = self.place(self.customer, [(self.apple, 2)])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+
+class StockReservationTests(OrderAPITestCase):
+    def reserve(self, user, items):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/orders/reservations/', {
+            'items': [{'crop_id': crop.id, 'quantity_kg': kg} for crop, kg in items]
+        }, format='json')
+
+    def test_held_stock_is_not_sold_to_others(self):
+        self.assertEqual(self.reserve(self.customer, [(self.apple, 8)]).status_code, 201)
+        self.assertEqual(self.stock(self.apple), (10, 8))
+
+        self.assertEqual(self.place(self.other_customer, [(self.apple, 3)]).status_code, 400)
+        self.assertEqual(self.reserve(self.other_customer, [(self.apple, 3)]).status_code, 409)
+        self.assertEqual(self.place(self.other_customer, [(self.apple, 2)]).status_code, 201)
+        self.assertEqual(self.stock(self.apple), (8, 8))
+
+    def test_reservation_is_used_once(self):
+        reservations = self.reserve(self.customer, [(self.apple, 4), (self.bean, 5)]).data
+        reservation_ids = [reservation['id'] for reservation in reservations]
+
+        response = self.place(self.customer, reservation_ids=reservation_ids)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_amount'], '65.00')
+        self.assertEqual(self.stock(self.apple), (6, 0))
+        self.assertEqual(self.stock(self.bean), (0, 0))
+
+        response = self.place(self.customer, reservation_ids=reservation_ids)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['error'], 'Reservation expired or not found; please check out again')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_one_capped_hold_per_crop(self):
+        self.assertEqual(self.reserve(self.customer, [(self.apple, 4)]).status_code, 201)
+        response = self.reserve(self.customer, [(self.bean, 1), (self.apple, 1)])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.data['error'], 'You already hold Apple; check out or release that hold first'
+        )
+        self.assertEqual(self.stock(self.bean), (5, 0))
+
+        with self.settings(RESERVATION_MAX_HOLD_KG=3):
+            response = self.reserve(self.customer, [(self.bean, 4)])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['error'], 'At most 3 kg of Bean can be held')
+
+        StockReservation.objects.update(expires_at=timezone.now())
+        self.assertEqual(self.reserve(self.customer, [(self.apple, 2)]).status_code, 201)
+
+    def test_sweeper_releases_expired_holds(self):
+        self.reserve(self.customer, [(self.apple, 4)])
+        self.reserve(self.other_customer, [(self.apple, 3)])
+        StockReservation.objects.filter(customer=self.customer).update(expires_at=timezone.now())
+
+        self.assertEqual(release_expired_reservations(), 1)
+        self.assertEqual(self.stock(self.apple), (10, 3))
+        self.assertEqual(StockReservation.objects.get().customer, self.other_customer)
+
+
+class BulkStatusUpdateTests(OrderAPITestCase):
+    def test_reports_failures_per_order(self):
+        mine = self.place(self.customer, [(self.apple, 1), (self.corn, 1)]).data['id']
+        confirmed = self.place(self.customer, [(self.bean, 1)]).data['id']
+        not_mine = self.place(self.customer, [(self.corn, 1)]).data['id']
+        self.client.force_authenticate(self.farmer)
+        self.client.patch(f'/api/farmer/orders/{confirmed}/status/', {'status': 'CONFIRMED'})
+
+        response = self.client.patch('/api/farmer/orders/status/', {
+            'order_ids': [mine, confirmed, not_mine, 10**9], 'status': 'CANCELLED'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [mine])
+        self.assertEqual(response.data['failed'], [
+            {'order_id': confirmed, 'error': 'Order status cannot be changed'},
+            {'order_id': not_mine, 'error': 'You are not allowed to update this order'},
+            {'order_id': 10**9, 'error': 'Order not found'},
+        ])
+        self.assertEqual(Order.objects.get(id=mine).status, 'CANCELLED')
+        self.assertEqual(Order.objects.get(id=confirmed).status, 'CONFIRMED')
+        # Cancelling gives the stock back.
+        self.assertEqual(self.stock(self.apple), (10, 0))
+        self.assertEqual(self.stock(self.corn), (99, 0))
+
+
+class CustomerOrderCursorTests(OrderAPITestCase):
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [order['id'] for order in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_every_order_appears_once_in_order(self):
+        orders = [Order.objects.create(customer=self.customer, total_amount=1) for _ in range(20)]
+        # Equal timestamps make the id tie-breaker decide the order.
+        Order.objects.filter(id__in=[order.id for order in orders[5:15]]).update(
+            created_at=orders[5].created_at
+        )
+        archived = ArchivedOrder.objects.create(
+            id=10**9, customer=self.customer, total_amount=1, status='CONFIRMED',
+            payment_method='COD', payment_status='PAID',
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.walk('/api/orders/?page_size=7'), expected)
+        self.assertEqual(self.walk('/api/orders/?page_size=7&from=2020-01-01'), expected + [archived.id])
+
+
+class OrderChangeFeedTests(OrderAPITestCase):
+    def changes(self, **params):
+        self.client.force_authenticate(self.farmer)
+        return self.client.get('/api/farmer/orders/changes/', params)
+
+    def test_since_and_next_since(self):
+        order_ids = [self.place(self.customer, [(self.apple, 1)]).data['id'] for _ in range(3)]
+        self.place(self.customer, [(self.corn, 1)])
+
+        response = self.changes()
+        self.assertEqual(response.data['next_since'], 3)
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual([order['order_id'] for order in response.data['results']], order_ids)
+
+        self.client.patch('/api/farmer/orders/status/', {
+            'order_ids': order_ids[:2], 'status': 'CONFIRMED'
+        }, format='json')
+        response = self.changes(since=3, limit=1)
+        self.assertEqual((response.data['next_since'], response.data['has_more']), (4, True))
+        self.assertEqual(
+            [(order['order_id'], order['order_status']) for order in response.data['results']],
+            [(order_ids[0], 'CONFIRMED')]
+        )
+        response = self.changes(since=4)
+        self.assertEqual((response.data['next_since'], response.data['has_more']), (5, False))
+
+        response = self.changes(since=5)
+        self.assertEqual((response.data['next_since'], response.data['results']), (5, []))
+
+    def test_compacted_changes_are_gone(self):
+        for _ in range(3):
+            self.place(self.customer, [(self.apple, 1)])
+        OrderEvent.objects.filter(farmer=self.farmer, seq__lte=2).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        call_command('compact_order_events', stdout=StringIO())
+
+        response = self.changes(since=1)
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.data['last_seq'], 3)
+        self.assertEqual(self.changes(since=2).status_code, 200)
+
+
+class FarmerOrderListCacheTests(OrderAPITestCase):
+    def list_orders(self, **params):
+        self.client.force_authenticate(self.farmer)
+        response = self.client.get('/api/farmer/orders/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertStats(self, **expected):
+        stats = cache_stats()
+        self.assertEqual({stat: stats[stat] for stat in expected}, expected)
+
+    def test_pages_and_counts_are_cached(self):
+        for _ in range(3):
+            self.place(self.customer, [(self.apple, 1)])
+
+        first = self.list_orders(page=1, page_size=2)
+        self.assertEqual((first['count'], len(first['results'])), (3, 2))
+        self.assertStats(page_hits=0, page_misses=1, count_hits=0, count_misses=1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.list_orders(page=1, page_size=2), first)
+        self.assertStats(page_hits=1, page_misses=1)
+
+        # Other pages and sorts of the same filter share its count.
+        self.assertEqual(len(self.list_orders(page=2, page_size=2)['results']), 1)
+        self.list_orders(page=1, page_size=2, sort='oldest')
+        self.assertStats(page_misses=3, count_hits=2, count_misses=1)
+
+    def test_count_none_reports_has_more(self):
+        for _ in range(3):
+            self.place(self.customer, [(self.apple, 1)])
+
+        data = self.list_orders(page=1, page_size=2, count='none')
+        self.assertNotIn('count', data)
+        self.assertEqual((data['has_more'], len(data['results'])), (True, 2))
+        data = self.list_orders(page=2, page_size=2, count='none')
+        self.assertEqual((data['has_more'], len(data['results'])), (False, 1))
+        self.assertStats(count_hits=0, count_misses=0)
+
+    def test_status_change_invalidates_cached_pages(self):
+        order_ids = [self.place(self.customer, [(self.apple, 1)]).data['id'] for _ in range(2)]
+        self.assertEqual(self.list_orders(page=1, status='PENDING')['count'], 2)
+        self.list_orders(page=1)
+
+        self.client.force_authenticate(self.farmer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/farmer/orders/{order_ids[0]}/status/', {'status': 'CONFIRMED'})
+
+        self.assertEqual(self.list_orders(page=1, status='PENDING')['count'], 1)
+        data = self.list_orders(page=1)
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(
+            {order['order_id']: order['order_status'] for order in data['results']},
+            {order_ids[0]: 'CONFIRMED', order_ids[1]: 'PENDING'}
+        )
+        # The unfiltered total survives a status change; only the page is rebuilt.
+        self.assertStats(page_misses=4, count_hits=1, count_misses=3)
+
+
+class BackfillFarmerOrdersTests(OrderAPITestCase):
+    def test_creates_missing_sub_orders_once(self):
+        placed = self.place(self.customer, [(self.apple, 1)]).data['id']
+        # Placed before sub-orders existed: no FarmerOrder rows.
+        legacy = Order.objects.create(customer=self.customer, status='CONFIRMED', total_amount=34)
+        OrderItem.objects.create(order=legacy, crop=self.apple, quantity_kg=2, price_per_kg=10)
+        OrderItem.objects.create(order=legacy, crop=self.bean, quantity_kg=2, price_per_kg=5)
+        OrderItem.objects.create(order=legacy, crop=self.corn, quantity_kg=2, price_per_kg=2)
+
+        self.client.force_authenticate(self.farmer)
+        self.assertEqual(self.client.get('/api/farmer/orders/', {'page': 1}).data['count'], 1)
+
+        out = StringIO()
+        call_command('backfill_farmer_orders', batch_size=1, stdout=out)
+        self.assertIn("Created 2 farmer orders for 1 orders.", out.getvalue())
+        self.assertEqual(
+            {
+                (row.farmer_id, row.status, row.subtotal, row.item_count, row.quantity_kg)
+                for row in FarmerOrder.objects.filter(order=legacy)
+            },
+            {
+                (self.farmer.id, 'CONFIRMED', 30, 2, 4),
+                (self.other_farmer.id, 'CONFIRMED', 4, 1, 2),
+            }
+        )
+        self.assertEqual(FarmerOrder.objects.filter(order_id=placed).count(), 1)
+
+        # The farmer's cached list is invalidated.
+        data = self.client.get('/api/farmer/orders/', {'page': 1}).data
+        self.assertEqual([order['order_id'] for order in data['results']], [legacy.id, placed])
+
+        out = StringIO()
+        call_command('backfill_farmer_orders', stdout=out)
+        self.assertIn("Created 0 farmer orders for 0 orders.", out.getvalue())
+
+
+class ReconcileDailyStatsTests(OrderAPITestCase):
+    def rollups(self):
+        return (
+            sorted(FarmerDailyStats.objects.values_list(
+                'farmer_id', 'day', 'order_count', 'pending_count', 'confirmed_revenue'
+            )),
+            sorted(CropDailyStats.objects.values_list('crop_id', 'day', 'order_count', 'quantity_kg', 'revenue')),
+        )
+
+    def reconcile(self, **options):
+        out = StringIO()
+        call_command('reconcile_farmer_daily_stats', stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run_reports_drift_and_real_run_repairs_it(self):
+        for _ in range(2):
+            self.place(self.customer, [(self.apple, 1), (self.bean, 1)])
+        self.place(self.customer, [(self.corn, 1)])
+        expected = self.rollups()
+
+        FarmerDailyStats.objects.filter(farmer=self.farmer).update(pending_count=5)
+        FarmerDailyStats.objects.create(farmer=self.farmer, day=date(2020, 1, 1), order_count=1)
+        CropDailyStats.objects.filter(crop=self.bean).delete()
+        drifted = self.rollups()
+
+        out = self.reconcile(dry_run=True)
+        self.assertIn("pending_count 5 -> 2", out)
+        self.assertIn(f"FarmerDailyStats {self.farmer.id} 2020-01-01: order_count 1 -> 0", out)
+        self.assertIn("found 3 drifted", out)
+        self.assertEqual(self.rollups(), drifted)
+
+        self.assertIn("repaired 3 drifted", self.reconcile())
+        self.assertEqual(self.rollups(), expected)
+        self.assertIn("for 1 farmers; repaired 0 drifted", self.reconcile(farmer_ids=[self.farmer.id]))
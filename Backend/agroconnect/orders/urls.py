@@ -3,14 +3,32 @@ from .views import (PlaceOrderView,
                     CustomerOrderListView ,
                     FarmerOrderListView,
                     FarmerUpdateOrderStatusView,
-                    farmer_orders_stream)
+                    FarmerBulkUpdateOrderStatusView,
+                    FarmerOrderChangesView,
+                    FarmerOrderCacheMetricsView,
+                    FarmerOrderExportView,
+                    FarmerAnalyticsView,
+                    CustomerOrderExportView,
+                    farmer_orders_stream,
+                    OrderStreamMetricsView,
+                    StockReservationView,
+                    StockReservationDetailView)
 
 
 urlpatterns = [
     path('orders/place/', PlaceOrderView.as_view()),
+    path('orders/reservations/', StockReservationView.as_view()),
+    path('orders/reservations/<int:reservation_id>/', StockReservationDetailView.as_view()),
     path('orders/', CustomerOrderListView.as_view()),
+    path('orders/export/', CustomerOrderExportView.as_view()),
     path('farmer/orders/', FarmerOrderListView.as_view()),
+    path('farmer/orders/status/', FarmerBulkUpdateOrderStatusView.as_view()),
+    path('farmer/orders/changes/', FarmerOrderChangesView.as_view()),
+    path('farmer/orders/export/', FarmerOrderExportView.as_view()),
+    path('farmer/analytics/', FarmerAnalyticsView.as_view()),
     path('farmer/orders/<int:order_id>/status/', FarmerUpdateOrderStatusView.as_view()),
     path('farmer/orders/stream/', farmer_orders_stream),
+    path('orders/stream/metrics/', OrderStreamMetricsView.as_view()),
+    path('orders/cache/metrics/', FarmerOrderCacheMetricsView.as_view()),
 
 ]
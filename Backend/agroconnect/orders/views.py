@@ -1,34 +1,81 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework import status
 
-from .models import Order, OrderItem, OrderStatusHistory
-from .serializers import OrderSerializer, FarmerOrderItemSerializer, OrderStatusUpdateSerializer
+from .analytics import AnalyticsError, FarmerAnalyticsQuery
+from .archive import parse_date_range, reaches_archive
+from .broker import farmer_channel, get_broker
+from .exports import CUSTOMER_COLUMNS, FARMER_COLUMNS, ExportError, streaming_export
+from .farmer_orders import (
+    FarmerOrderListQuery,
+    bump_farmer_orders_version,
+    cache_stats as farmer_orders_cache_stats,
+    create_farmer_orders,
+    farmer_items
+)
+from .idempotency import idempotent
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderItem,
+    FarmerOrder,
+    Order,
+    OrderEvent,
+    OrderEventSequence,
+    OrderItem,
+    OrderStatusHistory,
+    StockReservation
+)
+from .outbox import record_order_events
+from .rollups import (
+    record_customer_order_placed,
+    record_customer_status_change,
+    record_orders_placed,
+    record_status_change
+)
+from .reservations import (
+    ReservationError,
+    claim_reservations,
+    release_reservation,
+    reserve_stock
+)
+from .serializers import (
+    OrderSerializer,
+    FarmerOrderSerializer,
+    OrderStatusUpdateSerializer,
+    OrderStatusBulkUpdateSerializer,
+    StockReservationSerializer
+)
+from crops.cache import bump_catalog_cache_version
 from crops.models import Crop
+from crops.pagination import KeysetCursorPagination, merge_querysets
 from users.permissions import IsCustomer, IsFarmer
-from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.core.paginator import Paginator, EmptyPage
-from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Prefetch, Sum
+from django.utils import timezone
+from asgiref.sync import sync_to_async
 from django.http import StreamingHttpResponse, HttpResponseForbidden
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.core.handlers.asgi import ASGIRequest
+import asyncio
+import json
 import time
-import hashlib
+from collections import defaultdict, deque
 
 
-def _bump_farmer_orders_cache_version(farmer_id):
-    cache_key = f"farmer_orders_v_{farmer_id}"
-    try:
-        cache.incr(cache_key)
-    except ValueError:
-        cache.set(cache_key, 1, timeout=3600)
+def _bump_farmer_orders_cache_version(farmer_id, rows_changed=True):
+    def bump():
+        version = bump_farmer_orders_version(farmer_id, rows_changed)
+        # Tell the farmer's open order streams, in whichever process they live.
+        get_broker().publish(farmer_channel(farmer_id), {"version": version})
 
+    # After commit, so no reader caches or refetches the old rows.
+    transaction.on_commit(bump)
 
-def _paginate_queryset(queryset, request):
-    if 'page' not in request.query_params and 'page_size' not in request.query_params:
-        return None, None, None, None
 
+def _paginate_querysets(querysets, request):
+    """One numbered page of ``querysets`` read as one sequence, hot orders and archive alike."""
     page = int(request.query_params.get('page', 1))
     page_size = int(request.query_params.get('page_size', 10))
 
@@ -37,21 +84,46 @@ def _paginate_queryset(queryset, request):
     if page_size < 1:
         page_size = 10
 
-    paginator = Paginator(queryset, page_size)
-    try:
-        page_obj = paginator.page(page)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    total_count = sum(queryset.count() for queryset in querysets)
+    # Out-of-range pages show the last page.
+    page = min(page, max(1, -(-total_count // page_size)))
+    start = (page - 1) * page_size
+    return merge_querysets(querysets, start, start + page_size), total_count, page, page_size
 
-    return page_obj, paginator.count, page, page_size
 
+class _OrderRejected(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
 
 
+def _parse_order_items(items):
+    """
+    Validate the requested lines and return ({crop_id: total_kg}, error).
+    Items are normalised in place to integer crop_id and quantity_kg.
+    """
+    if not isinstance(items, list):
+        return None, "Items must be a list"
+
+    quantities = {}
+    for item in items:
+        try:
+            crop_id = int(item['crop_id'])
+            quantity = int(item['quantity_kg'])
+        except (KeyError, TypeError, ValueError):
+            return None, "Each item needs an integer crop_id and quantity_kg"
+        if quantity < 1:
+            return None, "Quantity must be at least 1 kg"
+        item['crop_id'], item['quantity_kg'] = crop_id, quantity
+        quantities[crop_id] = quantities.get(crop_id, 0) + quantity
+    return quantities, None
 
 
 class PlaceOrderView(APIView):
     permission_classes = [IsAuthenticated, IsCustomer]
 
+    @idempotent('place-order')
     def post(self, request):
         items = request.data.get('items', [])
         payment_method = request.data.get('payment_method', 'COD')
@@ -64,7 +136,8 @@ class PlaceOrderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not items:
+        reservation_ids = request.data.get('reservation_ids') or []
+        if not items and not reservation_ids:
             return Response(
                 {"error": "No items provided"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -85,123 +158,308 @@ class PlaceOrderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        quantities, error = _parse_order_items(items)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            reservation_ids = sorted({int(pk) for pk in reservation_ids})
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "reservation_ids must be a list of integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         payment_status = 'PAID' if payment_method in {'UPI', 'CARD'} else 'PENDING'
-        order = Order.objects.create(
+        try:
+            with transaction.atomic():
+                held = defaultdict(int)
+                for reservation in claim_reservations(request.user, reservation_ids):
+                    held[reservation.crop_id] += reservation.quantity_kg
+                crop_ids = sorted(set(quantities) | set(held))
+
+                crops = Crop.objects.filter(id__in=crop_ids).only(
+                    'id', 'name', 'farmer_id', 'price_per_kg', 'quantity_kg', 'reserved_kg'
+                ).order_by('id')
+                if quantities:
+                    # Lock every requested crop in one query, always in id
+                    # order so concurrent checkouts cannot deadlock. An order
+                    # made only of holds skips this: its stock was set aside
+                    # up front, so the crop rows see just the UPDATE below.
+                    crops = crops.select_for_update()
+                crops = {crop.id: crop for crop in crops}
+
+                missing_ids = [crop_id for crop_id in crop_ids if crop_id not in crops]
+                if missing_ids:
+                    raise _OrderRejected(
+                        f"Crop not found: {', '.join(map(str, missing_ids))}",
+                        status.HTTP_404_NOT_FOUND
+                    )
+                for crop_id, quantity in quantities.items():
+                    if quantity > crops[crop_id].available_kg:
+                        raise _OrderRejected(f"Insufficient stock for {crops[crop_id].name}")
+
+                lines = items + [
+                    {'crop_id': crop_id, 'quantity_kg': quantity}
+                    for crop_id, quantity in held.items()
+                ]
+                order = Order.objects.create(
+                    customer=request.user,
+                    total_amount=sum(
+                        crops[line['crop_id']].price_per_kg * line['quantity_kg']
+                        for line in lines
+                    ),
+                    payment_method=payment_method,
+                    payment_status=payment_status,
+                    delivery_name=delivery.get('name', ''),
+                    delivery_phone=delivery.get('phone', ''),
+                    delivery_address_line1=delivery.get('address_line1', ''),
+                    delivery_address_line2=delivery.get('address_line2', ''),
+                    delivery_city=delivery.get('city', ''),
+                    delivery_state=delivery.get('state', ''),
+                    delivery_postal_code=delivery.get('postal_code', '')
+                )
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        crop=crops[line['crop_id']],
+                        quantity_kg=line['quantity_kg'],
+                        price_per_kg=crops[line['crop_id']].price_per_kg
+                    )
+                    for line in lines
+                ])
+                farmer_orders = create_farmer_orders([order.id])
+
+                # The stock guard lives in the UPDATE itself, so even a
+                # database without row locks cannot take stock below zero.
+                # Held kg leave reserved_kg and quantity_kg together.
+                for crop_id in crop_ids:
+                    unreserved = quantities.get(crop_id, 0)
+                    reserved = held.get(crop_id, 0)
+                    updated = Crop.objects.filter(
+                        id=crop_id,
+                        quantity_kg__gte=F('reserved_kg') + unreserved,
+                        reserved_kg__gte=reserved
+                    ).update(
+                        quantity_kg=F('quantity_kg') - (unreserved + reserved),
+                        reserved_kg=F('reserved_kg') - reserved
+                    )
+                    if not updated:
+                        raise _OrderRejected(f"Insufficient stock for {crops[crop_id].name}")
+
+                # On every write path rollup rows are locked after crop rows, and
+                # farmer rollups before the customer's counters.
+                record_orders_placed(farmer_orders)
+                record_customer_order_placed(order)
+                record_order_events(
+                    OrderEvent.PLACED,
+                    {crop.farmer_id: [order.id] for crop in crops.values()},
+                    {"status": order.status}
+                )
+        except ReservationError as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+        except _OrderRejected as rejected:
+            return Response({"error": rejected.message}, status=rejected.status_code)
+
+        # .update() bypasses the Crop signals, so invalidate explicitly.
+        bump_catalog_cache_version(crop_ids)
+        for farmer_id in {crop.farmer_id for crop in crops.values()}:
+            _bump_farmer_orders_cache_version(farmer_id)
+
+        order = Order.objects.prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('crop'))
+        ).get(pk=order.pk)
+        serializer = OrderSerializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class StockReservationView(APIView):
+    permission_classes = [IsAuthenticated, IsCustomer]
+
+    def get(self, request):
+        reservations = StockReservation.objects.filter(
             customer=request.user,
-            payment_method=payment_method,
-            payment_status=payment_status,
-            delivery_name=delivery.get('name', ''),
-            delivery_phone=delivery.get('phone', ''),
-            delivery_address_line1=delivery.get('address_line1', ''),
-            delivery_address_line2=delivery.get('address_line2', ''),
-            delivery_city=delivery.get('city', ''),
-            delivery_state=delivery.get('state', ''),
-            delivery_postal_code=delivery.get('postal_code', '')
+            expires_at__gt=timezone.now()
+        ).select_related('crop').order_by('expires_at', 'id')
+        serializer = StockReservationSerializer(reservations, many=True)
+        return Response(serializer.data)
+
+    def post(self, request):
+        items = request.data.get('items', [])
+        if not items:
+            return Response(
+                {"error": "No items provided"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        quantities, error = _parse_order_items(items)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reservations = reserve_stock(request.user, quantities)
+        except ReservationError as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+
+        serializer = StockReservationSerializer(
+            StockReservation.objects.filter(
+                pk__in=[reservation.pk for reservation in reservations]
+            ).select_related('crop').order_by('id'),
+            many=True
         )
-        total = 0
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        affected_farmers = set()
-        for item in items:
-            crop = get_object_or_404(Crop, id=item['crop_id'])
 
-            if item['quantity_kg'] > crop.quantity_kg:
-                return Response(
-                    {"error": f"Insufficient stock for {crop.name}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+class StockReservationDetailView(APIView):
+    permission_classes = [IsAuthenticated, IsCustomer]
 
-            OrderItem.objects.create(
-                order=order,
-                crop=crop,
-                quantity_kg=item['quantity_kg'],
-                price_per_kg=crop.price_per_kg
-            )
+    def delete(self, request, reservation_id):
+        if not release_reservation(request.user, reservation_id):
+            return Response({"error": "Reservation not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-            total += crop.price_per_kg * item['quantity_kg']
-            crop.quantity_kg -= item['quantity_kg']
-            crop.save()
-            affected_farmers.add(crop.farmer_id)
 
-        order.total_amount = total
-        order.save()
+def _customer_orders(order_model, item_model, customer, date_from, date_to):
+    orders = order_model.objects.filter(customer=customer).prefetch_related(
+        Prefetch(
+            'items',
+            queryset=item_model.objects.select_related('crop').only(
+                'id', 'order_id', 'crop_id', 'crop__name', 'quantity_kg', 'price_per_kg'
+            )
+        )
+    ).order_by('-created_at', '-id')
+    if date_from:
+        orders = orders.filter(created_at__date__gte=date_from)
+    if date_to:
+        orders = orders.filter(created_at__date__lte=date_to)
+    return orders
 
-        for farmer_id in affected_farmers:
-            _bump_farmer_orders_cache_version(farmer_id)
 
-        serializer = OrderSerializer(order)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
 class CustomerOrderListView(APIView):
     permission_classes = [IsAuthenticated, IsCustomer]
 
     def get(self, request):
-        orders = Order.objects.filter(customer=request.user).order_by('-created_at')
-        page_obj, total_count, page, page_size = _paginate_queryset(orders, request)
-        if page_obj is None:
+        try:
+            date_from, date_to = parse_date_range(request.query_params)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Items and their crop names come from one extra query for the
+        # whole page instead of two per order.
+        querysets = [_customer_orders(Order, OrderItem, request.user, date_from, date_to)]
+        if reaches_archive(date_from, date_to):
+            querysets.append(
+                _customer_orders(ArchivedOrder, ArchivedOrderItem, request.user, date_from, date_to)
+            )
+
+        if 'page' in request.query_params:
+            orders, total_count, page, page_size = _paginate_querysets(querysets, request)
             serializer = OrderSerializer(orders, many=True)
-            return Response(serializer.data)
+            return Response({
+                "count": total_count,
+                "page": page,
+                "page_size": page_size,
+                "results": serializer.data
+            })
+
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_querysets(querysets, request, view=self)
+        serializer = OrderSerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        if request.query_params.get('include_count') in ('1', 'true'):
+            response.data['count'] = sum(queryset.count() for queryset in querysets)
+        return response
+
 
-        serializer = OrderSerializer(page_obj.object_list, many=True)
-        return Response({
-            "count": total_count,
-            "page": page,
-            "page_size": page_size,
-            "results": serializer.data
-        })
 class FarmerOrderListView(APIView):
     permission_classes = [IsAuthenticated, IsFarmer]
 
     def get(self, request):
-        order_items = OrderItem.objects.filter(
-            crop__farmer=request.user
-        ).select_related('order', 'crop').order_by('-order__created_at')
-
-        status_filter = request.query_params.get('status')
-        if status_filter and status_filter != 'ALL':
-            order_items = order_items.filter(order__status=status_filter)
-
-        search_term = request.query_params.get('search')
-        if search_term:
-            order_items = order_items.filter(crop__name__icontains=search_term)
-
-        sort_key = request.query_params.get('sort', 'newest')
-        sort_map = {
-            'newest': '-order__created_at',
-            'oldest': 'order__created_at',
-            'quantity_desc': '-quantity_kg',
-            'quantity_asc': 'quantity_kg',
-            'price_desc': '-price_per_kg',
-            'price_asc': 'price_per_kg'
-        }
-        order_items = order_items.order_by(sort_map.get(sort_key, '-order__created_at'))
-
-        page_obj, total_count, page, page_size = _paginate_queryset(order_items, request)
-        if page_obj is None:
-            serializer = FarmerOrderItemSerializer(order_items, many=True)
-            return Response(serializer.data)
-
-        cache_version = cache.get(f"farmer_orders_v_{request.user.id}", 1)
-        search_hash = hashlib.md5((search_term or '').encode('utf-8')).hexdigest()[:8]
-        cache_key = (
-            f"farmer_orders_{request.user.id}_v{cache_version}"
-            f"_p{page}_s{page_size}_st{status_filter or 'ALL'}"
-            f"_sr{sort_key}_q{search_hash}"
-        )
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return Response(cached)
-
-        serializer = FarmerOrderItemSerializer(page_obj.object_list, many=True)
-        payload = {
-            "count": total_count,
-            "page": page,
-            "page_size": page_size,
-            "results": serializer.data
-        }
-        cache.set(cache_key, payload, timeout=30)
-        return Response(payload)
+        try:
+            query = FarmerOrderListQuery(request.user.id, request.query_params)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(query.payload())
+
+
+class FarmerOrderExportView(APIView):
+    permission_classes = [IsAuthenticated, IsFarmer]
+
+    def get(self, request):
+        items = OrderItem.objects.filter(crop__farmer=request.user)
+        archived_items = ArchivedOrderItem.objects.filter(crop__farmer=request.user)
+        try:
+            return streaming_export(request, items, FARMER_COLUMNS, "farmer-orders", archived_items)
+        except ExportError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CustomerOrderExportView(APIView):
+    permission_classes = [IsAuthenticated, IsCustomer]
+
+    def get(self, request):
+        items = OrderItem.objects.filter(order__customer=request.user)
+        archived_items = ArchivedOrderItem.objects.filter(order__customer=request.user)
+        try:
+            return streaming_export(request, items, CUSTOMER_COLUMNS, "orders", archived_items)
+        except ExportError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class FarmerAnalyticsView(APIView):
+    """
+    Orders, kilograms and revenue of the farmer's crops per day, week or
+    month: ``?interval=day|week|month&from=YYYY-MM-DD&to=YYYY-MM-DD``.
+    """
+    permission_classes = [IsAuthenticated, IsFarmer]
+
+    def get(self, request):
+        try:
+            query = FarmerAnalyticsQuery(request.user.id, request.query_params)
+        except AnalyticsError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(query.payload())
+
+
+class FarmerOrderCacheMetricsView(APIView):
+    """Hit/miss counters of the farmer order list caches."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(farmer_orders_cache_stats())
+
+
+ALLOWED_STATUS_TRANSITIONS = {
+    'PENDING': {'CONFIRMED', 'CANCELLED'}
+}
+
+
+def _restore_cancelled_stock(order_ids):
+    """Put the items of cancelled orders back in stock, one UPDATE per crop."""
+    restored = OrderItem.objects.filter(order_id__in=order_ids).values('crop_id').annotate(
+        kg=Sum('quantity_kg')
+    ).order_by('crop_id')
+    crop_ids = []
+    for row in restored:
+        Crop.objects.filter(id=row['crop_id']).update(quantity_kg=F('quantity_kg') + row['kg'])
+        crop_ids.append(row['crop_id'])
+    # .update() bypasses the Crop signals, so invalidate after commit.
+    transaction.on_commit(lambda: bump_catalog_cache_version(crop_ids))
+    return crop_ids
+
+
+def _orders_by_farmer(order_ids):
+    """Map each farmer with items in ``order_ids`` to their orders among them."""
+    orders_by_farmer = defaultdict(list)
+    rows = FarmerOrder.objects.filter(order_id__in=order_ids).values_list('farmer_id', 'order_id')
+    for farmer_id, order_id in rows:
+        orders_by_farmer[farmer_id].append(order_id)
+    return orders_by_farmer
+
+
 class FarmerUpdateOrderStatusView(APIView):
     permission_classes = [IsAuthenticated, IsFarmer]
 
+    # The idempotency record is committed outside the status transaction.
+    @idempotent('order-status')
     @transaction.atomic
     def patch(self, request, order_id):
         serializer = OrderStatusUpdateSerializer(data=request.data)
@@ -212,9 +470,7 @@ class FarmerUpdateOrderStatusView(APIView):
         order = Order.objects.select_for_update().get(id=order_id)
 
         # Check if farmer owns at least one crop in this order
-        owns_order = order.items.filter(
-            crop__farmer=request.user
-        ).exists()
+        owns_order = FarmerOrder.objects.filter(order=order, farmer=request.user).exists()
 
         if not owns_order:
             return Response(
@@ -222,9 +478,7 @@ class FarmerUpdateOrderStatusView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        allowed_transitions = {
-            'PENDING': {'CONFIRMED', 'CANCELLED'}
-        }
+        allowed_transitions = ALLOWED_STATUS_TRANSITIONS
 
         if order.status not in allowed_transitions:
             return Response(
@@ -240,14 +494,16 @@ class FarmerUpdateOrderStatusView(APIView):
 
         # Restore stock if cancelled
         if new_status == 'CANCELLED' and order.status != 'CANCELLED':
-            for item in order.items.all():
-                crop = item.crop
-                crop.quantity_kg += item.quantity_kg
-                crop.save()
+            _restore_cancelled_stock([order.id])
 
         previous_status = order.status
         order.status = new_status
         order.save()
+        record_status_change([order.id], new_status)
+        FarmerOrder.objects.filter(order=order).update(status=new_status)
+        record_customer_status_change(
+            [(order.customer_id, previous_status, order.total_amount)], new_status
+        )
 
         OrderStatusHistory.objects.create(
             order=order,
@@ -256,7 +512,12 @@ class FarmerUpdateOrderStatusView(APIView):
             changed_by=request.user
         )
 
-        _bump_farmer_orders_cache_version(request.user.id)
+        orders_by_farmer = _orders_by_farmer([order.id])
+        record_order_events(OrderEvent.STATUS_CHANGED, orders_by_farmer, {"status": new_status})
+
+        # Every farmer with items in this order sees the change.
+        for farmer_id in orders_by_farmer:
+            _bump_farmer_orders_cache_version(farmer_id, rows_changed=False)
 
         return Response(
             {
@@ -267,43 +528,254 @@ class FarmerUpdateOrderStatusView(APIView):
         )
 
 
-def farmer_orders_stream(request):
+class FarmerBulkUpdateOrderStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsFarmer]
+
+    @idempotent('order-status-bulk')
+    def patch(self, request):
+        serializer = OrderStatusBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        new_status = serializer.validated_data['status']
+        order_ids = sorted(set(serializer.validated_data['order_ids']))
+
+        with transaction.atomic():
+            orders = {
+                order.id: order
+                for order in Order.objects.select_for_update().filter(
+                    id__in=order_ids
+                ).annotate(
+                    owned=Exists(FarmerOrder.objects.filter(
+                        order=OuterRef('pk'),
+                        farmer=request.user
+                    ))
+                ).only('id', 'status', 'customer_id', 'total_amount').order_by('id')
+            }
+
+            failed = []
+            updated = []
+            orders_by_farmer = {}
+            for order_id in order_ids:
+                order = orders.get(order_id)
+                if order is None:
+                    error = "Order not found"
+                elif not order.owned:
+                    error = "You are not allowed to update this order"
+                elif order.status not in ALLOWED_STATUS_TRANSITIONS:
+                    error = "Order status cannot be changed"
+                elif new_status not in ALLOWED_STATUS_TRANSITIONS[order.status]:
+                    error = "Invalid status transition"
+                else:
+                    updated.append(order)
+                    continue
+                failed.append({"order_id": order_id, "error": error})
+
+            if updated:
+                updated_ids = [order.id for order in updated]
+                Order.objects.filter(id__in=updated_ids).update(status=new_status)
+                if new_status == 'CANCELLED':
+                    _restore_cancelled_stock(updated_ids)
+                record_status_change(updated_ids, new_status)
+                FarmerOrder.objects.filter(order_id__in=updated_ids).update(status=new_status)
+                record_customer_status_change(
+                    [(order.customer_id, order.status, order.total_amount) for order in updated],
+                    new_status
+                )
+                OrderStatusHistory.objects.bulk_create([
+                    OrderStatusHistory(
+                        order=order,
+                        from_status=order.status,
+                        to_status=new_status,
+                        changed_by=request.user
+                    )
+                    for order in updated
+                ])
+                orders_by_farmer = _orders_by_farmer(updated_ids)
+                record_order_events(OrderEvent.STATUS_CHANGED, orders_by_farmer, {"status": new_status})
+
+        # Every farmer with items in these orders sees the change.
+        for farmer_id in orders_by_farmer:
+            _bump_farmer_orders_cache_version(farmer_id, rows_changed=False)
+
+        return Response({
+            "status": new_status,
+            "updated": [order.id for order in updated],
+            "failed": failed
+        })
+
+
+class FarmerOrderChangesView(APIView):
+    """
+    Farmer orders changed since ``?since=<seq>``. A client loads the full list
+    once, then keeps up by passing back ``next_since``. 410 means the
+    events it needs were compacted and it must reload the full list.
+    """
+    permission_classes = [IsAuthenticated, IsFarmer]
+    max_limit = 500
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', 200))
+        except ValueError:
+            return Response(
+                {"error": "since and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(max(limit, 1), self.max_limit)
+
+        sequence = OrderEventSequence.objects.filter(farmer=request.user).first()
+        last_seq = sequence.last_seq if sequence else 0
+        if sequence and since < sequence.compacted_seq:
+            return Response(
+                {"error": "Changes since this point are no longer available", "last_seq": last_seq},
+                status=status.HTTP_410_GONE
+            )
+
+        events = list(OrderEvent.objects.filter(
+            farmer=request.user,
+            seq__gt=since
+        ).order_by('seq').values_list('seq', 'order_id')[:limit + 1])
+        has_more = len(events) > limit
+        events = events[:limit]
+
+        order_ids = {order_id for _, order_id in events}
+        orders = FarmerOrder.objects.filter(
+            farmer=request.user,
+            order_id__in=order_ids
+        ).select_related('order', 'order__customer').prefetch_related(
+            farmer_items(request.user.id)
+        ).order_by('order_id')
+
+        return Response({
+            "since": since,
+            "next_since": events[-1][0] if events else max(since, last_seq),
+            "has_more": has_more,
+            "results": FarmerOrderSerializer(orders, many=True).data
+        })
+
+
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+SSE_RECENT_IDS = 200
+# WSGI streams only.
+SSE_POLL_SECONDS = 1
+
+
+def _authenticate_stream(request):
     auth = JWTAuthentication()
     token = request.GET.get("token")
-    user = None
 
     if token:
         try:
             validated_token = auth.get_validated_token(token)
-            user = auth.get_user(validated_token)
-        except Exception:
-            return HttpResponseForbidden("Invalid token")
-    else:
-        try:
-            result = auth.authenticate(request)
-        except Exception:
-            result = None
-        if result:
-            user = result[0]
-        else:
-            return HttpResponseForbidden("Authentication required")
+            return auth.get_user(validated_token), None
+        except AuthenticationFailed:
+            return None, HttpResponseForbidden("Invalid token")
+
+    try:
+        result = auth.authenticate(request)
+    except AuthenticationFailed:
+        result = None
+    if result:
+        return result[0], None
+    return None, HttpResponseForbidden("Authentication required")
+
+
+def _sse_message(event_id, data):
+    return f"id: {event_id}\nevent: orders\ndata: {json.dumps(data)}\n\n"
+
+
+async def _async_event_stream(channel, last_event_id):
+    broker = get_broker()
+    # Subscribed on the first read, so a client gone before then leaves
+    # nothing registered.
+    subscription = await broker.subscribe(channel, last_event_id)
+    # Ids can arrive out of order, so the stream remembers the ids it
+    # sent recently and reports the highest one as the resume point.
+    sent_id = last_event_id or 0
+    sent_ids = deque(maxlen=SSE_RECENT_IDS)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\nevent: ready\ndata: ok\n\n"
+        while True:
+            try:
+                event_id, data = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection.
+                yield ": heartbeat\n\n"
+                continue
+            # Replayed and live messages can overlap right after resume.
+            if event_id in sent_ids:
+                continue
+            sent_ids.append(event_id)
+            sent_id = max(sent_id, event_id)
+            yield _sse_message(sent_id, data)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _sync_event_stream(channel, last_event_id):
+    """
+    The stream under WSGI, which would read an async iterator to the end
+    before sending anything. Polls the broker from the request thread.
+    """
+    broker = get_broker()
+    sent_id = last_event_id if last_event_id is not None else broker.latest_id()
+    sent_ids = deque(maxlen=SSE_RECENT_IDS)
+    idle_since = time.monotonic()
+    yield f"retry: {SSE_RETRY_MS}\nevent: ready\ndata: ok\n\n"
+    while True:
+        for event_id, data in broker.poll(channel, sent_id):
+            if event_id in sent_ids:
+                continue
+            sent_ids.append(event_id)
+            sent_id = max(sent_id, event_id)
+            idle_since = time.monotonic()
+            yield _sse_message(sent_id, data)
+        if time.monotonic() - idle_since >= SSE_HEARTBEAT_SECONDS:
+            idle_since = time.monotonic()
+            yield ": heartbeat\n\n"
+        time.sleep(SSE_POLL_SECONDS)
+
+
+async def farmer_orders_stream(request):
+    """
+    Server-sent events telling a farmer their orders changed. Under ASGI
+    it runs on the event loop: an idle connection is a waiting coroutine,
+    not a worker thread. Event ids come from the broker, so a reconnecting
+    EventSource resumes from Last-Event-ID.
+    """
+    # Not thread-sensitive: that would give every open stream its own
+    # thread (and DB connection) for as long as it stays connected.
+    user, error = await sync_to_async(_authenticate_stream, thread_sensitive=False)(request)
+    if error:
+        return error
 
     if getattr(user, "role", None) != "FARMER":
         return HttpResponseForbidden("Forbidden")
 
-    cache_key = f"farmer_orders_v_{user.id}"
-    last_version = cache.get(cache_key, 1)
-
-    def event_stream():
-        nonlocal last_version
-        yield "event: ready\ndata: ok\n\n"
-        while True:
-            current_version = cache.get(cache_key, 1)
-            if current_version != last_version:
-                last_version = current_version
-                yield f"event: orders\ndata: {current_version}\n\n"
-            time.sleep(2)
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_event_id = None
 
-    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    channel = farmer_channel(user.id)
+    if isinstance(request, ASGIRequest):
+        stream = _async_event_stream(channel, last_event_id)
+    else:
+        stream = _sync_event_stream(channel, last_event_id)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
     response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
     return response
+
+
+class OrderStreamMetricsView(APIView):
+    """Connection and delivery counters of this process's order event broker."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_broker().metrics())
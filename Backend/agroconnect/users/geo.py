@@ -0,0 +1,108 @@
+"""
+Offline geocoding and distance search for farmer locations.
+
+FarmerProfile.location is free text, so coordinates come from the bundled
+gazetteer in users/data/gazetteer.csv (no network geocoder). Each located
+profile also stores ``geo_cell``, the id of the GRID_DEGREES x
+GRID_DEGREES cell it falls in. A radius search first narrows candidates
+with an indexed ``geo_cell IN (...)`` lookup over the cells covering the
+search circle, then applies the exact haversine distance.
+"""
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+EARTH_RADIUS_KM = 6371.0
+GRID_DEGREES = 0.25
+MAX_RADIUS_KM = 250
+
+_WORD_RE = re.compile(r'[a-z]+')
+
+
+def _normalize(text):
+    return ' '.join(_WORD_RE.findall((text or '').lower()))
+
+
+@lru_cache(maxsize=1)
+def _gazetteer():
+    places = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            coords = (float(row['latitude']), float(row['longitude']))
+            names = [row['name']] + [alias for alias in row['aliases'].split('|') if alias]
+            for name in names:
+                places[_normalize(name)] = coords
+    # Longest names first so "navi mumbai" wins over "mumbai".
+    return places, sorted(places, key=len, reverse=True)
+
+
+def geocode(location):
+    """Return (latitude, longitude) for a free-text location, or None."""
+    places, names_by_length = _gazetteer()
+    parts = [_normalize(part) for part in (location or '').split(',')]
+
+    for part in parts:
+        if part in places:
+            return places[part]
+
+    text = f" {_normalize(location)} "
+    for name in names_by_length:
+        if f" {name} " in text:
+            return places[name]
+    return None
+
+
+def geo_cell(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    row = math.floor((latitude + 90) / GRID_DEGREES)
+    col = math.floor((longitude + 180) / GRID_DEGREES)
+    return row * 10000 + col
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Ids of every grid cell that intersects the circle's bounding box."""
+    lat_delta = radius_km / 111.32
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    lon_delta = min(radius_km / (111.32 * cos_lat), 180)
+
+    min_row = math.floor((max(latitude - lat_delta, -90) + 90) / GRID_DEGREES)
+    max_row = math.floor((min(latitude + lat_delta, 90) + 90) / GRID_DEGREES)
+    min_col = math.floor((longitude - lon_delta + 180) / GRID_DEGREES)
+    max_col = math.floor((longitude + lon_delta + 180) / GRID_DEGREES)
+    cols_per_lap = round(360 / GRID_DEGREES)
+
+    return [
+        row * 10000 + (col % cols_per_lap)
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
+
+def haversine_km(latitude_field, longitude_field, latitude, longitude):
+    """Great-circle distance expression between two fields and a point."""
+    lat1 = Radians(latitude_field)
+    lat2 = Value(math.radians(latitude))
+    half_dlat = (lat1 - lat2) / 2
+    half_dlon = (Radians(longitude_field) - Value(math.radians(longitude))) / 2
+    a = Power(Sin(half_dlat), 2) + Cos(lat1) * Value(math.cos(math.radians(latitude))) * Power(Sin(half_dlon), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def within_radius(queryset, latitude, longitude, radius_km, profile_path=''):
+    """
+    Filter ``queryset`` to rows whose FarmerProfile (reached via
+    ``profile_path``) is within ``radius_km`` and annotate ``distance_km``.
+    """
+    prefix = f'{profile_path}__' if profile_path else ''
+    distance = haversine_km(f'{prefix}latitude', f'{prefix}longitude', latitude, longitude)
+    return queryset.filter(**{
+        f'{prefix}geo_cell__in': covering_cells(latitude, longitude, radius_km),
+    }).annotate(distance_km=distance).filter(distance_km__lte=radius_km)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from users.geo import geo_cell, geocode
+from users.models import FarmerProfile
+
+
+class Command(BaseCommand):
+    help = "Fill FarmerProfile latitude/longitude/geo_cell from the bundled gazetteer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-geocode profiles that already have coordinates.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        profiles = FarmerProfile.objects.only('id', 'location', 'latitude', 'longitude', 'geo_cell')
+        if not options['all']:
+            profiles = profiles.filter(latitude__isnull=True)
+
+        located = 0
+        unmatched = 0
+        batch = []
+        for profile in profiles.iterator(chunk_size=options['batch_size']):
+            coords = geocode(profile.location)
+            if coords is None:
+                unmatched += 1
+                continue
+            profile.latitude, profile.longitude = coords
+            profile.geo_cell = geo_cell(*coords)
+            batch.append(profile)
+            if len(batch) >= options['batch_size']:
+                FarmerProfile.objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+                located += len(batch)
+                batch = []
+        if batch:
+            FarmerProfile.objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+            located += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Geocoded {located} farmer profiles; {unmatched} locations not in the gazetteer."
+        ))
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from .geo import geo_cell, geocode
+
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -17,9 +19,29 @@ class FarmerProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     farm_name = models.CharField(max_length=100)
     location = models.CharField(max_length=100)
+    # Geocoded from `location` with the bundled gazetteer (users.geo).
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.IntegerField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return self.farm_name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location = instance.__dict__.get('location')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.location != getattr(self, '_loaded_location', None) or self.latitude is None:
+            self.latitude, self.longitude = geocode(self.location) or (None, None)
+            self._loaded_location = self.location
+        self.geo_cell = geo_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude', 'geo_cell'}
+        super().save(*args, **kwargs)
 class CustomerProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     address = models.TextField()
@@ -1,3 +1,51 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from rest_framework.test import APIClient
+
+from agroconnect.query_plans import QueryPlanTestCase
+from crops.models import Crop
+from orders.farmer_orders import create_farmer_orders
+from orders.models import CustomerOrderStats, Order, OrderItem
+from orders.rollups import record_orders_placed
+from .models import FarmerProfile, User
+
+
+class DashboardQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user('farmer', password='x', role='FARMER')
+        FarmerProfile.objects.create(user=cls.farmer, farm_name='Farm', location='Pune')
+        cls.customer = User.objects.create_user('customer', password='x', role='CUSTOMER')
+        crop = Crop.objects.create(
+            farmer=cls.farmer, name='Apple', category='Fruit', price_per_kg=40,
+            quantity_kg=100, harvest_date=date(2026, 1, 1)
+        )
+        for status in ('PENDING', 'CONFIRMED', 'CANCELLED'):
+            order = Order.objects.create(customer=cls.customer, status=status, total_amount=40)
+            OrderItem.objects.create(order=order, crop=crop, quantity_kg=1, price_per_kg=40)
+            record_orders_placed(create_farmer_orders([order.id]))
+
+    def test_farmer_dashboard_and_profile(self):
+        client = APIClient()
+        client.force_authenticate(self.farmer)
+        with self.assertUsesIndexes():
+            response = client.get('/api/auth/farmer/dashboard/')
+            client.get('/api/auth/farmer/profile/')
+        self.assertEqual(response.data['metrics']['total_orders'], 3)
+
+    def test_customer_dashboard(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        # Without a counters row the metrics are recounted in one query.
+        with self.assertUsesIndexes(), self.assertNumQueries(2):
+            recounted = client.get('/api/auth/customer/dashboard/').data['metrics']
+        self.assertEqual(recounted['confirmed_orders'], 1)
+        self.assertEqual(recounted['recent_orders'], 3)
+
+        CustomerOrderStats.objects.create(
+            customer=self.customer, total_orders=3, pending_orders=1,
+            confirmed_orders=1, cancelled_orders=1, total_spent=40
+        )
+        with self.assertUsesIndexes(), self.assertNumQueries(1):
+            response = client.get('/api/auth/customer/dashboard/')
+        self.assertEqual(response.data['metrics'], recounted)
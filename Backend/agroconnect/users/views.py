@@ -6,18 +6,15 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from .permissions import IsFarmer, IsCustomer
 from django.contrib.auth import authenticate
-from django.db.models import Sum, F, DecimalField, IntegerField, Value
+from django.db.models import Count, Sum, IntegerField, Value
 from django.db.models.functions import Coalesce
-from django.utils import timezone
-from datetime import timedelta
-from decimal import Decimal
 
 
 
 from .serializers import RegisterSerializer
 # from .models import User
 from crops.models import Crop
-from orders.models import OrderItem, Order
+from orders.rollups import customer_dashboard_totals, dashboard_totals
 from .models import FarmerProfile
 from rest_framework import serializers
 
@@ -72,102 +69,43 @@ class FarmerDashboardView(APIView):
 
     def get(self, request):
         user = request.user
-        crops_qs = Crop.objects.filter(farmer=user)
-        order_items_qs = OrderItem.objects.filter(crop__farmer=user)
-
-        total_crops = crops_qs.count()
-        total_stock_kg = crops_qs.aggregate(
-            total=Coalesce(
+        crops = Crop.objects.filter(farmer=user).aggregate(
+            total_crops=Count('id'),
+            total_stock_kg=Coalesce(
                 Sum('quantity_kg'),
                 Value(0),
                 output_field=IntegerField()
             )
-        )['total']
-
-        total_orders = order_items_qs.values('order_id').distinct().count()
-        pending_orders = order_items_qs.filter(
-            order__status='PENDING'
-        ).values('order_id').distinct().count()
-        confirmed_orders = order_items_qs.filter(
-            order__status='CONFIRMED'
-        ).values('order_id').distinct().count()
-        cancelled_orders = order_items_qs.filter(
-            order__status='CANCELLED'
-        ).values('order_id').distinct().count()
-
-        revenue_expr = F('quantity_kg') * F('price_per_kg')
-        confirmed_revenue = order_items_qs.filter(
-            order__status='CONFIRMED'
-        ).aggregate(
-            total=Coalesce(
-                Sum(
-                    revenue_expr,
-                    output_field=DecimalField(max_digits=12, decimal_places=2)
-                ),
-                Value(Decimal("0.00")),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            )
-        )['total']
-
-        last_7_days = timezone.now() - timedelta(days=7)
-        recent_orders = order_items_qs.filter(
-            order__created_at__gte=last_7_days
-        ).values('order_id').distinct().count()
+        )
+        # Order metrics come from the daily rollups, which also count
+        # archived orders.
+        orders = dashboard_totals(user.id)
 
         return Response({
             "message": "Welcome Farmer",
             "username": user.username,
-            "metrics": {
-                "total_crops": total_crops,
-                "total_stock_kg": total_stock_kg,
-                "total_orders": total_orders,
-                "pending_orders": pending_orders,
-                "confirmed_orders": confirmed_orders,
-                "cancelled_orders": cancelled_orders,
-                "confirmed_revenue": confirmed_revenue,
-                "recent_orders": recent_orders
-            }
+            "metrics": {**crops, **orders}
         })
 class CustomerDashboardView(APIView):
     permission_classes = [IsAuthenticated, IsCustomer]
 
     def get(self, request):
         user = request.user
-        orders_qs = Order.objects.filter(customer=user)
-
-        total_orders = orders_qs.count()
-        pending_orders = orders_qs.filter(status='PENDING').count()
-        confirmed_orders = orders_qs.filter(status='CONFIRMED').count()
-        cancelled_orders = orders_qs.filter(status='CANCELLED').count()
-        total_spent = orders_qs.filter(status='CONFIRMED').aggregate(
-            total=Coalesce(
-                Sum('total_amount'),
-                Value(Decimal("0.00")),
-                output_field=DecimalField(max_digits=10, decimal_places=2)
-            )
-        )['total']
-
-        last_7_days = timezone.now() - timedelta(days=7)
-        recent_orders = orders_qs.filter(created_at__gte=last_7_days).count()
+        # One counters row, archived orders included.
+        metrics = customer_dashboard_totals(user.id)
 
         return Response({
             "message": "Welcome Customer",
             "username": user.username,
-            "metrics": {
-                "total_orders": total_orders,
-                "pending_orders": pending_orders,
-                "confirmed_orders": confirmed_orders,
-                "cancelled_orders": cancelled_orders,
-                "total_spent": total_spent,
-                "recent_orders": recent_orders
-            }
+            "metrics": metrics
         })
 
 
 class FarmerProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = FarmerProfile
-        fields = ["farm_name", "location"]
+        fields = ["farm_name", "location", "latitude", "longitude"]
+        read_only_fields = ["latitude", "longitude"]
 
 
 class FarmerProfileView(APIView):
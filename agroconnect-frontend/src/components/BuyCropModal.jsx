@@ -71,7 +71,7 @@ export default function BuyCropModal({ crop, onClose, onSuccess }) {
         setReviewsLoading(true);
         const res = await api.get(`crops/${crop.id}/reviews/`);
         if (active) {
-          setReviews(Array.isArray(res.data) ? res.data : []);
+          setReviews(Array.isArray(res.data) ? res.data : res.data.results ?? []);
         }
       } catch (err) {
         console.error("Review fetch failed", err);
@@ -139,7 +139,7 @@ export default function BuyCropModal({ crop, onClose, onSuccess }) {
       });
       setReviewForm({ rating: 5, comment: "" });
       const res = await api.get(`crops/${crop.id}/reviews/`);
-      setReviews(Array.isArray(res.data) ? res.data : []);
+      setReviews(Array.isArray(res.data) ? res.data : res.data.results ?? []);
     } catch (err) {
       setReviewError(err.response?.data?.error || "Review submission failed");
     } finally {
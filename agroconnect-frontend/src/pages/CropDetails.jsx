@@ -61,7 +61,7 @@ export default function CropDetails() {
         setReviewsLoading(true);
         const res = await api.get(`crops/${id}/reviews/`);
         if (active) {
-          setReviews(Array.isArray(res.data) ? res.data : []);
+          setReviews(Array.isArray(res.data) ? res.data : res.data.results ?? []);
         }
       } catch (err) {
         console.error("Review fetch failed", err);
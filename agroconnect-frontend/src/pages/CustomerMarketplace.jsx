@@ -1,13 +1,18 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { useSearchParams } from "react-router-dom";
 import api from "../api/axios";
 import CropCard from "../components/CropCard";
 import BuyCropModal from "../components/BuyCropModal";
 
+// The cursor of a `next` link, requested through `api` so its base URL applies.
+const nextCursor = (next) => (next ? new URL(next).searchParams.get("cursor") : null);
+
 export default function CustomerMarketplace() {
   const [searchParams] = useSearchParams();
   const [crops, setCrops] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedCrop, setSelectedCrop] = useState(null);
   const [filters, setFilters] = useState({
     search: "",
@@ -27,6 +32,8 @@ export default function CustomerMarketplace() {
     });
     return params;
   }, [filters]);
+  const queryParamsRef = useRef(queryParams);
+  queryParamsRef.current = queryParams;
 
   useEffect(() => {
     const search = searchParams.get("search") || "";
@@ -36,21 +43,48 @@ export default function CustomerMarketplace() {
   }, [searchParams]);
 
   useEffect(() => {
+    let ignore = false;
+    setLoading(true);
     api
       .get("/crops/", { params: queryParams })
       .then((res) => {
+        if (ignore) return;
         if (Array.isArray(res.data)) {
           setCrops(res.data);
+          setCursor(null);
         } else if (res.data.results) {
           setCrops(res.data.results);
+          setCursor(nextCursor(res.data.next));
         }
       })
       .catch((err) => {
         console.error("Crop fetch failed", err);
       })
-      .finally(() => setLoading(false));
+      .finally(() => {
+        if (!ignore) setLoading(false);
+      });
+    return () => {
+      ignore = true;
+    };
   }, [queryParams]);
 
+  const loadMore = () => {
+    const params = queryParams;
+    setLoadingMore(true);
+    api
+      .get("/crops/", { params: { ...params, cursor } })
+      .then((res) => {
+        // Filters changed meanwhile: these rows belong to the old list.
+        if (queryParamsRef.current !== params) return;
+        setCrops((prev) => [...prev, ...res.data.results]);
+        setCursor(nextCursor(res.data.next));
+      })
+      .catch((err) => {
+        console.error("Crop fetch failed", err);
+      })
+      .finally(() => setLoadingMore(false));
+  };
+
   const handleFilterChange = (event) => {
     const { name, value } = event.target;
     setFilters((prev) => ({
@@ -165,7 +199,11 @@ export default function CustomerMarketplace() {
               <div>
                 <h2 className="section-title">All Crops</h2>
                 <p className="section-sub">
-                  {loading ? "Loading crops..." : `${crops.length} results`}
+                  {loading
+                    ? "Loading crops..."
+                    : cursor
+                      ? `Showing ${crops.length} crops`
+                      : `${crops.length} results`}
                 </p>
               </div>
               <div className="flex items-center gap-2">
@@ -190,15 +228,28 @@ export default function CustomerMarketplace() {
                 No crops available right now.
               </div>
             ) : (
-              <div className="grid gap-6 sm:grid-cols-2 lg:grid-cols-3">
-                {crops.map((crop) => (
-                  <CropCard
-                    key={crop.id}
-                    crop={crop}
-                    onBuy={() => setSelectedCrop(crop)}
-                  />
-                ))}
-              </div>
+              <>
+                <div className="grid gap-6 sm:grid-cols-2 lg:grid-cols-3">
+                  {crops.map((crop) => (
+                    <CropCard
+                      key={crop.id}
+                      crop={crop}
+                      onBuy={() => setSelectedCrop(crop)}
+                    />
+                  ))}
+                </div>
+                {cursor && (
+                  <div className="text-center">
+                    <button
+                      onClick={loadMore}
+                      disabled={loadingMore}
+                      className="btn-outline"
+                    >
+                      {loadingMore ? "Loading..." : "Load more crops"}
+                    </button>
+                  </div>
+                )}
+              </>
             )}
           </section>
         </div>
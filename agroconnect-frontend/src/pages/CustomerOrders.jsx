@@ -2,10 +2,15 @@ import { useEffect, useState } from "react";
 import api from "../api/axios";
 import OrderStatusBadge from "../components/OrderStatusBadge";
 
+// The cursor of a `next` link, requested through `api` so its base URL applies.
+const nextCursor = (next) => (next ? new URL(next).searchParams.get("cursor") : null);
+
 export default function CustomerOrders() {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchOrders = async () => {
@@ -17,6 +22,7 @@ export default function CustomerOrders() {
           setOrders(res.data);
         } else if (res.data.results) {
           setOrders(res.data.results);
+          setCursor(nextCursor(res.data.next));
         } else {
           setOrders([]);
         }
@@ -36,6 +42,19 @@ export default function CustomerOrders() {
     fetchOrders();
   }, []);
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const res = await api.get("orders/", { params: { cursor } });
+      setOrders((prev) => [...prev, ...res.data.results]);
+      setCursor(nextCursor(res.data.next));
+    } catch (err) {
+      console.error("Failed to load customer orders", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="p-6">
       <h1 className="text-3xl font-bold text-farmGreen mb-6">
@@ -85,6 +104,17 @@ export default function CustomerOrders() {
               </div>
             </div>
           ))}
+          {cursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="btn-outline"
+              >
+                {loadingMore ? "Loading..." : "Load more orders"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -64,10 +64,8 @@ export default function FarmerOrders() {
       fetchOrders();
     };
 
+    // EventSource reconnects on its own and resumes from Last-Event-ID.
     source.addEventListener("orders", onOrdersUpdate);
-    source.onerror = () => {
-      source.close();
-    };
 
     return () => source.close();
   }, [fetchOrders]);
@@ -149,7 +147,7 @@ export default function FarmerOrders() {
             <thead className="bg-gray-100">
               <tr>
                 <th className="p-2">Order ID</th>
-                <th className="p-2">Crop</th>
+                <th className="p-2">Crops</th>
                 <th className="p-2">Quantity (kg)</th>
                 <th className="p-2">Total (Rs)</th>
                 <th className="p-2">Status</th>
@@ -190,18 +188,20 @@ export default function FarmerOrders() {
                   ))
                 : orderItems.map((item) => {
                     const quantity = Number(item.quantity_kg ?? 0);
-                    const pricePerKg = Number(item.price_per_kg ?? 0);
-                    const total = quantity * pricePerKg;
+                    const total = Number(item.subtotal ?? 0);
+                    const crops = (item.items ?? [])
+                      .map((line) => `${line.crop_name ?? line.crop} (${line.quantity_kg} kg)`)
+                      .join(", ");
 
                     return (
                       <tr
-                        key={`${item.order_id}-${item.crop}`}
+                        key={item.order_id}
                         className="border-t text-center"
                       >
                         <td className="p-2">{item.order_id}</td>
 
                         <td className="p-2">
-                          {item.crop_name ?? item.crop ?? "Unknown"}
+                          {crops || "Unknown"}
                         </td>
 
                         <td className="p-2">